@@ -1,69 +1,339 @@
+import time
+BOOT_STARTED = time.perf_counter()
+
 import os
+import subprocess
+import sys
 from datetime import datetime
+import click
 from bson.objectid import ObjectId
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g
 from flask_pymongo import PyMongo
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 from pymongo.errors import PyMongoError
 from bson.errors import InvalidId
-OMDB_API_KEY = os.getenv("OMDB_API_KEY")
+from cache import TTLCache
+from enrichment import attach, fetch_values
+from pagination import keyset_page
+from omdb import OmdbCache, OmdbService
+from omdb_client import OMDB_URL, CircuitBreaker, OmdbClient
+from view_counter import ViewCounter
+from ratings import apply_rating, rating_distribution, reconcile_ratings
+from indexes import ensure_indexes, seed_audit_data, audit
+from trending import TrendingSnapshot
+from follow_graph import FollowGraph, FOLLOWERS, FOLLOWING
+from watchlists import WatchlistStore
+from film_search import FilmSearch, TitleIndex
+from stats import StatsService
+from images import UPLOAD_SUBDIR, ImagePipeline, pick_variant
+from posters import HttpFetcher, PosterMirror, is_remote
+from static_assets import StaticAssets
+from query_profiler import QueryProfiler
+from fanout import FanOut
+from metrics import Metrics, MongoMetrics
+from moderation import ACTIONS as MODERATION_ACTIONS, ModerationQueue
+from reactions import LIKE, DISLIKE, react, viewer_reactions, migrate_reactions
 # Load environment variables
 load_dotenv()
+OMDB_API_KEY = os.getenv("OMDB_API_KEY")
 
-# Initialize Flask app
-app = Flask(__name__)
+mongo = PyMongo()
+query_profiler = QueryProfiler()
+fanout = FanOut()
+metrics = Metrics()
+mongo_metrics = MongoMetrics(metrics)
+
+
+# Dipanggil sekali saat import; import tidak menghubungi MongoDB (koneksi dibuka saat query pertama)
+def configure_app():
+    app = Flask(__name__)
+
+    # Configuration from .env
+    app.secret_key = os.environ.get("SECRET_KEY", "secret124")
+    # Tanpa MONGO_URI app tetap bisa di-import (test, tools); /readyz yang akan gagal
+    app.config["MONGO_URI"] = os.environ.get("MONGO_URI", "mongodb://localhost:27017/fiew")
+    app.config["UPLOAD_FOLDER"] = os.environ.get("UPLOAD_FOLDER", "./static/images")
+    # Variant gambar upload dibuat di background: jumlah worker dan batas antrian
+    app.config["IMAGE_WORKERS"] = int(os.environ.get("IMAGE_WORKERS", 2))
+    app.config["IMAGE_MAX_PENDING"] = int(os.environ.get("IMAGE_MAX_PENDING", 32))
+    # File static diberi hash di nama (cache 1 tahun) dan versi gzip/brotli disimpan di STATIC_BUILD_DIR
+    app.config["STATIC_FINGERPRINT"] = os.environ.get("STATIC_FINGERPRINT", "1") == "1"
+    app.config["STATIC_BUILD_DIR"] = os.environ.get("STATIC_BUILD_DIR", "./static-build")
+    # Poster OMDb disalin ke lokal; timeout unduh (detik) dan jeda sebelum mencoba ulang yang gagal
+    app.config["POSTER_MIRROR"] = os.environ.get("POSTER_MIRROR", "1") == "1"
+    app.config["POSTER_FETCH_TIMEOUT"] = float(os.environ.get("POSTER_FETCH_TIMEOUT", 10))
+    app.config["POSTER_RETRY_AFTER"] = int(os.environ.get("POSTER_RETRY_AFTER", 24 * 3600))
+    # Detik user identity boleh di-cache lintas request (0 = nonaktif)
+    app.config["USER_CACHE_TTL"] = int(os.environ.get("USER_CACHE_TTL", 0))
+    app.config["FILMS_PAGE_SIZE"] = int(os.environ.get("FILMS_PAGE_SIZE", 24))
+    app.config["FOLLOWERS_PAGE_SIZE"] = int(os.environ.get("FOLLOWERS_PAGE_SIZE", 24))
+    app.config["MODERATION_PAGE_SIZE"] = int(os.environ.get("MODERATION_PAGE_SIZE", 25))
+    # Cache preview watchlist per user (detik) dan jumlah poster yang ditampilkan
+    app.config["WATCHLIST_PREVIEW_TTL"] = int(os.environ.get("WATCHLIST_PREVIEW_TTL", 30))
+    app.config["WATCHLIST_PREVIEW_SIZE"] = int(os.environ.get("WATCHLIST_PREVIEW_SIZE", 6))
+    # Cache hasil OMDb (detik); hasil "not found" disimpan lebih singkat
+    app.config["OMDB_CACHE_TTL"] = int(os.environ.get("OMDB_CACHE_TTL", 6 * 3600))
+    app.config["OMDB_NEGATIVE_CACHE_TTL"] = int(os.environ.get("OMDB_NEGATIVE_CACHE_TTL", 600))
+    app.config["OMDB_CACHE_SIZE"] = int(os.environ.get("OMDB_CACHE_SIZE", 2048))
+    app.config["OMDB_CACHE_PERSIST"] = os.environ.get("OMDB_CACHE_PERSIST", "1") == "1"
+    # Koneksi ke OMDb: pool keep-alive, timeout (detik), retry dan circuit breaker
+    app.config["OMDB_URL"] = os.environ.get("OMDB_URL", OMDB_URL)
+    app.config["OMDB_POOL_SIZE"] = int(os.environ.get("OMDB_POOL_SIZE", 10))
+    app.config["OMDB_CONNECT_TIMEOUT"] = float(os.environ.get("OMDB_CONNECT_TIMEOUT", 2))
+    app.config["OMDB_READ_TIMEOUT"] = float(os.environ.get("OMDB_READ_TIMEOUT", 5))
+    app.config["OMDB_RETRIES"] = int(os.environ.get("OMDB_RETRIES", 2))
+    app.config["OMDB_BREAKER_THRESHOLD"] = int(os.environ.get("OMDB_BREAKER_THRESHOLD", 5))
+    app.config["OMDB_BREAKER_RESET"] = float(os.environ.get("OMDB_BREAKER_RESET", 30))
+    # Views ditulis berkala (detik, 0 = langsung); ini batas keterlambatan angka views
+    app.config["VIEW_FLUSH_INTERVAL"] = float(os.environ.get("VIEW_FLUSH_INTERVAL", 5))
+    app.config["VIEW_FLUSH_MAX_PENDING"] = int(os.environ.get("VIEW_FLUSH_MAX_PENDING", 500))
+    # Views yang belum tertulis saat worker berhenti disimpan di sini ("" = dibuang)
+    app.config["VIEW_SPOOL_DIR"] = os.environ.get("VIEW_SPOOL_DIR", "./view-spool") or None
+    # Pencarian lokal dulu; index autocomplete di memori dibangun ulang tiap N detik
+    app.config["SEARCH_RESULTS_LIMIT"] = int(os.environ.get("SEARCH_RESULTS_LIMIT", 20))
+    app.config["AUTOCOMPLETE_LIMIT"] = int(os.environ.get("AUTOCOMPLETE_LIMIT", 8))
+    app.config["AUTOCOMPLETE_REFRESH_INTERVAL"] = float(os.environ.get("AUTOCOMPLETE_REFRESH_INTERVAL", 600))
+    # Daftar film populer/terbaru dihitung ulang di background tiap N detik
+    app.config["TRENDING_REFRESH_INTERVAL"] = float(os.environ.get("TRENDING_REFRESH_INTERVAL", 60))
+    app.config["TRENDING_SIZE"] = int(os.environ.get("TRENDING_SIZE", 10))
+    app.config["TRENDING_MATERIALIZE"] = os.environ.get("TRENDING_MATERIALIZE", "1") == "1"
+    # Statistik dashboard admin: interval refresh (detik) dan panjang grafik harian
+    app.config["STATS_REFRESH_INTERVAL"] = float(os.environ.get("STATS_REFRESH_INTERVAL", 300))
+    app.config["STATS_DAYS"] = int(os.environ.get("STATS_DAYS", 14))
+    # Pool koneksi MongoDB per proses (client dibuat lazy, koneksi pertama saat query pertama)
+    app.config["MONGO_MAX_POOL_SIZE"] = int(os.environ.get("MONGO_MAX_POOL_SIZE", 50))
+    app.config["MONGO_MIN_POOL_SIZE"] = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+    app.config["MONGO_MAX_IDLE_TIME_MS"] = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 60000))
+    app.config["MONGO_WAIT_QUEUE_TIMEOUT_MS"] = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000))
+    app.config["MONGO_SERVER_SELECTION_TIMEOUT_MS"] = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+    app.config["MONGO_CONNECT_TIMEOUT_MS"] = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 30000))
+    app.config["MONGO_SOCKET_TIMEOUT_MS"] = int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", 30000))
+    # Thread per proses untuk menjalankan query independen satu halaman sekaligus (0 = berurutan)
+    app.config["QUERY_FANOUT_WORKERS"] = int(os.environ.get("QUERY_FANOUT_WORKERS", 8))
+    # Profil query Mongo per request (header Server-Timing), log query lambat (ms),
+    # dan jumlah profil request terakhir untuk /debug/queries (0 = nonaktif)
+    app.config["QUERY_PROFILER"] = os.environ.get("QUERY_PROFILER", "1") == "1"
+    app.config["SLOW_QUERY_MS"] = float(os.environ.get("SLOW_QUERY_MS", 100))
+    app.config["QUERY_PROFILE_HISTORY"] = int(os.environ.get("QUERY_PROFILE_HISTORY", 0))
+    # Endpoint /metrics (format Prometheus); kalau METRICS_TOKEN diisi, wajib sebagai Bearer token
+    app.config["METRICS"] = os.environ.get("METRICS", "1") == "1"
+    app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN")
+    # Batas waktu import app per worker (detik); dicek oleh `flask boot-time`
+    app.config["BOOT_TIME_BUDGET"] = float(os.environ.get("BOOT_TIME_BUDGET", 2.0))
+
+    if "MONGO_URI" not in os.environ:
+        app.logger.warning("MONGO_URI not set, using %s", app.config["MONGO_URI"])
+    event_listeners = []
+    fanout.workers = app.config["QUERY_FANOUT_WORKERS"]
+    if app.config["QUERY_PROFILER"]:
+        query_profiler.init_app(app)
+        event_listeners.append(query_profiler)
+        # Query dari thread fan-out tetap dihitung ke request yang memulainya
+        fanout.propagate(lambda: query_profiler.attached(query_profiler.current))
+    if app.config["METRICS"]:
+        metrics.init_app(app)
+        event_listeners.append(mongo_metrics)
+    mongo.init_app(
+        app,
+        connect=False,
+        event_listeners=event_listeners,
+        maxPoolSize=app.config["MONGO_MAX_POOL_SIZE"],
+        minPoolSize=app.config["MONGO_MIN_POOL_SIZE"],
+        maxIdleTimeMS=app.config["MONGO_MAX_IDLE_TIME_MS"],
+        waitQueueTimeoutMS=app.config["MONGO_WAIT_QUEUE_TIMEOUT_MS"],
+        serverSelectionTimeoutMS=app.config["MONGO_SERVER_SELECTION_TIMEOUT_MS"],
+        connectTimeoutMS=app.config["MONGO_CONNECT_TIMEOUT_MS"],
+        socketTimeoutMS=app.config["MONGO_SOCKET_TIMEOUT_MS"]
+    )
+    return app
+
+
+app = configure_app()
+
+# Collections (handle saja, belum ada koneksi)
+db = mongo.db
+users = db.users
+films = db.films
+reviews = db.reviews
+reports = db.reports
+articles = db.articles
+follows = db.follows
+reactions = db.reactions
+watchlists = db.watchlists
+
+# Metrics OMDb per percobaan request (outcome: ok, timeout, server_error, circuit_open, ...)
+metrics.counter('omdb_requests_total', 'OMDb API attempts by outcome.', ('outcome',))
+metrics.histogram('omdb_request_duration_seconds', 'OMDb API attempt latency.', ('outcome',))
+
+def observe_omdb(outcome, seconds):
+    metrics.inc('omdb_requests_total', outcome=outcome)
+    if outcome != 'circuit_open':
+        metrics.observe('omdb_request_duration_seconds', seconds, outcome=outcome)
+
+# Cache OMDb: memori + (opsional) koleksi omdb_cache dengan TTL index
+omdb_cache = OmdbCache(
+    maxsize=app.config["OMDB_CACHE_SIZE"],
+    ttl=app.config["OMDB_CACHE_TTL"],
+    negative_ttl=app.config["OMDB_NEGATIVE_CACHE_TTL"],
+    collection=db.omdb_cache if app.config["OMDB_CACHE_PERSIST"] else None
+)
+omdb_client = OmdbClient(
+    OMDB_API_KEY,
+    base_url=app.config["OMDB_URL"],
+    pool_size=app.config["OMDB_POOL_SIZE"],
+    connect_timeout=app.config["OMDB_CONNECT_TIMEOUT"],
+    read_timeout=app.config["OMDB_READ_TIMEOUT"],
+    retries=app.config["OMDB_RETRIES"],
+    breaker=CircuitBreaker(app.config["OMDB_BREAKER_THRESHOLD"], app.config["OMDB_BREAKER_RESET"]),
+    observer=observe_omdb
+)
+omdb = OmdbService(omdb_client, omdb_cache)
 
-# Configuration from .env
-app.secret_key = os.environ.get("SECRET_KEY", "secret124")
-app.config["MONGO_URI"] = os.environ.get("MONGO_URI")
-app.config["UPLOAD_FOLDER"] = os.environ.get("UPLOAD_FOLDER", "./static/images")
+view_counter = ViewCounter(
+    {'films': films, 'articles': articles},
+    flush_interval=app.config["VIEW_FLUSH_INTERVAL"],
+    max_pending=app.config["VIEW_FLUSH_MAX_PENDING"],
+    spool_dir=app.config["VIEW_SPOOL_DIR"]
+)
 
-# Database connection
-try:
-    if not app.config["MONGO_URI"]:
-        raise ValueError("MONGO_URI not set in environment variables")
-    
-    mongo = PyMongo(app, connectTimeoutMS=30000, socketTimeoutMS=30000)
-    db = mongo.db
-    
-    # Test connection
-    db.command('ping')
-    print("✅ MongoDB connected successfully!")
-    
-    # Initialize collections
-    users = db.users
-    films = db.films
-    reviews = db.reviews
-    reports = db.reports
-    articles = db.articles
-    follows = db.follows
-    
-    # Create indexes
-    users.create_index([("username", 1)], unique=True)
-    users.create_index([("email", 1)], unique=True)
-    films.create_index([("title", "text")])
-    films.create_index([("genres", 1)])
+# Helper functions
 
-except PyMongoError as e:
-    print(f"❌ MongoDB connection failed: {e}")
-    exit(1)
+# Field yang tidak dibutuhkan untuk identitas user (navbar, cek role, dll)
+USER_IDENTITY_PROJECTION = {'password': 0, 'watchlist': 0, 'custom_watchlists': 0}
+
+# Field minimal untuk menampilkan user/film di kartu & daftar
+USER_CARD_PROJECTION = {'username': 1, 'profile_pic': 1, 'profile_pic_variants': 1}
+FILM_CARD_PROJECTION = {'title': 1, 'poster_url': 1, 'poster_local': 1, 'poster_variants': 1,
+                        'release_date': 1, 'average_rating': 1}
+FILM_LIST_PROJECTION = {**FILM_CARD_PROJECTION, 'genres': {'$slice': 3}}
+
+# Urutan daftar film terbaru; harus sama dengan index (release_date, _id)
+FILM_LIST_SORT = [('release_date', -1), ('_id', -1)]
+
+FILM_HIGHLIGHT_PROJECTION = {**FILM_CARD_PROJECTION, 'genres': 1, 'plot': 1}
+
+trending = TrendingSnapshot(
+    films,
+    card_projection=FILM_CARD_PROJECTION,
+    highlight_projection=FILM_HIGHLIGHT_PROJECTION,
+    size=app.config["TRENDING_SIZE"],
+    refresh_interval=app.config["TRENDING_REFRESH_INTERVAL"],
+    collection=db.trending if app.config["TRENDING_MATERIALIZE"] else None
+)
+stats = StatsService(
+    totals={'films': films, 'reviews': reviews, 'users': users, 'articles': articles},
+    series={'reviews': reviews, 'signups': users},
+    reports=reports,
+    counters=db.counters,
+    daily=db.daily_stats,
+    days=app.config["STATS_DAYS"],
+    refresh_interval=app.config["STATS_REFRESH_INTERVAL"]
+)
+moderation = ModerationQueue(reports, reviews, films, users, reactions, stats)
+
+film_search = FilmSearch(films, FILM_LIST_PROJECTION, omdb)
+title_index = TitleIndex(films, FILM_CARD_PROJECTION,
+                         refresh_interval=app.config["AUTOCOMPLETE_REFRESH_INTERVAL"])
+watchlist_store = WatchlistStore(watchlists, films, FILM_CARD_PROJECTION,
+                                 cache=TTLCache(maxsize=10000, ttl=app.config["WATCHLIST_PREVIEW_TTL"]),
+                                 preview_size=app.config["WATCHLIST_PREVIEW_SIZE"])
+follow_graph = FollowGraph(follows, users, {**USER_CARD_PROJECTION, 'bio': 1})
+
+user_cache = TTLCache(maxsize=10000, ttl=app.config["USER_CACHE_TTL"])
+image_pipeline = ImagePipeline(app.config["UPLOAD_FOLDER"],
+                               workers=app.config["IMAGE_WORKERS"],
+                               max_pending=app.config["IMAGE_MAX_PENDING"])
+static_assets = StaticAssets(app.static_folder, app.config["STATIC_BUILD_DIR"],
+                             exclude=(f'images/{UPLOAD_SUBDIR}/',),
+                             # Nama upload sudah berupa hash isi, jadi juga tidak pernah berubah
+                             immutable_pattern=rf'images/{UPLOAD_SUBDIR}/[0-9a-f]{{32}}(_\d+)?\.\w+$')
+if app.config["STATIC_FINGERPRINT"]:
+    static_assets.load()
+    static_assets.init_app(app)
+poster_mirror = PosterMirror(films, image_pipeline,
+                             HttpFetcher(read_timeout=app.config["POSTER_FETCH_TIMEOUT"]),
+                             retry_after=app.config["POSTER_RETRY_AFTER"])
 
-# Helper functions
 def is_logged_in():
     return 'user_id' in session
 
-def is_admin():
-    if is_logged_in():
-        user = users.find_one({'_id': ObjectId(session['user_id'])})
-        return user and user.get('role') == 'admin'
-    return False
+def _load_user_identity(user_id):
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    try:
+        user = users.find_one({'_id': ObjectId(user_id)}, USER_IDENTITY_PROJECTION)
+    except InvalidId:
+        user = None
+    if user:
+        user_cache.set(user_id, user)
+    return user
+
+def _remember_user(request_g, user_id):
+    if request_g.get('current_user_id') != user_id:
+        request_g.current_user = _load_user_identity(user_id)
+        request_g.current_user_id = user_id
+    return request_g.current_user
 
 def get_current_user():
-    if is_logged_in():
-        return users.find_one({'_id': ObjectId(session['user_id'])})
-    return None
+    # Satu lookup per request, dipakai ulang oleh route, context processor dan template
+    if not is_logged_in():
+        return None
+    return _remember_user(g, session['user_id'])
+
+def current_user_call():
+    """``get_current_user`` as a ``fanout.run`` call (session and g are read here, not in the worker)."""
+    if not is_logged_in():
+        return lambda: None
+    request_g = g._get_current_object()
+    user_id = session['user_id']
+    return lambda: _remember_user(request_g, user_id)
+
+def is_admin():
+    user = get_current_user()
+    return bool(user) and user.get('role') == 'admin'
+
+def invalidate_current_user(user_id=None):
+    user_id = str(user_id or session.get('user_id'))
+    user_cache.pop(user_id)
+    if g.get('current_user_id') == user_id:
+        g.pop('current_user', None)
+        g.pop('current_user_id', None)
+
+def store_image(collection, doc_id, field, upload, kind):
+    """Simpan upload lewat image_pipeline; return ``(field yang perlu di-$set, start_variants)``.
+
+    Panggil ``start_variants()`` setelah dokumen ditulis: variant yang
+    selesai belakangan dicatat langsung ke dokumennya, selama dokumen itu
+    masih memakai gambar yang sama.
+    """
+    def on_ready(variants):
+        collection.update_one({'_id': doc_id, field: filename},
+                              {'$set': {f'{field}_variants': variants}})
+        if collection is users:
+            user_cache.pop(str(doc_id))
+
+    filename, digest, variants = image_pipeline.store(upload, kind)
+    fields = {field: filename, f'{field}_variants': variants or {}}
+    if variants is not None:
+        return fields, lambda: None
+    return fields, lambda: image_pipeline.process(filename, digest, kind, on_ready)
+
+def image_url(filename, variants=None, size=0, fmt='webp'):
+    """URL gambar di static/images, memakai variant terkecil yang cukup untuk ``size`` px."""
+    return url_for('static', filename='images/' + pick_variant(filename, variants, size, fmt))
+
+POSTER_PLACEHOLDER = 'images/poster-placeholder.svg'
+
+def poster_src(film, size=300, fmt='webp'):
+    """URL poster film: salinan lokal kalau sudah ada, lalu URL OMDb, lalu placeholder."""
+    film = film or {}
+    if film.get('poster_local'):
+        return image_url(film['poster_local'], film.get('poster_variants'), size, fmt)
+    if is_remote(film.get('poster_url')):
+        return film['poster_url']
+    return url_for('static', filename=POSTER_PLACEHOLDER)
 
 # Routes
 @app.route('/import-omdb', methods=['POST'])
@@ -83,10 +353,9 @@ def import_omdb_film():
     if existing:
         return redirect(url_for('film_detail', film_id=existing['_id']))
 
-    # Fetch dari OMDb API
-    omdb_url = f"http://www.omdbapi.com/?i={imdb_id}&apikey={OMDB_API_KEY}"
+    # Fetch dari OMDb API (lewat cache)
     try:
-        response = requests.get(omdb_url).json()
+        response = omdb.title(imdb_id)
 
         if response.get('Response') != 'True':
             flash("Film not found in OMDb", "error")
@@ -110,11 +379,17 @@ def import_omdb_film():
             'release_date': release_date,
             'plot': response.get('Plot'),
             'average_rating': 0,
+            'rating_sum': 0,
+            'rating_count': 0,
+            'rating_histogram': {},
             'views': 0,
             'created_at': datetime.now()
         }
 
         inserted = films.insert_one(film_data)
+        title_index.add(film_data)
+        if app.config["POSTER_MIRROR"]:
+            poster_mirror.enqueue(film_data)
         return redirect(url_for('film_detail', film_id=inserted.inserted_id))
 
     except Exception as e:
@@ -122,18 +397,34 @@ def import_omdb_film():
         return redirect(url_for('search_films'))
 
 
-@app.route('/user/<username>/followers')
-def followers_page(username):
+def _follow_list_page(username, side, endpoint):
     user = users.find_one({'username': username})
     if not user:
         return render_template('404.html'), 404
 
-    followers_ids = follows.find({'following_id': user['_id']}).distinct('follower_id')
-    followers = users.find({'_id': {'$in': followers_ids}})
-    
+    viewer_id = ObjectId(session['user_id']) if is_logged_in() else None
+    try:
+        people, next_cursor = follow_graph.page(side, user['_id'], viewer_id,
+                                                limit=app.config['FOLLOWERS_PAGE_SIZE'],
+                                                after=request.args.get('after'))
+    except ValueError:
+        return redirect(url_for(endpoint, username=username))
+
     return render_template('social/followers.html',
                            user=user,
-                           followers=followers)
+                           followers=people,
+                           list_type='followers' if side == FOLLOWERS else 'following',
+                           next_url=url_for(endpoint, username=username, after=next_cursor) if next_cursor else None)
+
+
+@app.route('/user/<username>/followers')
+def followers_page(username):
+    return _follow_list_page(username, FOLLOWERS, 'followers_page')
+
+
+@app.route('/user/<username>/following')
+def following_page(username):
+    return _follow_list_page(username, FOLLOWING, 'following_page')
     
 @app.route('/your_page')
 def for_your_page():
@@ -142,63 +433,70 @@ def for_your_page():
 
     current_user_id = ObjectId(session['user_id'])
 
-    # Highlighted film: paling populer
-    highlighted_film = films.find_one(sort=[("views", -1)])
+    # Bagian-bagian halaman tidak saling bergantung, jadi query-nya jalan bersamaan
+    found = fanout.run(
+        # Highlighted film & trending: dari snapshot, tanpa sort per request
+        snapshot=trending.get,
+        user_reviews=lambda: _recent_reviews_for(current_user_id),
+        genre_watchlist=lambda: _genre_watchlist(current_user_id),
+        # Custom watchlists: semua daftar + satu $in untuk semua filmnya
+        custom_watchlists=lambda: watchlist_store.for_user(current_user_id),
+        current_user=current_user_call()
+    )
+
+    return render_template(
+        'social/for_your_page.html',
+        highlighted_film=found['snapshot']['highlighted'],
+        trending_films=found['snapshot']['popular'],
+        user_reviews=found['user_reviews'],
+        genre_watchlist=found['genre_watchlist'],
+        custom_watchlists=found['custom_watchlists'],
+        current_user=found['current_user']
+    )
 
-    # Trending: top 10 berdasarkan views
-    trending_films = list(films.find().sort("views", -1).limit(10))
 
-    # Ambil review terbaru dan isi data user
+def _recent_reviews_for(viewer_id):
+    # Ambil review terbaru dan isi data user (batch, bukan per review)
     all_reviews = reviews.find().sort("created_at", -1).limit(10)
+    all_reviews = attach(all_reviews, 'user_id', users, as_field='user',
+                         projection=USER_CARD_PROJECTION, drop_missing=True)
+    found = fanout.run(
+        followed_ids=lambda: fetch_values(follows, {
+            'follower_id': viewer_id,
+            'following_id': {'$in': [r['user_id'] for r in all_reviews]}
+        }, 'following_id'),
+        my_reactions=lambda: viewer_reactions(reactions, viewer_id, [r['_id'] for r in all_reviews])
+    )
+    followed_ids = found['followed_ids']
+    my_reactions = found['my_reactions']
+
     user_reviews = []
     for r in all_reviews:
-        user = users.find_one({'_id': r['user_id']})
-        if not user:
-            continue
-        is_following = follows.find_one({
-            'follower_id': current_user_id,
-            'following_id': user['_id']
-        })
         user_reviews.append({
             '_id': r['_id'],
             'text': r['text'],
             'rating': r['rating'],
             'likes': r.get('likes', 0),
             'dislikes': r.get('dislikes', 0),  
+            'reaction': my_reactions.get(r['_id'], 0),
             'comments': 0,
-            'user': user,
-            'is_following': is_following is not None
+            'user': r['user'],
+            'is_following': r['user_id'] in followed_ids
         })
+    return user_reviews
 
-    # Ambil data user
-    current_user_data = users.find_one({'_id': current_user_id})
 
+def _genre_watchlist(user_id):
     # Watchlist berbasis genre
-    watchlist_ids = current_user_data.get('watchlist', [])
+    watchlist_doc = users.find_one({'_id': user_id}, {'watchlist': 1})
+    watchlist_ids = (watchlist_doc or {}).get('watchlist', [])
     genre_watchlist = {}
     if watchlist_ids:
-        watchlist_films = list(films.find({'_id': {'$in': watchlist_ids}}))
+        watchlist_films = list(films.find({'_id': {'$in': watchlist_ids}}, {**FILM_CARD_PROJECTION, 'genres': 1}))
         for film in watchlist_films:
             for genre in film.get('genres', []):
                 genre_watchlist.setdefault(genre, []).append(film)
-
-    # Custom watchlists
-    custom_watchlists = current_user_data.get('custom_watchlists', [])
-    for wl in custom_watchlists:
-        film_ids = wl.get("film_ids", [])
-        wl['films'] = list(films.find({'_id': {'$in': film_ids}}))
-
-    # Update current_user_data agar custom_watchlists memiliki film di dalamnya
-    current_user_data['custom_watchlists'] = custom_watchlists
-
-    return render_template(
-        'social/for_your_page.html',
-        highlighted_film=highlighted_film,
-        trending_films=trending_films,
-        user_reviews=user_reviews,
-        genre_watchlist=genre_watchlist,
-        current_user=current_user_data  # penting!
-    )
+    return genre_watchlist
 
 
 @app.route('/film/<film_id>/toggle-watchlist', methods=['POST'])
@@ -209,15 +507,14 @@ def toggle_watchlist(film_id):
     user_id = ObjectId(session['user_id'])
     film_obj_id = ObjectId(film_id)
 
-    user = users.find_one({'_id': user_id})
-    watchlist = user.get('watchlist', [])
-
-    if film_obj_id in watchlist:
+    # Tambah kalau belum ada; kalau tidak ada yang berubah berarti sudah ada → hapus
+    added = users.update_one({'_id': user_id, 'watchlist': {'$ne': film_obj_id}},
+                             {'$addToSet': {'watchlist': film_obj_id}})
+    if added.modified_count:
+        flash('Added to watchlist!', 'success')
+    else:
         users.update_one({'_id': user_id}, {'$pull': {'watchlist': film_obj_id}})
         flash('Removed from watchlist.', 'info')
-    else:
-        users.update_one({'_id': user_id}, {'$addToSet': {'watchlist': film_obj_id}})
-        flash('Added to watchlist!', 'success')
 
     return redirect(url_for('film_detail', film_id=film_id))
 
@@ -226,86 +523,145 @@ def toggle_watchlist(film_id):
 
 @app.route('/')
 def index():
-    popular_films = films.find().sort('views', -1).limit(10)
-    new_films = films.find().sort('release_date', -1).limit(10)
+    found = fanout.run(
+        snapshot=trending.get,
+        articles=lambda: list(articles.find().sort('created_at', -1).limit(3)),
+        user=current_user_call()
+    )
+    snapshot = found['snapshot']
+    popular_films = snapshot['popular']
+    new_films = snapshot['new_releases']
 
-    featured_articles_cursor = articles.find().sort('created_at', -1).limit(3)
     featured_articles = [
-        {**a, "_id": str(a["_id"])} for a in featured_articles_cursor
+        {**a, "_id": str(a["_id"])} for a in found['articles']
     ]
 
     return render_template('index.html',
                            popular_films=popular_films,
                            new_films=new_films,
                            featured_articles=featured_articles,
-                           user=get_current_user())
+                           user=found['user'])
+
+
+def _film_list_page():
+    limit = request.args.get('limit', app.config['FILMS_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, 100))
+    return keyset_page(films, FILM_LIST_SORT, limit,
+                       after=request.args.get('after'),
+                       projection=FILM_LIST_PROJECTION)
 
 
 @app.route('/films')
 def film_list():
-    all_films = films.find().sort('release_date', -1)
+    try:
+        film_page, next_cursor = _film_list_page()
+    except ValueError:
+        flash('Invalid page', 'error')
+        return redirect(url_for('film_list'))
+
     return render_template('film/list.html', 
-                         films=all_films,
+                         films=film_page,
+                         next_cursor=next_cursor,
                          user=get_current_user())
 
-import requests
+
+@app.route('/api/films')
+def api_film_list():
+    # Varian JSON dari /films untuk infinite scroll
+    try:
+        film_page, next_cursor = _film_list_page()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+
+    return jsonify({
+        'success': True,
+        'films': [{
+            '_id': str(f['_id']),
+            'title': f.get('title'),
+            'poster_url': poster_src(f),
+            'year': f['release_date'].year if f.get('release_date') else None,
+            'average_rating': round(f.get('average_rating') or 0, 1),
+            'genres': f.get('genres', []),
+            'url': url_for('film_detail', film_id=f['_id'])
+        } for f in film_page],
+        'next': next_cursor
+    })
 
 @app.route('/search', methods=['GET', 'POST'])
 def search_films():
     query = request.args.get('q') or request.form.get('query')
+    # source=omdb: user minta hasil tambahan dari OMDb walau katalog lokal sudah ada
+    include_remote = request.args.get('source') == 'omdb'
     
+    local_results = []
     results = []
     if query:
-        # Fetch data from OMDb API
-        omdb_url = f"http://www.omdbapi.com/?s={query}&apikey={OMDB_API_KEY}&type=movie"
-        try:
-            response = requests.get(omdb_url)
-            data = response.json()
-            if data.get('Response') == 'True':
-                results = data.get('Search', [])
-        except Exception as e:
-            flash('Failed to fetch data from OMDb', 'error')
+        # Katalog lokal dulu (text index); OMDb hanya kalau lokal kosong
+        local_results = film_search.local(query, app.config["SEARCH_RESULTS_LIMIT"])
+        if include_remote or not local_results:
+            try:
+                results = film_search.remote(query)
+            except Exception as e:
+                flash('Failed to fetch data from OMDb', 'error')
     
     return render_template('film/search.html',
+                           local_results=local_results,
                            results=results,
                            query=query,
+                           searched_remote=include_remote or not local_results,
                            user=get_current_user())
 
 
+@app.route('/api/search/autocomplete')
+def api_search_autocomplete():
+    # Dari index di memori, tanpa query ke Mongo per ketikan
+    matches = title_index.complete(request.args.get('q', ''), app.config["AUTOCOMPLETE_LIMIT"])
+    return jsonify({
+        'success': True,
+        'films': [{
+            '_id': str(f['_id']),
+            'title': f.get('title'),
+            'poster_url': poster_src(f),
+            'year': f['release_date'].year if f.get('release_date') else None,
+            'url': url_for('film_detail', film_id=f['_id'])
+        } for f in matches]
+    })
+
+
 @app.route('/film/<film_id>')
 def film_detail(film_id):
     try:
-        # Ambil film dan tambahkan 1 view
-        film = films.find_one_and_update(
-            {'_id': ObjectId(film_id)},
-            {'$inc': {'views': 1}},
-            return_document=True
-        )
+        # Ambil film dan tambahkan 1 view (ditulis belakangan oleh view_counter)
+        film = films.find_one({'_id': ObjectId(film_id)})
         if not film:
             return render_template('404.html'), 404
+        view_counter.increment('films', film['_id'])
+        film['views'] = film.get('views', 0) + view_counter.pending('films', film['_id'])
 
         # Ambil semua review terkait film ini
         raw_reviews = reviews.find({'film_id': ObjectId(film_id)}).sort('created_at', -1)
 
         # Gabungkan data user ke setiap review
+        raw_reviews = attach(raw_reviews, 'user_id', users, as_field='user',
+                             projection=USER_CARD_PROJECTION, drop_missing=True)
+        viewer_id = ObjectId(session['user_id']) if is_logged_in() else None
+        my_reactions = viewer_reactions(reactions, viewer_id, [r['_id'] for r in raw_reviews])
         enriched_reviews = []
         for r in raw_reviews:
-            user = users.find_one({'_id': r['user_id']})
-            if not user:
-                continue  
-
             enriched_reviews.append({
                 '_id': r['_id'],
                 'text': r['text'],
                 'rating': r['rating'],
                 'likes': r.get('likes', 0),
                 'dislikes': r.get('dislikes', 0),
+                'reaction': my_reactions.get(r['_id'], 0),
                 'created_at': r['created_at'],
-                'user': user  
+                'user': r['user']
             })
 
         # Cek apakah user sudah mereview film ini
         user_reviewed = False
+        watchlist_names = []
         if is_logged_in():
             user_review = reviews.find_one({
                 'film_id': ObjectId(film_id),
@@ -313,15 +669,20 @@ def film_detail(film_id):
             })
             user_reviewed = bool(user_review)
 
+            watchlist_names = watchlist_store.names(ObjectId(session['user_id']))
+
         # Kirim ke template
         return render_template('film/detail.html',
                                film=film,
                                reviews=enriched_reviews,  
+                               rating_distribution=rating_distribution(film),
                                user_reviewed=user_reviewed,
+                               watchlist_names=watchlist_names,
                                current_user=get_current_user())
 
     except Exception as e:
-        print("❌ Error in /film/<film_id>:", e)
+        app.logger.exception("Error in /film/<film_id>")
+        metrics.handled_error()
         flash('Error loading film details', 'error')
         return redirect(url_for('index'))
 
@@ -337,13 +698,21 @@ def edit_profile():
         profile_pic = request.files.get('profile_pic')
 
         update_data = {'bio': bio}
+        start_variants = None
 
         if profile_pic and profile_pic.filename != '':
-            filename = secure_filename(profile_pic.filename)
-            profile_pic.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            update_data['profile_pic'] = filename
+            try:
+                image_fields, start_variants = store_image(users, user['_id'], 'profile_pic',
+                                                           profile_pic, 'avatar')
+            except ValueError:
+                flash('Profile picture must be a JPG, PNG, GIF or WebP image', 'error')
+                return redirect(url_for('edit_profile'))
+            update_data.update(image_fields)
 
         users.update_one({'_id': user['_id']}, {'$set': update_data})
+        invalidate_current_user(user['_id'])
+        if start_variants:
+            start_variants()
         flash('Profile updated successfully!', 'success')
         return redirect(url_for('user_profile', username=user['username']))
 
@@ -351,15 +720,34 @@ def edit_profile():
     return render_template('auth/edit_profile.html', user=user)
 
 
+@app.route('/api/watchlist-preview')
+def api_watchlist_preview():
+    # Dipanggil tiap ketikan di modal watchlist: cache per user + ETag
+    if not is_logged_in():
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+
+    name, preview_films = watchlist_store.preview(ObjectId(session['user_id']),
+                                                  request.args.get('name', ''))
+    response = jsonify({'success': True, 'name': name, 'films': [
+        {'title': f.get('title'), 'poster_url': poster_src(f)} for f in preview_films
+    ]})
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+WATCHLIST_MESSAGES = {
+    'created': ('Added to "{}" watchlist!', 'success'),
+    'added': ('Added to "{}" watchlist!', 'success'),
+    'exists': ('Film already in "{}" watchlist', 'info'),
+}
+
+
 @app.route('/film/<film_id>/add-to-watchlist', methods=['POST'])
 def add_to_custom_watchlist(film_id):
     if not is_logged_in():
         return redirect(url_for('login'))
 
-    user_id = ObjectId(session['user_id'])
-    user = users.find_one({'_id': user_id})
-    film_obj_id = ObjectId(film_id)
-
     selected_name = request.form.get('watchlist_name') or ''
     new_name = (request.form.get('new_watchlist_name') or '').strip()
 
@@ -369,23 +757,10 @@ def add_to_custom_watchlist(film_id):
         flash("Watchlist name is required", "error")
         return redirect(url_for('film_detail', film_id=film_id))
 
-    custom_watchlists = user.get('custom_watchlists', [])
-
-    for watchlist in custom_watchlists:
-        if watchlist['name'].lower() == final_name.lower():
-            if film_obj_id in watchlist['film_ids']:
-                flash("Film already in this watchlist", "info")
-                return redirect(url_for('film_detail', film_id=film_id))
-            watchlist['film_ids'].append(film_obj_id)
-            break
-    else:
-        custom_watchlists.append({
-            'name': final_name,
-            'film_ids': [film_obj_id]
-        })
-
-    users.update_one({'_id': user_id}, {'$set': {'custom_watchlists': custom_watchlists}})
-    flash(f'Added to "{final_name}" watchlist!', 'success')
+    # Satu upsert atomik: buat daftar bila perlu, $addToSet filmnya
+    result = watchlist_store.add(ObjectId(session['user_id']), final_name, ObjectId(film_id))
+    message, category = WATCHLIST_MESSAGES[result]
+    flash(message.format(final_name), category)
     return redirect(url_for('film_detail', film_id=film_id))
 
 
@@ -394,36 +769,15 @@ def save_to_watchlist(film_id):
     if not is_logged_in():
         return redirect(url_for('login'))
 
-    user_id = ObjectId(session['user_id'])
     watchlist_name = request.form.get('watchlist_name', '').strip()
 
     if not watchlist_name:
         flash("Watchlist name cannot be empty", "error")
         return redirect(url_for('film_detail', film_id=film_id))
 
-    user = users.find_one({'_id': user_id})
-    film_oid = ObjectId(film_id)
-
-    # Cek apakah watchlist sudah ada
-    found = False
-    updated_watchlists = []
-
-    for wl in user.get('custom_watchlists', []):
-        if wl['name'].lower() == watchlist_name.lower():
-            if film_oid not in wl.get('film_ids', []):
-                wl['film_ids'].append(film_oid)
-            found = True
-        updated_watchlists.append(wl)
-
-    # Kalau belum ada → buat baru
-    if not found:
-        updated_watchlists.append({
-            'name': watchlist_name,
-            'film_ids': [film_oid]
-        })
-
-    users.update_one({'_id': user_id}, {'$set': {'custom_watchlists': updated_watchlists}})
-    flash(f'Added to watchlist "{watchlist_name}"!', 'success')
+    result = watchlist_store.add(ObjectId(session['user_id']), watchlist_name, ObjectId(film_id))
+    message, category = WATCHLIST_MESSAGES[result]
+    flash(message.format(watchlist_name), category)
     return redirect(url_for('film_detail', film_id=film_id))
 
 
@@ -449,94 +803,36 @@ def add_review(film_id):
         'text': review_text,
         'likes': 0,
         'dislikes': 0,
-        'liked_by': [],        # ✅ Tambahkan ini
-        'disliked_by': [],     # ✅ Dan ini
         'is_spoiler': False,
         'created_at': datetime.now()
     })
     
-    # Update film average rating
-    pipeline = [
-        {'$match': {'film_id': ObjectId(film_id)}},
-        {'$group': {'_id': None, 'avgRating': {'$avg': '$rating'}}}
-    ]
-    avg_rating = list(reviews.aggregate(pipeline))[0]['avgRating']
-    films.update_one({'_id': ObjectId(film_id)}, {'$set': {'average_rating': avg_rating}})
+    # Update agregat rating film (O(1), tanpa menghitung ulang semua review)
+    apply_rating(films, reviews, ObjectId(film_id), rating)
     
     flash('Review submitted successfully!', 'success')
     return redirect(url_for('film_detail', film_id=film_id))
 
-@app.route('/review/<review_id>/like', methods=['POST'])
-def like_review(review_id):
+def _react_to_review(review_id, value):
     if not is_logged_in():
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
 
-    user_id = ObjectId(session['user_id'])
-    review = reviews.find_one({'_id': ObjectId(review_id)})
-
-    if not review:
+    # Satu upsert di reactions + satu $inc counter di review
+    action, counters = react(reviews, reactions, ObjectId(review_id), ObjectId(session['user_id']), value)
+    if action is None:
         return jsonify({'success': False, 'message': 'Review not found'}), 404
 
-    # Kalau user sudah like → batalin (unlike)
-    if user_id in review.get('liked_by', []):
-        reviews.update_one(
-            {'_id': ObjectId(review_id)},
-            {
-                '$inc': {'likes': -1},
-                '$pull': {'liked_by': user_id}
-            }
-        )
-        return jsonify({'success': True, 'action': 'unlike'})
-
-    # Kalau belum like
-    update_ops = {
-        '$inc': {'likes': 1},
-        '$addToSet': {'liked_by': user_id}
-    }
-
-    # Kalau user sebelumnya sudah dislike → hapus juga
-    if user_id in review.get('disliked_by', []):
-        update_ops['$inc']['dislikes'] = -1
-        update_ops['$pull'] = {'disliked_by': user_id}
+    return jsonify({'success': True, 'action': action, **counters})
 
-    reviews.update_one({'_id': ObjectId(review_id)}, update_ops)
 
-    return jsonify({'success': True, 'action': 'like'})
+@app.route('/review/<review_id>/like', methods=['POST'])
+def like_review(review_id):
+    return _react_to_review(review_id, LIKE)
 
 
 @app.route('/review/<review_id>/dislike', methods=['POST'])
 def dislike_review(review_id):
-    if not is_logged_in():
-        return jsonify({'success': False, 'message': 'Not logged in'}), 401
-
-    user_id = ObjectId(session['user_id'])
-    review = reviews.find_one({'_id': ObjectId(review_id)})
-
-    if not review:
-        return jsonify({'success': False, 'message': 'Review not found'}), 404
-
-    if user_id in review.get('disliked_by', []):
-        reviews.update_one(
-            {'_id': ObjectId(review_id)},
-            {
-                '$inc': {'dislikes': -1},
-                '$pull': {'disliked_by': user_id}
-            }
-        )
-        return jsonify({'success': True, 'action': 'undislike'})
-
-    update_ops = {
-        '$inc': {'dislikes': 1},
-        '$addToSet': {'disliked_by': user_id}
-    }
-
-    if user_id in review.get('liked_by', []):
-        update_ops['$inc']['likes'] = -1
-        update_ops['$pull'] = {'liked_by': user_id}
-
-    reviews.update_one({'_id': ObjectId(review_id)}, update_ops)
-
-    return jsonify({'success': True, 'action': 'dislike'})
+    return _react_to_review(review_id, DISLIKE)
 
 @app.route('/review/<review_id>/report', methods=['POST'])
 def report_review(review_id):
@@ -564,14 +860,8 @@ def report_review(review_id):
     if existing_report:
         return jsonify({'success': False, 'message': 'You have already reported this review'}), 400
 
-    # Kalau belum pernah, insert baru
-    reports.insert_one({
-        'review_id': ObjectId(review_id),
-        'reporter_id': user_id,
-        'reason': reason,
-        'status': 'pending',
-        'created_at': datetime.now()
-    })
+    # Kalau belum pernah, insert baru (ringkasan antrian moderasi ikut diperbarui)
+    moderation.report(ObjectId(review_id), user_id, reason)
 
     return jsonify({'success': True})
 
@@ -600,6 +890,8 @@ def register():
                 'role': 'user',
                 'bio': '',
                 'profile_pic': '',
+                'followers_count': 0,
+                'following_count': 0,
                 'created_at': datetime.now()
             })
             
@@ -652,28 +944,41 @@ def profile():
             profile_pic = request.files.get('profile_pic')
             
             update_data = {'bio': bio}
+            start_variants = None
             
-            if profile_pic:
-                filename = secure_filename(profile_pic.filename)
-                profile_pic.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                update_data['profile_pic'] = filename
+            if profile_pic and profile_pic.filename != '':
+                try:
+                    image_fields, start_variants = store_image(users, user['_id'], 'profile_pic',
+                                                               profile_pic, 'avatar')
+                except ValueError:
+                    flash('Profile picture must be a JPG, PNG, GIF or WebP image', 'error')
+                    return redirect(url_for('profile'))
+                update_data.update(image_fields)
             
             users.update_one(
                 {'_id': ObjectId(session['user_id'])},
                 {'$set': update_data}
             )
+            invalidate_current_user()
+            if start_variants:
+                start_variants()
             flash('Profile updated successfully!', 'success')
             return redirect(url_for('profile'))
         
         user_reviews = reviews.find({'user_id': ObjectId(session['user_id'])}).sort('created_at', -1)
-        followers_count = follows.count_documents({'following_id': ObjectId(session['user_id'])})
-        following_count = follows.count_documents({'follower_id': ObjectId(session['user_id'])})
+        user_reviews = attach(user_reviews, 'film_id', films, projection=FILM_CARD_PROJECTION)
+        my_reactions = viewer_reactions(reactions, user['_id'], [r['_id'] for r in user_reviews])
+        for r in user_reviews:
+            r['reaction'] = my_reactions.get(r['_id'], 0)
+        follower_previews, following_previews = follow_graph.previews(user['_id'], user['_id'])
         
         return render_template('social/profile.html',
                             user=user,
                             reviews=user_reviews,
-                            followers_count=followers_count,
-                            following_count=following_count)
+                            followers_count=user.get('followers_count', 0),
+                            following_count=user.get('following_count', 0),
+                            follower_previews=follower_previews,
+                            following_previews=following_previews)
     
     except Exception as e:
         flash('Error loading profile', 'error')
@@ -686,32 +991,24 @@ def user_profile(username):
         return render_template('404.html'), 404
 
     raw_reviews = reviews.find({'user_id': user['_id']}).sort('created_at', -1)
-    user_reviews = []
-    for r in raw_reviews:
-        film = films.find_one({'_id': r['film_id']})
-        if film:
-            r['film_id'] = film
-        user_reviews.append(r)
-
-    followers_count = follows.count_documents({'following_id': user['_id']})
-    following_count = follows.count_documents({'follower_id': user['_id']})
-
-    is_following = False
-    if is_logged_in():
-        is_following = follows.find_one({
-            'follower_id': ObjectId(session['user_id']),
-            'following_id': user['_id']
-        }) is not None
+    user_reviews = attach(raw_reviews, 'film_id', films, projection=FILM_CARD_PROJECTION)
+
+    viewer_id = ObjectId(session['user_id']) if is_logged_in() else None
+    my_reactions = viewer_reactions(reactions, viewer_id, [r['_id'] for r in user_reviews])
+    for r in user_reviews:
+        r['reaction'] = my_reactions.get(r['_id'], 0)
+    is_following = user['_id'] in follow_graph.followed_by(viewer_id, [user['_id']])
+    follower_previews, following_previews = follow_graph.previews(user['_id'], viewer_id)
 
     return render_template('social/profile.html',
                            user=user,
                            reviews=user_reviews,
-                           followers_count=followers_count,
-                           following_count=following_count,
+                           followers_count=user.get('followers_count', 0),
+                           following_count=user.get('following_count', 0),
                            is_following=is_following,
                            current_user=get_current_user(),
-                           follows=follows, 
-                           users=users)      
+                           follower_previews=follower_previews,
+                           following_previews=following_previews)
 
 
 
@@ -720,24 +1017,21 @@ def follow_user(user_id):
     if not is_logged_in():
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
     
-    if ObjectId(user_id) == ObjectId(session['user_id']):
+    try:
+        target_id = ObjectId(user_id)
+    except InvalidId:
+        return jsonify({'success': False, 'message': 'Invalid user id'}), 400
+    if target_id == ObjectId(session['user_id']):
         return jsonify({'success': False, 'message': 'Cannot follow yourself'}), 400
+    if not users.count_documents({'_id': target_id}, limit=1):
+        return jsonify({'success': False, 'message': 'User not found'}), 404
     
-    existing_follow = follows.find_one({
-        'follower_id': ObjectId(session['user_id']),
-        'following_id': ObjectId(user_id)
-    })
-    
-    if existing_follow:
-        follows.delete_one({'_id': existing_follow['_id']})
-        return jsonify({'success': True, 'action': 'unfollow'})
-    else:
-        follows.insert_one({
-            'follower_id': ObjectId(session['user_id']),
-            'following_id': ObjectId(user_id),
-            'created_at': datetime.now()
-        })
-        return jsonify({'success': True, 'action': 'follow'})
+    # Edge dan counter followers_count/following_count diubah bersama
+    action = follow_graph.toggle(ObjectId(session['user_id']), target_id)
+    # Counter kedua user berubah, jadi cache identitas keduanya dibuang
+    invalidate_current_user()
+    invalidate_current_user(target_id)
+    return jsonify({'success': True, 'action': action})
     
 # Admin Routes
 @app.route('/admin/dashboard')
@@ -745,19 +1039,20 @@ def admin_dashboard():
     if not is_admin():
         return redirect(url_for('index'))
 
-    film_count = films.count_documents({})
-    review_count = reviews.count_documents({})
-    user_count = users.count_documents({})
-    article_count = articles.count_documents({})
-    report_count = reports.count_documents({'status': 'pending'})
+    # Total & grafik dari snapshot (refresh di background), report pending dari counter
+    found = fanout.run(snapshot=stats.get, report_count=stats.pending_reports, user=current_user_call())
+    snapshot = found['snapshot']
+    totals = snapshot['totals']
 
     return render_template('admin/dashboard.html',
-                           user=get_current_user(),
-                           film_count=film_count,
-                           review_count=review_count,
-                           user_count=user_count,
-                           article_count=article_count,
-                           report_count=report_count)
+                           user=found['user'],
+                           film_count=totals['films'],
+                           review_count=totals['reviews'],
+                           user_count=totals['users'],
+                           article_count=totals['articles'],
+                           report_count=found['report_count'],
+                           daily_series=snapshot['series'],
+                           stats_computed_at=snapshot['computed_at'])
 
 
 @app.route('/admin/reported-reviews')
@@ -765,29 +1060,38 @@ def admin_reported_reviews():
     if not is_admin():
         return redirect(url_for('index'))
     
-    reported_reviews = reports.find({'status': 'pending'})
-    reports_data = []
-    
-    for report in reported_reviews:
-        review = reviews.find_one({'_id': report['review_id']})
-        reporter = users.find_one({'_id': report['reporter_id']})
-        film = films.find_one({'_id': review['film_id']}) if review else None
-        
-        if review and reporter and film:
-            reports_data.append({
-                'report_id': str(report['_id']),
-                'review_id': str(review['_id']),
-                'review_text': review['text'],
-                'film_title': film['title'],
-                'reporter_username': reporter['username'],
-                'reason': report['reason'],
-                'created_at': report['created_at']
-            })
+    # Report pending dikelompokkan per review, satu agregasi per halaman
+    after = request.args.get('after')
+    try:
+        queue, next_cursor = moderation.page(app.config["MODERATION_PAGE_SIZE"], after=after)
+    except ValueError:
+        return redirect(url_for('admin_reported_reviews'))
     
     return render_template('admin/reported_reviews.html',
-                         reports=reports_data,
+                         reports=queue,
+                         next_url=url_for('admin_reported_reviews', after=next_cursor) if next_cursor else None,
+                         is_first_page=not after,
                          user=get_current_user())
 
+@app.route('/admin/reports/bulk', methods=['POST'])
+def admin_bulk_reports():
+    if not is_admin():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    if action not in MODERATION_ACTIONS:
+        return jsonify({'success': False, 'message': 'Invalid action'}), 400
+    try:
+        review_ids = [ObjectId(i) for i in data.get('review_ids') or []]
+    except (InvalidId, TypeError):
+        return jsonify({'success': False, 'message': 'Invalid review id'}), 400
+    if not review_ids:
+        return jsonify({'success': False, 'message': 'No reviews selected'}), 400
+    
+    resolved = moderation.act(action, review_ids)
+    return jsonify({'success': True, 'resolved': resolved})
+
 @app.route('/admin/handle-report', methods=['POST'])
 def admin_handle_report():
     if not is_admin():
@@ -796,22 +1100,12 @@ def admin_handle_report():
     report_id = request.form.get('report_id')
     action = request.form.get('action')
     
-    report = reports.find_one({'_id': ObjectId(report_id)})
+    report = reports.find_one({'_id': ObjectId(report_id)}, {'review_id': 1})
     if not report:
         return jsonify({'success': False, 'message': 'Report not found'}), 404
     
-    if action == 'mark_spoiler':
-        reviews.update_one(
-            {'_id': report['review_id']},
-            {'$set': {'is_spoiler': True}}
-        )
-    elif action == 'delete':
-        reviews.delete_one({'_id': report['review_id']})
-    
-    reports.update_one(
-        {'_id': ObjectId(report_id)},
-        {'$set': {'status': 'resolved'}}
-    )
+    # Aksi berlaku untuk review-nya; semua report pending review itu ikut selesai
+    moderation.act(action if action in MODERATION_ACTIONS else 'resolve', [report['review_id']])
     
     return jsonify({'success': True})
 
@@ -821,10 +1115,12 @@ def admin_articles():
         return redirect(url_for('index'))
 
     all_articles_cursor = articles.find().sort('created_at', -1)
+    all_articles = attach(all_articles_cursor, 'author_id', users, as_field='author',
+                          projection={'username': 1})
     processed_articles = []
 
-    for article in all_articles_cursor:
-        author = users.find_one({'_id': article['author_id']})
+    for article in all_articles:
+        author = article.get('author')
         processed_articles.append({
             '_id': str(article['_id']),
             'title': article['title'],
@@ -850,6 +1146,7 @@ def admin_create_article():
         tags = [tag.strip() for tag in request.form.get('tags', '').split(',') if tag.strip()]
         
         article_data = {
+            '_id': ObjectId(),
             'title': title,
             'content': content,
             'author_id': ObjectId(session['user_id']),
@@ -858,12 +1155,19 @@ def admin_create_article():
             'views': 0
         }
         
-        if featured_image:
-            filename = secure_filename(featured_image.filename)
-            featured_image.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            article_data['featured_image'] = filename
+        start_variants = None
+        if featured_image and featured_image.filename != '':
+            try:
+                image_fields, start_variants = store_image(articles, article_data['_id'], 'featured_image',
+                                                           featured_image, 'hero')
+            except ValueError:
+                flash('Featured image must be a JPG, PNG, GIF or WebP image', 'error')
+                return render_template('admin/create_article.html', user=get_current_user())
+            article_data.update(image_fields)
         
         articles.insert_one(article_data)
+        if start_variants:
+            start_variants()
         flash('Article created successfully!', 'success')
         return redirect(url_for('admin_articles'))
     
@@ -879,20 +1183,19 @@ def article_detail(article_id):
             flash("Invalid article ID", "error")
             return redirect(url_for('index'))
 
-        article = articles.find_one_and_update(
-            {'_id': object_id},
-            {'$inc': {'views': 1}},
-            return_document=True
-        )
+        article = articles.find_one({'_id': object_id})
 
         if not article:
             flash("Article not found", "error")
             return redirect(url_for('index'))
+        view_counter.increment('articles', object_id)
+        article['views'] = article.get('views', 0) + view_counter.pending('articles', object_id)
 
         # Dapatkan data penulis
-        author = users.find_one({'_id': article['author_id']})
+        author = users.find_one({'_id': article['author_id']}, USER_CARD_PROJECTION)
         article['author_username'] = author['username'] if author else 'Unknown'
         article['author_pic'] = author['profile_pic'] if author and author.get('profile_pic') else None
+        article['author_pic_variants'] = author.get('profile_pic_variants') if author else None
 
         # Related articles (2 terbaru selain artikel ini)
         related_cursor = articles.find({'_id': {'$ne': object_id}}).sort('created_at', -1).limit(2)
@@ -905,9 +1208,164 @@ def article_detail(article_id):
                                related_articles=related_articles,
                                user=get_current_user())
     except Exception as e:
-        print("❌ Error loading article:", e)
+        app.logger.exception("Error loading article")
+        metrics.handled_error()
         flash('Error loading article', 'error')
         return redirect(url_for('index'))
+
+
+# Probes
+@app.route('/healthz')
+def healthz():
+    # Liveness: tanpa I/O, hanya menandakan proses masih melayani request
+    return jsonify({'status': 'ok'})
+
+
+@app.route('/readyz')
+def readyz():
+    # Readiness: worker baru diberi traffic setelah MongoDB bisa di-ping
+    try:
+        mongo.cx.admin.command('ping')
+    except PyMongoError:
+        app.logger.exception("Readiness check failed")
+        return jsonify({'status': 'unavailable'}), 503
+    return jsonify({'status': 'ready', 'boot_seconds': round(app.config["BOOT_SECONDS"], 3)})
+
+
+@app.route('/debug/queries')
+def debug_queries():
+    # Query per request terakhir (bentuk query tanpa nilai), untuk mencari N+1
+    if not is_admin() or not app.config["QUERY_PROFILE_HISTORY"]:
+        return render_template('404.html'), 404
+    return jsonify({'success': True, 'requests': list(reversed(query_profiler.recent()))})
+
+
+@metrics.collector
+def cache_metrics():
+    caches = {'user': user_cache, 'watchlist_preview': watchlist_store.cache, 'omdb': omdb_cache.memory}
+    return [
+        ('cache_hits_total', 'counter', 'In-process cache hits.',
+         [({'cache': name}, cache.hits) for name, cache in caches.items()]),
+        ('cache_misses_total', 'counter', 'In-process cache misses.',
+         [({'cache': name}, cache.misses) for name, cache in caches.items()]),
+        ('cache_entries', 'gauge', 'Entries currently cached.',
+         [({'cache': name}, len(cache)) for name, cache in caches.items()]),
+        ('omdb_cache_store_hits_total', 'counter', 'OMDb lookups answered by the omdb_cache collection.',
+         [({}, omdb_cache.store_hits)]),
+    ]
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    token = app.config["METRICS_TOKEN"]
+    if not app.config["METRICS"] or (token and request.headers.get('Authorization') != f'Bearer {token}'):
+        return render_template('404.html'), 404
+    return app.response_class(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# CLI commands
+@app.cli.command('reconcile-ratings')
+def reconcile_ratings_command():
+    """Recompute rating_sum/rating_count/rating_histogram for every film."""
+    updated = reconcile_ratings(films, reviews)
+    print(f"✅ Rating aggregates rebuilt for {updated} films")
+
+
+@app.cli.command('migrate-reactions')
+def migrate_reactions_command():
+    """Move liked_by/disliked_by arrays into reactions and rebuild like counters."""
+    migrated, updated = migrate_reactions(reviews, reactions)
+    print(f"✅ Migrated {migrated} reactions, counters rebuilt for {updated} reviews")
+
+
+@app.cli.command('migrate-watchlists')
+def migrate_watchlists_command():
+    """Move users' custom_watchlists arrays into the watchlists collection."""
+    migrated = watchlist_store.migrate(users)
+    print(f"✅ Custom watchlists migrated for {migrated} users")
+
+
+@app.cli.command('reconcile-stats')
+def reconcile_stats_command():
+    """Recount pending reports, rebuild the moderation queue and refresh the dashboard's daily series."""
+    pending = stats.reconcile_pending()
+    queued = moderation.reconcile()
+    stats.refresh()
+    print(f"✅ {pending} pending reports on {queued} reviews, daily stats refreshed")
+
+
+@app.cli.command('reconcile-follows')
+def reconcile_follows_command():
+    """Drop duplicate follow edges and recompute followers_count/following_count."""
+    duplicates, updated = follow_graph.reconcile()
+    print(f"✅ Removed {duplicates} duplicate follows, counters rebuilt for {updated} users")
+
+
+@app.cli.command('mirror-posters')
+@click.option('--limit', default=0, help='Stop after this many films (0 = all).')
+def mirror_posters_command(limit):
+    """Download remote OMDb posters that aren't mirrored locally yet."""
+    mirrored, failed = poster_mirror.backfill(limit or None)
+    print(f"✅ Mirrored {mirrored} posters, {failed} failed")
+
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Hash static files and precompress text assets (run on deploy)."""
+    manifest = static_assets.build()
+    compressed = sum(1 for entry in manifest.values() if entry['encodings'])
+    print(f"✅ {len(manifest)} static files fingerprinted, {compressed} precompressed")
+
+
+@app.cli.command('boot-time')
+@click.option('--runs', default=5, help='Number of fresh imports to time.')
+def boot_time_command(runs):
+    """Import the app in fresh processes and fail if the median exceeds BOOT_TIME_BUDGET."""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', 'import app; print(app.app.config["BOOT_SECONDS"])'],
+                                cwd=app.root_path, capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    timings.sort()
+    median = timings[len(timings) // 2]
+    budget = app.config["BOOT_TIME_BUDGET"]
+    ok = median <= budget
+    print(f"{'✅' if ok else '❌'} Boot median {median:.3f}s, max {timings[-1]:.3f}s (budget {budget}s)")
+    if not ok:
+        sys.exit(1)
+
+
+@app.cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Create every index declared in indexes.py (idempotent; run on deploy, not at startup)."""
+    for name, created in ensure_indexes(db).items():
+        print(f"✅ {name}: {', '.join(created)}")
+
+
+@app.cli.command('audit-indexes')
+@click.option('--database', default='fiew_index_audit', help='Scratch database to seed and explain against.')
+@click.option('--keep', is_flag=True, help='Keep the scratch database afterwards.')
+def audit_indexes_command(database, keep):
+    """Explain every route query shape and fail on COLLSCAN or in-memory SORT."""
+    if database == db.name:
+        raise click.UsageError("Refusing to seed the application database, pick a scratch database")
+
+    audit_db = mongo.cx[database]
+    try:
+        ensure_indexes(audit_db)
+        if audit_db.films.estimated_document_count() == 0:
+            seed_audit_data(audit_db)
+        problems = audit(audit_db)
+    finally:
+        if not keep:
+            mongo.cx.drop_database(database)
+
+    for route, collection, spec, stages in problems:
+        print(f"❌ {route}: {collection} {spec.get('filter', spec.get('pipeline'))} sort={spec.get('sort')} -> {', '.join(stages)}")
+    if problems:
+        sys.exit(1)
+    print("✅ All query shapes use an index")
+
 # Error Handlers
 @app.errorhandler(404)
 def page_not_found(e):
@@ -926,9 +1384,16 @@ def inject_user():
 app.jinja_env.globals.update(
     is_logged_in=is_logged_in,
     is_admin=is_admin,
-    get_current_user=get_current_user
+    get_current_user=get_current_user,
+    image_url=image_url,
+    poster_src=poster_src
 )
 
+# Waktu import modul ini = waktu boot worker; dilaporkan di /readyz
+app.config["BOOT_SECONDS"] = time.perf_counter() - BOOT_STARTED
+if app.config["BOOT_SECONDS"] > app.config["BOOT_TIME_BUDGET"]:
+    print(f"⚠️ Worker boot took {app.config['BOOT_SECONDS']:.2f}s (budget {app.config['BOOT_TIME_BUDGET']}s)")
+
 if __name__ == '__main__':
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     app.run(debug=True)
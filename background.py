@@ -0,0 +1,68 @@
+"""Periodic background jobs that are safe under prefork servers.
+
+Threads don't survive ``fork()``, so a job is started lazily from the process
+that first needs it and restarted if the pid changed. With ``retry_interval``
+a failed run is retried after that many seconds, doubling on every further
+failure, instead of waiting the full ``interval``.
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, name, interval, func, retry_interval=None):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.retry_interval = retry_interval
+        self._failures = 0
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def _alive(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def ensure_started(self):
+        if self._alive():
+            return
+        with self._lock:
+            if self._alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def trigger(self):
+        """Run the job now instead of waiting for the next interval."""
+        self._wake.set()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._alive():
+            self._thread.join(timeout=timeout)
+
+    def _next_wait(self):
+        if not self._failures or not self.retry_interval:
+            return self.interval
+        return min(self.interval, self.retry_interval * 2 ** (self._failures - 1))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.func()
+                self._failures = 0
+            except Exception:
+                self._failures += 1
+                logger.exception("Background job %s failed", self.name)
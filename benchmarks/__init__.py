@@ -0,0 +1,4 @@
+"""Repeatable performance benchmarks: seeded data, an OMDb stub and a load generator.
+
+Needs a MongoDB server for a scratch database; see ``benchmarks.run``.
+"""
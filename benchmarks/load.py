@@ -0,0 +1,228 @@
+"""Closed-loop HTTP load generator and the per-route scenarios.
+
+Each scenario is one endpoint of ``app.py`` with a request factory that picks
+ids from the seeded data, hot ones more often than cold ones. A scenario is
+run by ``concurrency`` threads, each with its own (logged-in) session, for a
+fixed number of requests; redirects are not followed so only the route
+itself is timed. Mongo round trips per request are read from the
+``Server-Timing`` header the app emits.
+"""
+import random
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import requests
+
+from benchmarks.seed import ADMIN_USERNAME, PASSWORD, zipf_weights
+
+DB_TIMING_RE = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+@dataclass
+class Scenario:
+    endpoint: str
+    method: str
+    # build(ctx, rng) -> (path, kwargs untuk requests)
+    build: object
+    role: str = 'anon'
+    # Login ulang sebelum tiap request (untuk logout)
+    relogin: bool = False
+    # Nama di hasil kalau satu endpoint punya beberapa skenario
+    label: str = None
+
+    @property
+    def name(self):
+        return self.label or self.endpoint
+
+
+@dataclass
+class Sample:
+    seconds: float
+    status: int
+    queries: int = None
+    db_ms: float = None
+
+
+@dataclass
+class Context:
+    """Ids sampled from the seeded database; ``pick`` favours the popular ones."""
+    films: list
+    usernames: list
+    user_ids: list
+    reviews: list
+    articles: list
+    reports: list
+    pending_reviews: list
+    skew: float = 1.1
+    _weights: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_db(cls, db, skew=1.1, limit=2000):
+        popular = [('views', -1)]
+        return cls(
+            films=[str(f['_id']) for f in db.films.find({}, {'_id': 1}).sort(popular).limit(limit)],
+            usernames=[u['username'] for u in
+                       db.users.find({}, {'username': 1}).sort([('followers_count', -1)]).limit(limit)],
+            user_ids=[str(u['_id']) for u in
+                      db.users.find({}, {'_id': 1}).sort([('followers_count', -1)]).limit(limit)],
+            reviews=[str(r['_id']) for r in db.reviews.find({}, {'_id': 1}).sort([('likes', -1)]).limit(limit)],
+            articles=[str(a['_id']) for a in db.articles.find({}, {'_id': 1}).sort(popular).limit(limit)],
+            reports=[str(r['_id']) for r in db.reports.find({'status': 'pending'}, {'_id': 1}).limit(limit)],
+            pending_reviews=[str(r) for r in db.reports.distinct('review_id', {'status': 'pending'})][:limit],
+            skew=skew,
+        )
+
+    def pick(self, rng, name):
+        values = getattr(self, name)
+        if not values:
+            return ''
+        weights = self._weights.get(name)
+        if weights is None:
+            weights = self._weights[name] = zipf_weights(len(values), self.skew)
+        return rng.choices(values, cum_weights=weights)[0]
+
+
+def _get(path):
+    return lambda ctx, rng: (path, {})
+
+
+def _form(path, data):
+    return lambda ctx, rng: (path(ctx, rng) if callable(path) else path, {'data': data(ctx, rng)})
+
+
+SEARCH_TERMS = ['night', 'river', 'shadow', 'summer', 'ghost', 'storm', 'star', 'road', 'city', 'iron']
+
+
+def scenarios():
+    """One scenario per endpoint in ``app.py`` (``static`` excluded)."""
+    return [
+        # Halaman publik
+        Scenario('index', 'GET', _get('/')),
+        Scenario('film_list', 'GET', _get('/films')),
+        Scenario('api_film_list', 'GET', _get('/api/films')),
+        Scenario('search_films', 'GET', lambda c, r: (f'/search?q={r.choice(SEARCH_TERMS)}', {})),
+        Scenario('search_films', 'GET', lambda c, r: (f'/search?q={r.choice(SEARCH_TERMS)}&source=omdb', {}),
+                 label='search_films[omdb]'),
+        Scenario('api_search_autocomplete', 'GET',
+                 lambda c, r: (f'/api/search/autocomplete?q={r.choice(SEARCH_TERMS)[:3]}', {})),
+        Scenario('film_detail', 'GET', lambda c, r: (f'/film/{c.pick(r, "films")}', {})),
+        Scenario('user_profile', 'GET', lambda c, r: (f'/user/{c.pick(r, "usernames")}', {})),
+        Scenario('followers_page', 'GET', lambda c, r: (f'/user/{c.pick(r, "usernames")}/followers', {})),
+        Scenario('following_page', 'GET', lambda c, r: (f'/user/{c.pick(r, "usernames")}/following', {})),
+        Scenario('article_detail', 'GET', lambda c, r: (f'/article/{c.pick(r, "articles")}', {})),
+        Scenario('register', 'POST', _form('/register', lambda c, r: {
+            'username': f'bench_{uuid.uuid4().hex[:12]}', 'email': f'{uuid.uuid4().hex}@bench.local',
+            'password': PASSWORD})),
+        Scenario('login', 'POST', _form('/login', lambda c, r: {
+            'username': c.pick(r, 'usernames'), 'password': PASSWORD})),
+        Scenario('healthz', 'GET', _get('/healthz')),
+        Scenario('readyz', 'GET', _get('/readyz')),
+        Scenario('metrics_endpoint', 'GET', _get('/metrics')),
+
+        # User yang login
+        Scenario('for_your_page', 'GET', _get('/your_page'), role='user'),
+        Scenario('profile', 'GET', _get('/profile'), role='user'),
+        Scenario('edit_profile', 'POST', _form('/edit-profile', lambda c, r: {'bio': f'bio {r.random()}'}),
+                 role='user'),
+        Scenario('api_watchlist_preview', 'GET', _get('/api/watchlist-preview?name=Li'), role='user'),
+        Scenario('import_omdb_film', 'POST',
+                 _form('/import-omdb', lambda c, r: {'imdb_id': f'tt{r.randint(1000000, 1000200)}'}), role='user'),
+        Scenario('toggle_watchlist', 'POST',
+                 _form(lambda c, r: f'/film/{c.pick(r, "films")}/toggle-watchlist', lambda c, r: {}), role='user'),
+        Scenario('add_to_custom_watchlist', 'POST',
+                 _form(lambda c, r: f'/film/{c.pick(r, "films")}/add-to-watchlist',
+                       lambda c, r: {'watchlist_name': f'List {r.randint(1, 3)}'}), role='user'),
+        Scenario('save_to_watchlist', 'POST',
+                 _form(lambda c, r: f'/film/{c.pick(r, "films")}/save-to-watchlist',
+                       lambda c, r: {'watchlist_name': 'Bench'}), role='user'),
+        Scenario('add_review', 'POST',
+                 _form(lambda c, r: f'/film/{c.pick(r, "films")}/review',
+                       lambda c, r: {'rating': r.randint(2, 20) / 2, 'review': 'Benchmark review'}), role='user'),
+        Scenario('like_review', 'POST',
+                 _form(lambda c, r: f'/review/{c.pick(r, "reviews")}/like', lambda c, r: {}), role='user'),
+        Scenario('dislike_review', 'POST',
+                 _form(lambda c, r: f'/review/{c.pick(r, "reviews")}/dislike', lambda c, r: {}), role='user'),
+        Scenario('report_review', 'POST',
+                 _form(lambda c, r: f'/review/{c.pick(r, "reviews")}/report',
+                       lambda c, r: {'reason': 'Contains spoiler'}), role='user'),
+        Scenario('follow_user', 'POST',
+                 _form(lambda c, r: f'/follow/{c.pick(r, "user_ids")}', lambda c, r: {}), role='user'),
+        Scenario('logout', 'GET', _get('/logout'), role='user', relogin=True),
+
+        # Admin
+        Scenario('admin_dashboard', 'GET', _get('/admin/dashboard'), role='admin'),
+        Scenario('admin_reported_reviews', 'GET', _get('/admin/reported-reviews'), role='admin'),
+        Scenario('admin_articles', 'GET', _get('/admin/articles'), role='admin'),
+        Scenario('admin_create_article', 'POST', _form('/admin/articles/create', lambda c, r: {
+            'title': f'Bench article {r.random()}', 'content': 'Benchmark body', 'tags': 'Drama'}), role='admin'),
+        Scenario('admin_bulk_reports', 'POST', lambda c, r: ('/admin/reports/bulk', {'json': {
+            'action': r.choice(['resolve', 'mark_spoiler']),
+            'review_ids': [c.pick(r, 'pending_reviews') for _ in range(5)]}}), role='admin'),
+        Scenario('admin_handle_report', 'POST', _form('/admin/handle-report', lambda c, r: {
+            'report_id': c.pick(r, 'reports'), 'action': 'resolve'}), role='admin'),
+        Scenario('debug_queries', 'GET', _get('/debug/queries'), role='admin'),
+    ]
+
+
+class LoadGenerator:
+    def __init__(self, base_url, context, concurrency=8, timeout=30, seed=42):
+        self.base_url = base_url.rstrip('/')
+        self.context = context
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.seed = seed
+        self._local = threading.local()
+
+    def _login(self, session, role, rng):
+        username = ADMIN_USERNAME if role == 'admin' else self.context.pick(rng, 'usernames')
+        session.post(f'{self.base_url}/login', data={'username': username, 'password': PASSWORD},
+                     allow_redirects=False, timeout=self.timeout)
+
+    def _session(self, role, rng):
+        sessions = getattr(self._local, 'sessions', None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+        session = sessions.get(role)
+        if session is None:
+            session = sessions[role] = requests.Session()
+            if role != 'anon':
+                self._login(session, role, rng)
+        return session
+
+    def _one(self, scenario, rng):
+        session = self._session(scenario.role, rng)
+        if scenario.relogin:
+            self._login(session, scenario.role, rng)
+        path, kwargs = scenario.build(self.context, rng)
+        started = time.perf_counter()
+        try:
+            response = session.request(scenario.method, self.base_url + path, allow_redirects=False,
+                                       timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            return Sample(time.perf_counter() - started, 0)
+        elapsed = time.perf_counter() - started
+        match = DB_TIMING_RE.search(response.headers.get('Server-Timing', ''))
+        if match:
+            return Sample(elapsed, response.status_code, int(match.group(2)), float(match.group(1)))
+        return Sample(elapsed, response.status_code)
+
+    def run(self, scenario, requests_count, warmup=0):
+        """Run ``scenario``; returns ``(samples, wall_seconds)``. Warm-up requests aren't recorded."""
+        def worker(index, count, record):
+            rng = random.Random(f'{self.seed}:{scenario.name}:{index}:{record}')
+            return [self._one(scenario, rng) for _ in range(count)]
+
+        def spread(total):
+            return [total // self.concurrency + (i < total % self.concurrency) for i in range(self.concurrency)]
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            if warmup:
+                list(pool.map(lambda args: worker(*args, False), enumerate(spread(warmup))))
+            started = time.perf_counter()
+            batches = list(pool.map(lambda args: worker(*args, True), enumerate(spread(requests_count))))
+            wall = time.perf_counter() - started
+        return [sample for batch in batches for sample in batch], wall
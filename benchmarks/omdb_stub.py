@@ -0,0 +1,79 @@
+"""Local stand-in for the OMDb API.
+
+Answers ``?s=`` searches and ``?i=`` title lookups with deterministic canned
+payloads after a fixed ``latency``, so benchmarks measure the app and not the
+internet, and never spend a real API key's quota.
+"""
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _imdb_id(text, i=0):
+    return f'tt{(zlib.crc32(f"{text}:{i}".encode()) % 9000000) + 1000000}'
+
+
+def search_payload(query, results=10):
+    if not query.strip():
+        return {'Response': 'False', 'Error': 'Incorrect IMDb ID.'}
+    return {
+        'Response': 'True',
+        'totalResults': str(results),
+        'Search': [{'Title': f'{query.title()} {i}', 'Year': str(1980 + i), 'imdbID': _imdb_id(query, i),
+                    'Type': 'movie', 'Poster': 'N/A'} for i in range(results)],
+    }
+
+
+def title_payload(imdb_id):
+    return {
+        'Response': 'True', 'imdbID': imdb_id, 'Title': f'Stub film {imdb_id}', 'Year': '2001',
+        'Released': '01 Jan 2001', 'Genre': 'Drama, Thriller', 'Plot': 'A stubbed OMDb film.',
+        'Poster': 'N/A',
+    }
+
+
+class OmdbStub:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05):
+        self.latency = latency
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                time.sleep(stub.latency)
+                if 'i' in params:
+                    payload = title_payload(params['i'])
+                else:
+                    payload = search_payload(params.get('s', ''))
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='omdb-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
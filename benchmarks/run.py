@@ -0,0 +1,247 @@
+"""Benchmark every route against a seeded scratch database.
+
+    python -m benchmarks.run --mongo-uri mongodb://localhost:27017/fiew_bench
+    python -m benchmarks.run --mongo-uri ... --skip-seed --compare benchmarks/results/<old>.json
+
+Seeds the database (``benchmarks.seed``), starts a stub OMDb server and the
+app in a child process pointed at both, drives every endpoint with the load
+generator and writes p50/p95/p99 latency, throughput, status counts and Mongo
+round trips per request for each route to a JSON file. ``--compare`` checks
+the new run against an earlier result and exits non-zero on a regression.
+Use ``--base-url`` to benchmark an app that is already running (e.g. under
+gunicorn) instead of the built-in threaded server.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, fields
+from datetime import datetime, timezone
+
+import requests
+from pymongo import MongoClient, uri_parser
+
+from benchmarks.load import Context, LoadGenerator, scenarios
+from benchmarks.omdb_stub import OmdbStub
+from benchmarks.seed import Volumes, seed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+SERVER_SCRIPT = '''
+import sys
+from werkzeug.serving import run_simple
+import app
+run_simple('127.0.0.1', int(sys.argv[1]), app.app, threaded=True, use_reloader=False)
+'''
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[min(max(index, 0), len(sorted_values) - 1)]
+
+
+def summarize(samples, wall):
+    latencies = sorted(s.seconds * 1000 for s in samples)
+    statuses = {}
+    for s in samples:
+        statuses[str(s.status)] = statuses.get(str(s.status), 0) + 1
+    queries = [s.queries for s in samples if s.queries is not None]
+    db_ms = [s.db_ms for s in samples if s.db_ms is not None]
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / wall, 2) if wall else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'mean': round(sum(latencies) / len(latencies), 2),
+            'max': round(latencies[-1], 2),
+        },
+        'statuses': statuses,
+        'errors': sum(1 for s in samples if s.status == 0 or s.status >= 500),
+        'mongo_ops_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'mongo_ops_max': max(queries) if queries else None,
+        'db_ms_mean': round(sum(db_ms) / len(db_ms), 2) if db_ms else None,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Routes that got slower (p95) or issue more Mongo commands than ``baseline``."""
+    regressions = []
+    for name, now in current['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if not before:
+            continue
+        p95_now, p95_before = now['latency_ms']['p95'], before['latency_ms']['p95']
+        if p95_before and p95_now > p95_before * (1 + tolerance):
+            regressions.append(f'{name}: p95 {p95_before:.1f} -> {p95_now:.1f} ms')
+        ops_now, ops_before = now.get('mongo_ops_per_request'), before.get('mongo_ops_per_request')
+        if ops_now is not None and ops_before is not None and ops_now > ops_before + 0.5:
+            regressions.append(f'{name}: mongo ops/request {ops_before} -> {ops_now}')
+    return regressions
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _app_env(args, omdb_url):
+    return {
+        **os.environ,
+        'MONGO_URI': args.mongo_uri,
+        'OMDB_URL': omdb_url,
+        'OMDB_API_KEY': 'benchmark',
+        'QUERY_PROFILER': '1',
+        'SLOW_QUERY_MS': '1e9',
+        'QUERY_PROFILE_HISTORY': '20',
+        'POSTER_MIRROR': '0',
+    }
+
+
+def _endpoints(env):
+    """Endpoints registered in app.py, to report routes the scenarios miss."""
+    script = 'import app; print("\\n".join(sorted({r.endpoint for r in app.app.url_map.iter_rules()})))'
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode:
+        return None
+    return {line for line in result.stdout.splitlines() if line and line != 'static'}
+
+
+def _wait_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'{base_url}/readyz', timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f'App at {base_url} did not become ready')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--mongo-uri', required=True, help='Scratch database; it is dropped and reseeded.')
+    parser.add_argument('--base-url', help='Benchmark an already running app instead of starting one.')
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per route.')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per route.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--omdb-latency', type=float, default=0.05, help='Stub OMDb response delay (s).')
+    parser.add_argument('--only', help='Comma-separated route names to run.')
+    parser.add_argument('--out', help='Result file (default: benchmarks/results/<timestamp>.json).')
+    parser.add_argument('--compare', help='Earlier result file to check for regressions.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 slowdown (fraction).')
+    for f in fields(Volumes):
+        parser.add_argument(f'--{f.name}', type=type(f.default), default=f.default)
+    args = parser.parse_args(argv)
+
+    parsed = uri_parser.parse_uri(args.mongo_uri)
+    if not parsed['database']:
+        parser.error('--mongo-uri must name a database')
+    app_uri = os.environ.get('MONGO_URI')
+    if app_uri and uri_parser.parse_uri(app_uri)['database'] == parsed['database']:
+        parser.error("Refusing to seed the application database, pick a scratch database")
+
+    client = MongoClient(args.mongo_uri)
+    db = client[parsed['database']]
+    volumes = Volumes(**{f.name: getattr(args, f.name) for f in fields(Volumes)})
+    seeded = None
+    if not args.skip_seed:
+        started = time.perf_counter()
+        seeded = seed(db, volumes, seed=args.seed)
+        print(f"✅ Seeded {parsed['database']} in {time.perf_counter() - started:.1f}s: {seeded}")
+
+    stub = OmdbStub(latency=args.omdb_latency).start()
+    env = _app_env(args, stub.url)
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        port = _free_port()
+        server = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT, str(port)], cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base_url = f'http://127.0.0.1:{port}'
+
+    results = {}
+    try:
+        _wait_ready(base_url)
+        context = Context.from_db(db, skew=volumes.skew)
+        generator = LoadGenerator(base_url, context, concurrency=args.concurrency, seed=args.seed)
+        only = set(args.only.split(',')) if args.only else None
+        for scenario in scenarios():
+            if only and scenario.name not in only:
+                continue
+            samples, wall = generator.run(scenario, args.requests, warmup=args.warmup)
+            results[scenario.name] = summarize(samples, wall)
+            r = results[scenario.name]
+            print(f"{scenario.name:28} p50 {r['latency_ms']['p50']:8.1f}  p95 {r['latency_ms']['p95']:8.1f}  "
+                  f"p99 {r['latency_ms']['p99']:8.1f} ms  {r['throughput_rps']:8.1f} rps  "
+                  f"ops/req {r['mongo_ops_per_request']}  errors {r['errors']}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        stub.stop()
+        client.close()
+
+    endpoints = _endpoints(env)
+    covered = {s.endpoint for s in scenarios()}
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'base_url': args.base_url or 'built-in threaded server',
+            'concurrency': args.concurrency,
+            'requests_per_route': args.requests,
+            'warmup_per_route': args.warmup,
+            'omdb_latency': args.omdb_latency,
+            'omdb_stub_requests': stub.requests,
+            'volumes': asdict(volumes),
+            'seeded': seeded,
+        },
+        'routes': results,
+        'uncovered_endpoints': sorted(endpoints - covered) if endpoints is not None else None,
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"✅ Results written to {out}")
+    if report['uncovered_endpoints']:
+        print(f"❌ Routes without a scenario: {', '.join(report['uncovered_endpoints'])}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            return 1
+        print("✅ No regressions against", args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Deterministic benchmark data with skewed popularity.
+
+Films and users are drawn with Zipf-like weights, so a few "viral" films get
+most of the reviews and views and a few "celebrity" users most of the
+followers, the way real traffic is shaped. The same ``seed`` always produces
+the same database (ids included), so runs are comparable. Denormalised fields
+are filled in consistently; ratings and follower counts come from the app's
+own reconcile functions.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from bson.objectid import ObjectId
+from werkzeug.security import generate_password_hash
+
+from follow_graph import FollowGraph
+from indexes import ensure_indexes
+from moderation import ModerationQueue
+from ratings import reconcile_ratings
+from stats import PENDING_REPORTS
+from watchlists import name_key
+
+PASSWORD = 'bench-password'
+ADMIN_USERNAME = 'bench_admin'
+GENRES = ['Action', 'Comedy', 'Drama', 'Horror', 'Romance', 'Sci-Fi', 'Thriller', 'Animation']
+WORDS = ['Night', 'River', 'Last', 'Shadow', 'Summer', 'Iron', 'Dream', 'City', 'Ghost', 'Storm',
+         'Silent', 'Red', 'Empire', 'Garden', 'Return', 'Winter', 'Star', 'Lost', 'Golden', 'Road']
+BATCH = 5000
+OID_EPOCH = 1700000000
+
+
+@dataclass
+class Volumes:
+    users: int = 2000
+    films: int = 3000
+    reviews: int = 30000
+    follows: int = 20000
+    reports: int = 500
+    articles: int = 200
+    watchlists: int = 1000
+    reactions: int = 20000
+    # Eksponen Zipf: makin besar makin timpang (film viral / user selebriti)
+    skew: float = 1.1
+
+
+def zipf_weights(n, skew):
+    return list(accumulate(1.0 / (rank ** skew) for rank in range(1, n + 1)))
+
+
+def _oid(rng):
+    # ObjectId deterministik: timestamp tetap + 8 byte dari rng
+    return ObjectId(OID_EPOCH.to_bytes(4, 'big') + rng.getrandbits(64).to_bytes(8, 'big'))
+
+
+def _insert(collection, docs):
+    for start in range(0, len(docs), BATCH):
+        collection.insert_many(docs[start:start + BATCH], ordered=False)
+
+
+def seed(db, volumes=None, seed=42):
+    """Drop and refill the benchmark collections. Returns a summary of what was written."""
+    volumes = volumes or Volumes()
+    rng = random.Random(seed)
+    now = datetime.now()
+    for name in ('users', 'films', 'reviews', 'follows', 'reports', 'articles', 'watchlists',
+                 'reactions', 'counters', 'daily_stats', 'trending', 'omdb_cache'):
+        db.drop_collection(name)
+    ensure_indexes(db)
+
+    # Satu hash untuk semua user: pbkdf2 per user terlalu lambat untuk seeding
+    password = generate_password_hash(PASSWORD)
+    user_ids = [_oid(rng) for _ in range(volumes.users)]
+    users = [{
+        '_id': uid, 'username': f'user{i}', 'email': f'user{i}@bench.local', 'password': password,
+        'role': 'user', 'bio': '', 'profile_pic': '', 'followers_count': 0, 'following_count': 0,
+        'created_at': now - timedelta(days=rng.randint(0, 365), minutes=i),
+    } for i, uid in enumerate(user_ids)]
+    users[0].update(username=ADMIN_USERNAME, role='admin')
+    _insert(db.users, users)
+    user_weights = zipf_weights(len(user_ids), volumes.skew)
+
+    film_ids = [_oid(rng) for _ in range(volumes.films)]
+    film_weights = zipf_weights(len(film_ids), volumes.skew)
+    films = []
+    for i, fid in enumerate(film_ids):
+        title = ' '.join(rng.sample(WORDS, rng.randint(1, 3)))
+        release = now - timedelta(days=rng.randint(0, 40 * 365))
+        films.append({
+            '_id': fid, 'imdb_id': f'tt{9000000 + i}', 'title': f'{title} {i}', 'year': str(release.year),
+            'genres': rng.sample(GENRES, rng.randint(1, 3)), 'poster_url': '', 'release_date': release,
+            'plot': f'Benchmark film {i}.', 'average_rating': 0, 'rating_sum': 0, 'rating_count': 0,
+            'rating_histogram': {},
+            # Views ikut distribusi Zipf: film urutan awal jadi "viral"
+            'views': int(100000 / (i + 1) ** volumes.skew), 'created_at': now - timedelta(minutes=i),
+        })
+    _insert(db.films, films)
+
+    review_ids = [_oid(rng) for _ in range(volumes.reviews)]
+    reviews = [{
+        '_id': rid,
+        'film_id': rng.choices(film_ids, cum_weights=film_weights)[0],
+        'user_id': rng.choice(user_ids),
+        'rating': rng.randint(2, 20) / 2, 'text': 'Benchmark review ' * rng.randint(1, 20),
+        'likes': 0, 'dislikes': 0, 'is_spoiler': rng.random() < 0.05,
+        'created_at': now - timedelta(minutes=i),
+    } for i, rid in enumerate(review_ids)]
+
+    # Reaksi juga timpang: sebagian kecil review mendapat sebagian besar like
+    review_weights = zipf_weights(len(review_ids), volumes.skew)
+    reaction_keys = dict.fromkeys((rng.choices(review_ids, cum_weights=review_weights)[0], rng.choice(user_ids))
+                                  for _ in range(volumes.reactions))
+    reactions = [{'review_id': r, 'user_id': u, 'value': rng.choice((1, 1, 1, -1))} for r, u in reaction_keys]
+    by_id = {review['_id']: review for review in reviews}
+    for reaction in reactions:
+        by_id[reaction['review_id']]['likes' if reaction['value'] == 1 else 'dislikes'] += 1
+    _insert(db.reviews, reviews)
+    _insert(db.reactions, reactions)
+
+    # Follow ke user selebriti (Zipf), pasangan unik
+    pairs = {}
+    attempts = 0
+    while len(pairs) < volumes.follows and attempts < volumes.follows * 5:
+        attempts += 1
+        follower = rng.choice(user_ids)
+        following = rng.choices(user_ids, cum_weights=user_weights)[0]
+        if follower != following:
+            pairs[(follower, following)] = None
+    _insert(db.follows, [{'follower_id': a, 'following_id': b, 'created_at': now} for a, b in pairs])
+
+    reports = [{
+        'review_id': rng.choice(review_ids), 'reporter_id': rng.choice(user_ids),
+        'reason': 'Contains spoiler', 'status': 'pending' if rng.random() < 0.7 else 'resolved',
+        'created_at': now - timedelta(minutes=i),
+    } for i in range(volumes.reports)]
+    _insert(db.reports, reports)
+    db.counters.update_one({'_id': PENDING_REPORTS},
+                           {'$set': {'value': sum(r['status'] == 'pending' for r in reports)}}, upsert=True)
+
+    _insert(db.articles, [{
+        'title': f'Article {i}', 'content': 'Benchmark article body. ' * 50,
+        'author_id': user_ids[0], 'tags': rng.sample(GENRES, 2), 'views': rng.randint(0, 5000),
+        'created_at': now - timedelta(days=i),
+    } for i in range(volumes.articles)])
+
+    watchlists = {}
+    for _ in range(volumes.watchlists):
+        user_id = rng.choice(user_ids)
+        name = f'List {rng.randint(1, 3)}'
+        entry = watchlists.setdefault((user_id, name_key(name)), {
+            'user_id': user_id, 'name': name, 'name_lower': name_key(name), 'film_ids': [], 'created_at': now,
+        })
+        for film_id in rng.choices(film_ids, cum_weights=film_weights, k=rng.randint(1, 15)):
+            if film_id not in entry['film_ids']:
+                entry['film_ids'].append(film_id)
+    _insert(db.watchlists, list(watchlists.values()))
+
+    reconcile_ratings(db.films, db.reviews)
+    ModerationQueue(db.reports, db.reviews, db.films, db.users, db.reactions, stats=None).reconcile()
+    FollowGraph(db.follows, db.users, {}).reconcile()
+
+    return {
+        'users': len(users), 'films': len(films), 'reviews': len(reviews), 'follows': len(pairs),
+        'reactions': len(reactions), 'reports': len(reports), 'articles': volumes.articles,
+        'watchlists': len(watchlists), 'skew': volumes.skew, 'seed': seed,
+    }
@@ -0,0 +1,86 @@
+"""Batch joins for documents that reference other collections.
+
+Instead of one ``find_one`` per document, the foreign keys of a whole page are
+collected and resolved with a single ``$in`` query per collection, then joined
+in memory. ``lookup_stages`` builds the equivalent ``$lookup`` stages for
+callers that already run an aggregation pipeline.
+"""
+
+
+def collect_ids(docs, key):
+    """Unique, non-null values of ``key`` across ``docs``, in first-seen order."""
+    seen = set()
+    ids = []
+    for doc in docs:
+        value = doc.get(key)
+        if value is not None and value not in seen:
+            seen.add(value)
+            ids.append(value)
+    return ids
+
+
+def fetch_by_ids(collection, ids, projection=None):
+    """Map ``_id -> document`` for ``ids`` using one ``$in`` query."""
+    if not ids:
+        return {}
+    return {doc['_id']: doc for doc in collection.find({'_id': {'$in': list(ids)}}, projection)}
+
+
+def fetch_values(collection, query, field):
+    """Set of ``field`` values over the documents matching ``query``."""
+    return {doc[field] for doc in collection.find(query, {field: 1, '_id': 0}) if field in doc}
+
+
+def attach(docs, key, collection, as_field=None, projection=None, drop_missing=False):
+    """Join the documents referenced by ``doc[key]`` onto each doc.
+
+    The referenced document is stored under ``as_field`` (defaults to ``key``,
+    replacing the id with the document). Docs whose reference can't be resolved
+    keep their original value, or are dropped when ``drop_missing`` is set.
+    Returns the (possibly filtered) list.
+    """
+    docs = list(docs)
+    as_field = as_field or key
+    related = fetch_by_ids(collection, collect_ids(docs, key), projection)
+
+    joined = []
+    for doc in docs:
+        match = related.get(doc.get(key))
+        if match is None:
+            if drop_missing:
+                continue
+        else:
+            doc[as_field] = match
+        joined.append(doc)
+    return joined
+
+
+def lookup_stages(from_collection, local_field, as_field, projection=None, preserve_missing=True):
+    """``$lookup`` + ``$unwind`` stages joining one document by ``_id``.
+
+    With a projection the lookup uses a sub-pipeline so only the requested
+    fields are read from ``from_collection``.
+    """
+    if projection:
+        lookup = {
+            '$lookup': {
+                'from': from_collection,
+                'let': {'ref': '$' + local_field},
+                'pipeline': [
+                    {'$match': {'$expr': {'$eq': ['$_id', '$$ref']}}},
+                    {'$project': projection},
+                ],
+                'as': as_field,
+            }
+        }
+    else:
+        lookup = {
+            '$lookup': {
+                'from': from_collection,
+                'localField': local_field,
+                'foreignField': '_id',
+                'as': as_field,
+            }
+        }
+    unwind = {'$unwind': {'path': '$' + as_field, 'preserveNullAndEmptyArrays': preserve_missing}}
+    return [lookup, unwind]
@@ -0,0 +1,106 @@
+"""Concurrent execution of a page's independent reads.
+
+``FanOut.run(name=func, ...)`` calls every ``func`` at once and returns their
+results by name, so a page that needs several unrelated queries waits about as
+long as the slowest one instead of their sum. The first call runs on the
+calling thread and the rest on a bounded thread pool over the same (thread
+safe) pymongo client. When every pool thread is busy the remaining calls just
+run inline, so a burst of requests degrades to the sequential behaviour rather
+than queueing behind each other. ``workers=0`` disables the pool entirely.
+
+Calls run outside the Flask request context: read ``session``/``request``
+before fanning out and pass plain values in. Per-thread state that must follow
+a call (e.g. the request's query profile) is carried over by the hooks
+registered with ``propagate``.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+
+class FanOut:
+    def __init__(self, workers=4):
+        self._propagators = []
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.workers = workers
+
+    @property
+    def workers(self):
+        return self._workers
+
+    @workers.setter
+    def workers(self, workers):
+        # Semaphore dan pool mengikuti jumlah worker; pool lama dibiarkan selesai sendiri
+        with self._lock:
+            self._workers = workers
+            self._slots = threading.BoundedSemaphore(max(workers, 1))
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def propagate(self, capture):
+        """Register ``capture() -> context manager``.
+
+        ``capture`` runs on the calling thread; the context manager it returns
+        is entered on the worker thread around the call.
+        """
+        self._propagators.append(capture)
+        return capture
+
+    def _pool(self):
+        # Thread pool tidak ikut ter-fork; buat ulang di proses anak
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='query-fanout')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _submit(self, func):
+        slots = self._slots
+        if not self.workers or not slots.acquire(blocking=False):
+            return None
+        contexts = [capture() for capture in self._propagators]
+
+        def call():
+            try:
+                with ExitStack() as stack:
+                    for context in contexts:
+                        stack.enter_context(context)
+                    return func()
+            finally:
+                slots.release()
+
+        return self._pool().submit(call)
+
+    def run(self, **calls):
+        """Call every ``name=func`` concurrently; returns ``{name: result}``.
+
+        All calls finish before this returns. If any raised, the first
+        exception (in argument order) is re-raised.
+        """
+        names = list(calls)
+        futures = {name: self._submit(calls[name]) for name in names[1:]}
+        outcomes = {}
+
+        def settle(name, call):
+            try:
+                outcomes[name] = (True, call())
+            except Exception as e:
+                outcomes[name] = (False, e)
+
+        if names:
+            settle(names[0], calls[names[0]])
+        for name, future in futures.items():
+            settle(name, future.result if future is not None else calls[name])
+
+        results = {}
+        for name in names:
+            ok, value = outcomes[name]
+            if not ok:
+                raise value
+            results[name] = value
+        return results
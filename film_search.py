@@ -0,0 +1,160 @@
+"""Local-first film search and title autocomplete.
+
+``FilmSearch.local`` runs against the text index on ``films.title`` and ranks
+the candidates by text score blended with popularity (``views``) and
+``average_rating``; the search route only asks OMDb (``remote``) when the
+local catalogue has nothing, or when the user explicitly wants more results.
+
+``TitleIndex`` answers autocomplete from memory. Every word of every title is
+indexed under its prefixes (up to ``MAX_PREFIX`` characters), each prefix
+keeping the most viewed films only. The first ``complete`` in a worker starts
+the build on the background job and returns nothing until it is ready, so no
+request ever waits for (or duplicates) the full scan. A failed build is
+retried after ``retry_interval`` seconds (doubling up to ``refresh_interval``),
+the index is rebuilt every ``refresh_interval`` seconds, and ``add`` puts a
+newly imported film in immediately.
+"""
+import logging
+import math
+import re
+import threading
+import unicodedata
+
+from pymongo.errors import OperationFailure
+
+from background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+MAX_PREFIX = 12
+TOKEN_RE = re.compile(r'\w+')
+
+# Bobot popularitas terhadap skor teks
+VIEWS_WEIGHT = 0.15
+RATING_WEIGHT = 0.05
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+def blended_score(film):
+    return (film.get('score', 0)
+            + VIEWS_WEIGHT * math.log10(1 + max(film.get('views') or 0, 0))
+            + RATING_WEIGHT * (film.get('average_rating') or 0))
+
+
+class FilmSearch:
+    def __init__(self, films, projection, omdb=None, candidates=50):
+        self.films = films
+        self.projection = projection
+        self.omdb = omdb
+        self.candidates = candidates
+
+    def local(self, query, limit=20):
+        query = (query or '').strip()
+        if not query:
+            return []
+        try:
+            found = list(self.films.find(
+                {'$text': {'$search': query}},
+                {**self.projection, 'views': 1, 'average_rating': 1, 'score': {'$meta': 'textScore'}}
+            ).sort([('score', {'$meta': 'textScore'})]).limit(self.candidates))
+        except OperationFailure as e:
+            # Text index belum dibuat (`flask ensure-indexes`): anggap lokal kosong, OMDb yang menjawab
+            logger.warning("Local film search failed: %s", e)
+            return []
+        found.sort(key=blended_score, reverse=True)
+        return found[:limit]
+
+    def remote(self, query):
+        data = self.omdb.search(query)
+        return data.get('Search', []) if data.get('Response') == 'True' else []
+
+
+class TitleIndex:
+    def __init__(self, films, projection, per_prefix=50, refresh_interval=600, retry_interval=5):
+        self.films = films
+        self.projection = {**projection, 'title': 1, 'views': 1}
+        self.per_prefix = per_prefix
+        self._postings = None
+        self._docs = {}
+        self._lock = threading.Lock()
+        self._build_requested = False
+        self._task = PeriodicTask('title-index', refresh_interval, self.rebuild, retry_interval)
+
+    @staticmethod
+    def _prefixes(title):
+        prefixes = set()
+        for token in tokenize(title):
+            for end in range(1, min(len(token), MAX_PREFIX) + 1):
+                prefixes.add(token[:end])
+        return prefixes
+
+    def _rank(self, docs, film_id):
+        return -(docs[film_id].get('views') or 0)
+
+    def rebuild(self):
+        docs = {}
+        postings = {}
+        for film in self.films.find({'title': {'$type': 'string'}}, self.projection):
+            docs[film['_id']] = film
+            for prefix in self._prefixes(film['title']):
+                postings.setdefault(prefix, []).append(film['_id'])
+        for prefix, ids in postings.items():
+            ids.sort(key=lambda i: self._rank(docs, i))
+            del ids[self.per_prefix:]
+        with self._lock:
+            self._docs = docs
+            self._postings = postings
+
+    def add(self, film):
+        """Index one film right away (e.g. after ``import_omdb_film``)."""
+        if self._postings is None or not film.get('title'):
+            return
+        doc = {k: film.get(k) for k in self.projection}
+        doc['_id'] = film['_id']
+        with self._lock:
+            self._docs[doc['_id']] = doc
+            for prefix in self._prefixes(doc['title']):
+                # Salin daftar agar pembaca tanpa lock tidak melihat list setengah jadi
+                ids = [i for i in self._postings.get(prefix, []) if i != doc['_id']] + [doc['_id']]
+                ids.sort(key=lambda i: self._rank(self._docs, i))
+                self._postings[prefix] = ids[:self.per_prefix]
+
+    def complete(self, query, limit=8):
+        """Films whose title words start with every word of ``query``, most viewed first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self._task.ensure_started()
+        with self._lock:
+            postings, docs = self._postings, self._docs
+            if postings is None and not self._build_requested:
+                # Request pertama di worker ini: bangun sekali di thread background
+                self._build_requested = True
+                self._task.trigger()
+        if postings is None:
+            return []
+
+        # Token terpanjang paling selektif
+        lookup = max(tokens, key=len)
+        results = []
+        for film_id in postings.get(lookup[:MAX_PREFIX], []):
+            film = docs.get(film_id)
+            if film is None:
+                continue
+            words = tokenize(film['title'])
+            if all(any(word.startswith(token) for word in words) for token in tokens):
+                results.append(film)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def stop(self):
+        self._task.stop()
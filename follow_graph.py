@@ -0,0 +1,139 @@
+"""Follower / following lookups for profile pages.
+
+Everything a page needs about the follow graph (edge lists, the users on the
+other end, and whether the viewer follows each of them) is fetched with a
+fixed number of batched queries, no matter how many people are listed or how
+large the audience is.
+
+Follower/following totals are kept on the user documents as
+``followers_count`` / ``following_count``. They only change when an edge was
+really inserted or deleted; the unique ``(follower_id, following_id)`` index
+makes a double click a no-op instead of a second increment.
+"""
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from enrichment import fetch_by_ids, fetch_values
+from pagination import keyset_page
+
+# Sisi edge: (field milik pemilik profil, field milik user di seberang)
+FOLLOWERS = ('following_id', 'follower_id')
+FOLLOWING = ('follower_id', 'following_id')
+
+EDGE_SORT = [('_id', -1)]
+
+
+class FollowGraph:
+    def __init__(self, follows, users, user_projection):
+        self.follows = follows
+        self.users = users
+        self.user_projection = user_projection
+
+    def _edges(self, side, user_id, limit):
+        own_field, other_field = side
+        return [edge[other_field] for edge in
+                self.follows.find({own_field: user_id}, {other_field: 1})
+                .sort(EDGE_SORT).limit(limit)]
+
+    def followed_by(self, viewer_id, user_ids):
+        """Subset of ``user_ids`` that ``viewer_id`` follows (one query)."""
+        if not viewer_id or not user_ids:
+            return set()
+        return fetch_values(self.follows, {
+            'follower_id': viewer_id,
+            'following_id': {'$in': list(user_ids)}
+        }, 'following_id')
+
+    def _people(self, ids, viewer_id):
+        # Satu $in untuk data user, satu query untuk status follow viewer
+        known = fetch_by_ids(self.users, ids, self.user_projection)
+        followed = self.followed_by(viewer_id, [i for i in ids if i != viewer_id])
+        return [{**known[i], 'is_following': i in followed} for i in ids if i in known]
+
+    def previews(self, user_id, viewer_id=None, limit=5):
+        """Latest ``limit`` followers and followings of ``user_id``.
+
+        Returns ``(followers, following)``; each person is a user card with an
+        ``is_following`` flag for the viewer.
+        """
+        follower_ids = self._edges(FOLLOWERS, user_id, limit)
+        following_ids = self._edges(FOLLOWING, user_id, limit)
+
+        # User di kedua daftar diambil sekaligus, lalu dipisah lagi
+        people = {p['_id']: p for p in
+                  self._people(list(dict.fromkeys(follower_ids + following_ids)), viewer_id)}
+        return ([people[i] for i in follower_ids if i in people],
+                [people[i] for i in following_ids if i in people])
+
+    def page(self, side, user_id, viewer_id=None, limit=24, after=None):
+        """One keyset page of a user's followers or followings.
+
+        Returns ``(people, next_cursor)``. Raises ``ValueError`` on a bad cursor.
+        """
+        own_field, other_field = side
+        edges, next_cursor = keyset_page(self.follows, EDGE_SORT, limit, after=after,
+                                         query={own_field: user_id},
+                                         projection={other_field: 1})
+        return self._people([edge[other_field] for edge in edges], viewer_id), next_cursor
+
+    def _bump_counts(self, follower_id, following_id, amount):
+        self.users.bulk_write([
+            UpdateOne({'_id': follower_id}, {'$inc': {'following_count': amount}}),
+            UpdateOne({'_id': following_id}, {'$inc': {'followers_count': amount}}),
+        ], ordered=False)
+
+    def toggle(self, follower_id, following_id):
+        """Follow or unfollow. Returns ``'follow'`` or ``'unfollow'``."""
+        deleted = self.follows.delete_one({'follower_id': follower_id, 'following_id': following_id})
+        if deleted.deleted_count:
+            self._bump_counts(follower_id, following_id, -1)
+            return 'unfollow'
+
+        try:
+            self.follows.insert_one({
+                'follower_id': follower_id,
+                'following_id': following_id,
+                'created_at': datetime.now()
+            })
+        except DuplicateKeyError:
+            # Request lain baru saja membuat edge yang sama; hitungan sudah dinaikkan di sana
+            return 'follow'
+        self._bump_counts(follower_id, following_id, 1)
+        return 'follow'
+
+    def reconcile(self, batch_size=500):
+        """Remove duplicate edges and recompute every user's counters from ``follows``.
+
+        Returns ``(duplicates_removed, users_updated)``.
+        """
+        duplicates = 0
+        pipeline = [
+            {'$group': {'_id': {'follower_id': '$follower_id', 'following_id': '$following_id'},
+                        'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+            {'$match': {'count': {'$gt': 1}}},
+        ]
+        for row in self.follows.aggregate(pipeline, allowDiskUse=True):
+            duplicates += self.follows.delete_many({'_id': {'$in': row['ids'][1:]}}).deleted_count
+
+        counts = {}
+        for field, counter in (('follower_id', 'following_count'), ('following_id', 'followers_count')):
+            for row in self.follows.aggregate([{'$group': {'_id': '$' + field, 'count': {'$sum': 1}}}],
+                                              allowDiskUse=True):
+                counts.setdefault(row['_id'], {})[counter] = row['count']
+
+        ops = []
+        updated = 0
+        for user in self.users.find({}, {'_id': 1}):
+            user_counts = counts.get(user['_id'], {})
+            ops.append(UpdateOne({'_id': user['_id']}, {'$set': {
+                'followers_count': user_counts.get('followers_count', 0),
+                'following_count': user_counts.get('following_count', 0),
+            }}))
+            if len(ops) >= batch_size:
+                updated += self.users.bulk_write(ops, ordered=False).matched_count
+                ops = []
+        if ops:
+            updated += self.users.bulk_write(ops, ordered=False).matched_count
+        return duplicates, updated
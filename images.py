@@ -0,0 +1,188 @@
+"""Uploaded image storage and resized variants.
+
+Uploads are stored under ``uploads/`` in the static images folder, named after
+a hash of their content, so the same picture uploaded twice is stored once.
+Fixed-size WebP and JPEG variants are generated on a small worker pool off
+the request thread; when they are ready ``on_ready`` is called with a
+``{width: {format: filename}}`` map that the caller records on its document.
+``store`` only saves the upload; the caller starts the variants with
+``process`` once the document that ``on_ready`` updates has been written.
+Uploads whose content (magic bytes) is not the image type their name claims
+are rejected. Templates then use ``image_url`` to pick the smallest variant
+that fits.
+
+Pillow is optional: without it, or while variants are still being made, the
+original file is served. ``save``, ``submit`` and ``render`` are also used on
+their own by the poster mirror.
+"""
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.utils import secure_filename
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow opsional
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_SUBDIR = 'uploads'
+ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
+# Tanda awal file -> ekstensi
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+FORMATS = {'webp': ('WEBP', {'quality': 80, 'method': 4}),
+           'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True})}
+
+# kind -> (lebar variant, crop persegi?)
+VARIANTS = {
+    'avatar': ((64, 128), True),
+    'hero': ((600, 1200), False),
+    'poster': ((300, 600), False),
+}
+
+
+def sniff_extension(data):
+    """Image extension from the file's magic bytes, or ``None``."""
+    for signature, ext in SIGNATURES:
+        if data.startswith(signature):
+            return ext
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class ImagePipeline:
+    def __init__(self, root, workers=2, max_pending=32):
+        self.root = root
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return Image is not None
+
+    def _pool(self):
+        # Thread pool tidak ikut ter-fork; buat ulang di proses anak
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='image-variants')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _variant_names(self, digest, kind):
+        widths, _ = VARIANTS[kind]
+        return {str(width): {fmt: f'{UPLOAD_SUBDIR}/{digest}_{width}.{fmt}' for fmt in FORMATS}
+                for width in widths}
+
+    def existing_variants(self, digest, kind):
+        names = self._variant_names(digest, kind)
+        if all(os.path.exists(self._path(n)) for v in names.values() for n in v.values()):
+            return names
+        return None
+
+    def save(self, data, ext):
+        """Write ``data`` under its content hash; returns ``(filename, digest)``."""
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        filename = f'{UPLOAD_SUBDIR}/{digest}.{ext}'
+        path = self._path(filename)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return filename, digest
+
+    def submit(self, func, *args):
+        """Run ``func(*args)`` on the worker pool. Returns False when the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                func(*args)
+            except Exception:
+                logger.exception("Image job %s failed", getattr(func, '__name__', func))
+            finally:
+                self._slots.release()
+
+        self._pool().submit(run)
+        return True
+
+    def store(self, upload, kind):
+        """Save an uploaded ``FileStorage``; returns ``(filename, digest, variants)``.
+
+        ``variants`` is returned directly when this content was processed
+        before, otherwise it is ``None`` and the caller should ``process`` it.
+        Raises ``ValueError`` for a file that isn't an image of the type its
+        name says.
+        """
+        ext = secure_filename(upload.filename or '').rsplit('.', 1)[-1].lower()
+        if ext not in ALLOWED_EXTENSIONS:
+            raise ValueError("Unsupported image type")
+        data = upload.read()
+        if sniff_extension(data) != ('jpg' if ext == 'jpeg' else ext):
+            raise ValueError("File content does not match its image type")
+        filename, digest = self.save(data, ext)
+
+        if not self.enabled:
+            return filename, digest, None
+        return filename, digest, self.existing_variants(digest, kind)
+
+    def process(self, filename, digest, kind, on_ready):
+        """Render the variants of a stored upload in the background, then call ``on_ready(variants)``."""
+        if not self.enabled:
+            return
+
+        def run():
+            on_ready(self.render(filename, digest, kind))
+
+        # Antrian dibatasi; kalau penuh, original tetap dipakai sampai upload berikutnya
+        if not self.submit(run):
+            logger.warning("Image queue full, skipping variants for %s", filename)
+
+    def render(self, filename, digest, kind):
+        """Write every variant of ``kind`` for an already saved file (blocking)."""
+        widths, square = VARIANTS[kind]
+        names = self._variant_names(digest, kind)
+        with Image.open(self._path(filename)) as source:
+            source = ImageOps.exif_transpose(source)
+            if source.mode not in ('RGB', 'RGBA'):
+                source = source.convert('RGBA' if 'transparency' in source.info else 'RGB')
+            for width in widths:
+                if square:
+                    resized = ImageOps.fit(source, (width, width), Image.LANCZOS)
+                else:
+                    resized = source.copy()
+                    resized.thumbnail((width, width * 4), Image.LANCZOS)
+                for fmt, (pil_format, options) in FORMATS.items():
+                    image = resized.convert('RGB') if pil_format == 'JPEG' else resized
+                    target = self._path(names[str(width)][fmt])
+                    tmp = f'{target}.{os.getpid()}.tmp'
+                    image.save(tmp, pil_format, **options)
+                    os.replace(tmp, target)
+        return names
+
+
+def pick_variant(filename, variants, size, fmt='webp'):
+    """Smallest variant at least ``size`` px wide, else the original (never upscaled)."""
+    width = min((int(w) for w in variants or {} if int(w) >= size), default=None)
+    if width is None:
+        return filename
+    return variants[str(width)].get(fmt) or filename
@@ -0,0 +1,258 @@
+"""Every index the application's queries rely on, plus a query-plan audit.
+
+``INDEXES`` is the single place indexes are declared. ``ensure_indexes`` applies
+them idempotently (``create_indexes`` is a no-op for an index that already
+exists with the same spec). It is run on deploy through ``flask ensure-indexes``
+(and by the benchmark seeder), never when the app is imported or from request
+handlers. An index that can't be built (e.g. a unique index over existing
+duplicates) is reported instead of aborting the rest.
+
+``QUERY_SHAPES`` lists the query shapes issued by the routes. ``audit`` runs
+``explain()`` for each of them against a seeded database and reports any plan
+that contains a collection scan or an in-memory sort, so ``flask audit-indexes``
+can fail a deploy before an unindexed query reaches production.
+"""
+import logging
+import random
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    'users': [
+        IndexModel([('username', ASCENDING)], unique=True),
+        IndexModel([('email', ASCENDING)], unique=True),
+        IndexModel([('created_at', DESCENDING)]),
+    ],
+    'films': [
+        IndexModel([('title', TEXT)]),
+        IndexModel([('genres', ASCENDING)]),
+        IndexModel([('imdb_id', ASCENDING)]),
+        IndexModel([('release_date', DESCENDING), ('_id', DESCENDING)]),
+        IndexModel([('views', DESCENDING), ('_id', DESCENDING)]),
+    ],
+    'reviews': [
+        IndexModel([('film_id', ASCENDING), ('created_at', DESCENDING)]),
+        IndexModel([('film_id', ASCENDING), ('user_id', ASCENDING)]),
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING)]),
+        IndexModel([('created_at', DESCENDING)]),
+        # Antrian moderasi: hanya review dengan report pending
+        IndexModel([('first_reported_at', ASCENDING), ('_id', ASCENDING)],
+                   partialFilterExpression={'pending_reports': {'$gt': 0}}, name='moderation_queue'),
+    ],
+    'follows': [
+        IndexModel([('follower_id', ASCENDING), ('following_id', ASCENDING)], unique=True),
+        IndexModel([('follower_id', ASCENDING), ('_id', DESCENDING)]),
+        IndexModel([('following_id', ASCENDING), ('_id', DESCENDING)]),
+    ],
+    'reactions': [
+        IndexModel([('review_id', ASCENDING), ('user_id', ASCENDING)], unique=True),
+        IndexModel([('user_id', ASCENDING), ('review_id', ASCENDING)]),
+    ],
+    'watchlists': [
+        IndexModel([('user_id', ASCENDING), ('name_lower', ASCENDING)], unique=True),
+        IndexModel([('user_id', ASCENDING), ('created_at', ASCENDING)]),
+    ],
+    'reports': [
+        IndexModel([('status', ASCENDING), ('created_at', DESCENDING)]),
+        IndexModel([('review_id', ASCENDING), ('reporter_id', ASCENDING)]),
+    ],
+    'articles': [
+        IndexModel([('created_at', DESCENDING)]),
+    ],
+    'daily_stats': [
+        IndexModel([('metric', ASCENDING), ('day', DESCENDING)]),
+    ],
+    'omdb_cache': [
+        # TTL: Mongo menghapus entri cache setelah expires_at lewat
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+
+def ensure_indexes(db):
+    """Create every declared index.
+
+    Returns ``{collection: [index names]}`` for the indexes that exist
+    afterwards; failures are logged and left out.
+    """
+    created = {}
+    for name, models in INDEXES.items():
+        created[name] = []
+        for model in models:
+            try:
+                created[name].extend(db[name].create_indexes([model]))
+            except OperationFailure as e:
+                logger.warning("Could not create index %s on %s: %s", model.document['name'], name, e)
+    return created
+
+
+def _oid():
+    return ObjectId()
+
+
+# (route, collection, kind, spec). kind 'find' memakai filter/sort/limit,
+# 'count' memakai filter saja, 'aggregate' memakai pipeline. Nilai contoh hanya
+# berpengaruh pada bentuk query. Lookup by _id saja tidak dicantumkan.
+# 'scan': True untuk job background yang memang membaca seluruh koleksi.
+_KEYSET_DESC = [{'_id': {'$lt': _oid()}}, {'_id': None}]
+QUERY_SHAPES = [
+    ('trending', 'films', 'find', {'filter': {}, 'sort': [('views', -1), ('_id', -1)], 'limit': 10}),
+    ('trending', 'films', 'find', {'filter': {}, 'sort': [('release_date', -1), ('_id', -1)], 'limit': 10}),
+    ('index', 'articles', 'find', {'filter': {}, 'sort': [('created_at', -1)], 'limit': 3}),
+    ('film_list', 'films', 'find', {
+        'filter': {'$or': [
+            {'release_date': {'$lt': datetime(2001, 1, 1)}},
+            {'release_date': None},
+            {'release_date': datetime(2001, 1, 1), '_id': {'$lt': _oid()}},
+            {'release_date': datetime(2001, 1, 1), '_id': None},
+        ]},
+        'sort': [('release_date', -1), ('_id', -1)], 'limit': 25}),
+    ('film_detail', 'reviews', 'find', {'filter': {'film_id': _oid()}, 'sort': [('created_at', -1)]}),
+    ('film_detail', 'reviews', 'find', {'filter': {'film_id': _oid(), 'user_id': _oid()}}),
+    ('film_detail', 'reactions', 'find', {'filter': {'user_id': _oid(), 'review_id': {'$in': [_oid(), _oid()]}}}),
+    ('search_films', 'films', 'find', {'filter': {'$text': {'$search': 'film'}}, 'limit': 50}),
+    ('api_search_autocomplete', 'films', 'find', {'filter': {'title': {'$type': 'string'}}, 'scan': True}),
+    ('import_omdb_film', 'films', 'find', {'filter': {'imdb_id': 'tt0000001'}}),
+    ('for_your_page', 'reviews', 'find', {'filter': {}, 'sort': [('created_at', -1)], 'limit': 10}),
+    ('for_your_page', 'follows', 'find', {'filter': {'follower_id': _oid(), 'following_id': {'$in': [_oid(), _oid()]}}}),
+    ('for_your_page', 'watchlists', 'find', {'filter': {'user_id': _oid()}, 'sort': [('created_at', 1)]}),
+    ('api_watchlist_preview', 'watchlists', 'find', {'filter': {'user_id': _oid()}, 'sort': [('created_at', 1)]}),
+    ('add_to_custom_watchlist', 'watchlists', 'find', {'filter': {'user_id': _oid(), 'name_lower': 'list'}}),
+    ('like_review', 'reactions', 'find', {'filter': {'review_id': _oid(), 'user_id': _oid()}}),
+    ('user_profile', 'users', 'find', {'filter': {'username': 'user1'}}),
+    ('user_profile', 'reviews', 'find', {'filter': {'user_id': _oid()}, 'sort': [('created_at', -1)]}),
+    ('user_profile', 'follows', 'find', {'filter': {'following_id': _oid()}, 'sort': [('_id', -1)], 'limit': 5}),
+    ('user_profile', 'follows', 'find', {'filter': {'follower_id': _oid()}, 'sort': [('_id', -1)], 'limit': 5}),
+    ('user_profile', 'follows', 'find', {'filter': {'follower_id': _oid(), 'following_id': {'$in': [_oid(), _oid()]}}}),
+    ('followers_page', 'follows', 'find', {
+        'filter': {'$and': [{'following_id': _oid()}, {'$or': _KEYSET_DESC}]},
+        'sort': [('_id', -1)], 'limit': 25}),
+    ('following_page', 'follows', 'find', {
+        'filter': {'$and': [{'follower_id': _oid()}, {'$or': _KEYSET_DESC}]},
+        'sort': [('_id', -1)], 'limit': 25}),
+    ('register', 'users', 'find', {'filter': {'email': 'user1@example.com'}}),
+    ('report_review', 'reports', 'find', {'filter': {'review_id': _oid(), 'reporter_id': _oid()}}),
+    ('admin_dashboard', 'reports', 'count', {'filter': {'status': 'pending'}}),
+    ('admin_dashboard', 'daily_stats', 'find', {'filter': {'metric': 'reviews'}, 'sort': [('day', -1)], 'limit': 1}),
+    ('admin_dashboard', 'daily_stats', 'find', {'filter': {'metric': 'reviews', 'day': {'$gte': datetime(2001, 1, 1)}}}),
+    ('admin_dashboard', 'reviews', 'aggregate', {'pipeline': [
+        {'$match': {'created_at': {'$gte': datetime(2001, 1, 1)}}},
+        {'$group': {'_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created_at'}}, 'count': {'$sum': 1}}},
+    ]}),
+    ('admin_dashboard', 'users', 'aggregate', {'pipeline': [
+        {'$match': {'created_at': {'$gte': datetime(2001, 1, 1)}}},
+        {'$group': {'_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created_at'}}, 'count': {'$sum': 1}}},
+    ]}),
+    ('admin_reported_reviews', 'reviews', 'aggregate', {'pipeline': [
+        {'$match': {'pending_reports': {'$gt': 0}}},
+        {'$match': {'$or': [{'first_reported_at': {'$gt': datetime(2001, 1, 1)}},
+                            {'first_reported_at': datetime(2001, 1, 1), '_id': {'$gt': _oid()}}]}},
+        {'$sort': {'first_reported_at': 1, '_id': 1}},
+        {'$limit': 26},
+    ]}),
+    # $lookup detail report per review di halaman antrian, dan resolve saat act()
+    ('admin_reported_reviews', 'reports', 'find', {'filter': {'review_id': _oid(), 'status': 'pending'}}),
+    ('admin_bulk_reports', 'reports', 'find', {'filter': {'review_id': {'$in': [_oid(), _oid()]}, 'status': 'pending'}}),
+    ('admin_articles', 'articles', 'find', {'filter': {}, 'sort': [('created_at', -1)]}),
+    ('article_detail', 'articles', 'find', {'filter': {'_id': {'$ne': _oid()}}, 'sort': [('created_at', -1)], 'limit': 2}),
+]
+
+
+def seed_audit_data(db, users=200, films=500, reviews=2000, follows=1000, reports=200, articles=50):
+    """Fill an (empty, scratch) database with enough documents for realistic plans."""
+    now = datetime.now()
+    user_ids = [_oid() for _ in range(users)]
+    film_ids = [_oid() for _ in range(films)]
+
+    db.users.insert_many([
+        {'_id': uid, 'username': f'user{i}', 'email': f'user{i}@example.com', 'role': 'user'}
+        for i, uid in enumerate(user_ids)
+    ])
+    db.films.insert_many([
+        {'_id': fid, 'title': f'Film {i}', 'imdb_id': f'tt{i:07d}', 'genres': ['Drama'],
+         'release_date': now - timedelta(days=i) if i % 20 else None, 'views': random.randint(0, 10000)}
+        for i, fid in enumerate(film_ids)
+    ])
+    review_ids = [_oid() for _ in range(reviews)]
+    db.reviews.insert_many([
+        {'_id': rid, 'film_id': random.choice(film_ids), 'user_id': random.choice(user_ids),
+         'rating': random.randint(2, 20) / 2, 'created_at': now - timedelta(minutes=i)}
+        for i, rid in enumerate(review_ids)
+    ])
+    pairs = {tuple(random.sample(user_ids, 2)) for _ in range(follows)}
+    db.follows.insert_many([
+        {'follower_id': follower_id, 'following_id': following_id, 'created_at': now}
+        for follower_id, following_id in pairs
+    ])
+    report_docs = [
+        {'review_id': random.choice(review_ids), 'reporter_id': random.choice(user_ids),
+         'status': random.choice(['pending', 'resolved']), 'created_at': now - timedelta(minutes=i)}
+        for i in range(reports)
+    ]
+    db.reports.insert_many(report_docs)
+    # Ringkasan antrian moderasi (lihat moderation.py)
+    db.reviews.update_many({'_id': {'$in': [r['review_id'] for r in report_docs if r['status'] == 'pending']}},
+                           {'$set': {'pending_reports': 1, 'first_reported_at': now}})
+    db.articles.insert_many([
+        {'title': f'Article {i}', 'author_id': random.choice(user_ids), 'created_at': now - timedelta(days=i)}
+        for i in range(articles)
+    ])
+
+
+def _plan_stages(plan):
+    """Every stage name in a (nested) explain plan."""
+    stages = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if 'stage' in node:
+                stages.append(node['stage'])
+            for key in ('inputStage', 'queryPlan', 'winningPlan'):
+                if key in node:
+                    stack.append(node[key])
+            stack.extend(node.get('inputStages', []))
+        elif isinstance(node, list):
+            stack.extend(node)
+    return stages
+
+
+def _winning_plan(explain):
+    planner = explain.get('queryPlanner') or {}
+    if not planner and explain.get('stages'):
+        # Explain agregasi: ambil queryPlanner dari stage $cursor
+        cursor = explain['stages'][0].get('$cursor', {})
+        planner = cursor.get('queryPlanner', {})
+    return planner.get('winningPlan', {})
+
+
+def explain_shape(db, collection, kind, spec):
+    if kind == 'count':
+        return db.command('explain', {'count': collection, 'query': spec['filter']},
+                          verbosity='queryPlanner')
+    if kind == 'aggregate':
+        return db.command('aggregate', collection, pipeline=spec['pipeline'], explain=True)
+    cursor = db[collection].find(spec['filter'])
+    if spec.get('sort'):
+        cursor = cursor.sort(spec['sort'])
+    if spec.get('limit'):
+        cursor = cursor.limit(spec['limit'])
+    return cursor.explain()
+
+
+def audit(db, shapes=QUERY_SHAPES):
+    """Explain each shape; return a list of ``(route, collection, spec, bad_stages)`` problems."""
+    problems = []
+    for route, collection, kind, spec in shapes:
+        stages = _plan_stages(_winning_plan(explain_shape(db, collection, kind, spec)))
+        # Job yang memang membaca seluruh koleksi hanya dicek untuk sort di memori
+        bad_stages = ('SORT',) if spec.get('scan') else ('COLLSCAN', 'SORT')
+        bad = sorted({stage for stage in stages if stage in bad_stages})
+        if bad:
+            problems.append((route, collection, spec, bad))
+    return problems
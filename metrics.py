@@ -0,0 +1,266 @@
+"""In-process metrics with a Prometheus text exposition.
+
+Recording is lock-free: every thread writes into its own shard (a plain dict
+only that thread mutates) and ``render`` merges copies of all shards at
+scrape time. The only lock is taken once per thread, when its shard is
+created. Shards of threads that have exited are folded into one retired
+shard then (and at scrape time), so thread-per-request servers don't grow
+the shard list without bound. Values are per process, as with any prefork
+server; each worker exposes its own ``/metrics``.
+
+``Metrics.init_app`` adds request latency/status/in-flight metrics and splits
+template render time from handler time. ``MongoMetrics`` is a pymongo
+``CommandListener`` for command timings, and ``TimedTemplate`` is installed as
+the Jinja template class so the top-level ``render`` of each page is timed.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from jinja2 import Template
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    def __init__(self):
+        self._defs = {}
+        self._collectors = []
+        # thread -> shard; shard thread yang sudah selesai digabung ke _retired
+        self._shards = {}
+        self._retired = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # Definisi metric
+    def _define(self, name, kind, help_text, labelnames, buckets=None):
+        self._defs[name] = (kind, help_text, tuple(labelnames), buckets)
+
+    def counter(self, name, help_text, labelnames=()):
+        self._define(name, 'counter', help_text, labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        self._define(name, 'gauge', help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self._define(name, 'histogram', help_text, labelnames, tuple(buckets))
+
+    def collector(self, func):
+        """Register ``func() -> [(name, kind, help, [(labels_dict, value)])]``, called at scrape."""
+        self._collectors.append(func)
+        return func
+
+    # Pencatatan (tanpa lock)
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            with self._lock:
+                self._retire_dead()
+                self._shards[threading.current_thread()] = shard
+            self._local.shard = shard
+        return shard
+
+    def _retire_dead(self):
+        # Dipanggil dengan _lock; shard thread mati tidak ditulis lagi, jadi aman digabung
+        for thread in [t for t in self._shards if not t.is_alive()]:
+            _merge_into(self._retired, self._shards.pop(thread))
+
+    def _key(self, name, labels):
+        return name, tuple(labels.get(label, '') for label in self._defs[name][2])
+
+    def inc(self, name, amount=1, **labels):
+        shard = self._shard()
+        key = self._key(name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def dec(self, name, amount=1, **labels):
+        self.inc(name, -amount, **labels)
+
+    def observe(self, name, value, **labels):
+        shard = self._shard()
+        key = self._key(name, labels)
+        buckets = self._defs[name][3]
+        cells = shard.get(key)
+        if cells is None:
+            # [hitungan per bucket..., +Inf, sum, count]
+            cells = shard[key] = [0] * (len(buckets) + 3)
+        cells[bisect_left(buckets, value)] += 1
+        cells[-2] += value
+        cells[-1] += 1
+
+    # Exposition
+    def _merged(self):
+        merged = {}
+        with self._lock:
+            self._retire_dead()
+            shards = list(self._shards.values())
+            _merge_into(merged, self._retired)
+        for shard in shards:
+            # dict.copy() atomik di CPython, aman walau thread pemilik sedang menulis
+            _merge_into(merged, shard.copy())
+        return merged
+
+    def render(self):
+        merged = self._merged()
+        by_name = {}
+        for (name, values), value in merged.items():
+            by_name.setdefault(name, []).append((values, value))
+
+        lines = []
+        for name in sorted(self._defs):
+            kind, help_text, labelnames, buckets = self._defs[name]
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for values, value in sorted(by_name.get(name, [])):
+                if kind != 'histogram':
+                    lines.append(f'{name}{_labels(labelnames, values)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), value):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(labelnames, values, ("le", _number(bound)))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labelnames, values)} {_number(float(value[-2]))}')
+                lines.append(f'{name}_count{_labels(labelnames, values)} {value[-1]}')
+
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_labels(list(labels), list(labels.values()))} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+    # Flask
+    def init_app(self, app):
+        self.counter('http_requests_total', 'Requests by endpoint, method and status.',
+                     ('endpoint', 'method', 'status'))
+        self.gauge('http_requests_in_flight', 'Requests currently being handled.', ('endpoint',))
+        self.histogram('http_request_duration_seconds', 'Request latency.', ('endpoint', 'method'))
+        self.histogram('http_handler_duration_seconds', 'Request latency minus template rendering.',
+                       ('endpoint',))
+        self.histogram('template_render_duration_seconds', 'Top-level template render time.', ('template',))
+        self.counter('app_handled_errors_total', 'Exceptions caught and turned into a flash/redirect.',
+                     ('endpoint',))
+
+        app.jinja_env.template_class = timed_template_class(self)
+        app.before_request(self._begin)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+
+    @staticmethod
+    def _endpoint():
+        # Endpoint, bukan path, supaya jumlah label tetap terbatas
+        return request.endpoint or 'unmatched'
+
+    def _begin(self):
+        g._metrics_started = time.perf_counter()
+        g._metrics_template_seconds = 0.0
+        g._metrics_endpoint = self._endpoint()
+        self.inc('http_requests_in_flight', endpoint=g._metrics_endpoint)
+
+    def _finish(self, response):
+        started = g.get('_metrics_started')
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = g._metrics_endpoint
+        self.inc('http_requests_total', endpoint=endpoint, method=request.method,
+                 status=str(response.status_code))
+        self.observe('http_request_duration_seconds', elapsed, endpoint=endpoint, method=request.method)
+        self.observe('http_handler_duration_seconds', max(elapsed - g._metrics_template_seconds, 0),
+                     endpoint=endpoint)
+        return response
+
+    def _teardown(self, exc=None):
+        endpoint = g.pop('_metrics_endpoint', None)
+        if endpoint is not None:
+            self.dec('http_requests_in_flight', endpoint=endpoint)
+
+    def template_rendered(self, name, seconds):
+        self.observe('template_render_duration_seconds', seconds, template=name or 'string')
+        if has_request_context() and '_metrics_template_seconds' in g:
+            g._metrics_template_seconds += seconds
+
+    def handled_error(self):
+        self.inc('app_handled_errors_total', endpoint=self._endpoint() if has_request_context() else '')
+
+
+def _merge_into(target, shard):
+    for key, value in shard.items():
+        if isinstance(value, list):
+            total = target.setdefault(key, [0] * len(value))
+            for i, cell in enumerate(list(value)):
+                total[i] += cell
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+def timed_template_class(metrics):
+    class TimedTemplate(Template):
+        def render(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return super().render(*args, **kwargs)
+            finally:
+                metrics.template_rendered(self.name, time.perf_counter() - started)
+
+    return TimedTemplate
+
+
+class MongoMetrics(monitoring.CommandListener):
+    """Command latency and failures by command name and collection."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._local = threading.local()
+        metrics.histogram('mongo_command_duration_seconds', 'MongoDB command latency.',
+                          ('command', 'collection'))
+        metrics.counter('mongo_command_failures_total', 'MongoDB commands that failed.',
+                        ('command', 'collection'))
+
+    def _pending(self):
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            pending = self._local.pending = {}
+        return pending
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = event.command.get('collection', '')
+        self._pending()[event.request_id] = collection
+
+    def _done(self, event):
+        collection = self._pending().pop(event.request_id, '')
+        self.metrics.observe('mongo_command_duration_seconds', event.duration_micros / 1e6,
+                             command=event.command_name, collection=collection)
+        return collection
+
+    def succeeded(self, event):
+        self._done(event)
+
+    def failed(self, event):
+        collection = self._done(event)
+        self.metrics.inc('mongo_command_failures_total', command=event.command_name, collection=collection)
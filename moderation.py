@@ -0,0 +1,186 @@
+"""Review moderation queue.
+
+Every review with pending reports carries a small denormalised summary,
+``pending_reports`` and ``first_reported_at``, kept up to date by ``report``
+and ``act``. The queue pages over those reviews, oldest report first, with a
+keyset on ``(first_reported_at, _id)`` backed by a partial index, so a page
+costs the same however many reports are pending. Reasons, reporters and the
+latest report are grouped only for the reviews on the page, and the film and
+author are joined with projected ``$lookup`` stages. ``reconcile`` rebuilds
+the summaries from the reports.
+
+Actions work on reviews rather than single reports: ``act`` applies
+``mark_spoiler`` / ``delete`` / ``resolve`` to a batch of reviews, resolves
+the reports that were pending when it started with one ``update_many`` and
+then rebuilds the summaries of those reviews from whatever is still pending.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import UpdateMany, UpdateOne
+
+from enrichment import lookup_stages
+from pagination import keyset_aggregate
+from ratings import apply_ratings
+from reactions import delete_reactions
+
+ACTIONS = ('mark_spoiler', 'delete', 'resolve')
+QUEUE_SORT = [('first_reported_at', 1), ('_id', 1)]
+# Hanya review dengan report pending yang masuk partial index antrian
+IN_QUEUE = {'pending_reports': {'$gt': 0}}
+CLEAR_SUMMARY = {'$unset': {'pending_reports': '', 'first_reported_at': ''}}
+# Klaim hapus yang lebih tua dari ini (proses yang crash) boleh diambil alih
+CLAIM_TTL = timedelta(minutes=5)
+
+
+class ModerationQueue:
+    def __init__(self, reports, reviews, films, users, reactions, stats, reporter_preview=3):
+        self.reports = reports
+        self.reviews = reviews
+        self.films = films
+        self.users = users
+        self.reactions = reactions
+        self.stats = stats
+        self.reporter_preview = reporter_preview
+
+    def report(self, review_id, reporter_id, reason):
+        """Record a pending report and add it to the review's queue summary."""
+        now = datetime.now()
+        self.reports.insert_one({
+            'review_id': review_id,
+            'reporter_id': reporter_id,
+            'reason': reason,
+            'status': 'pending',
+            'created_at': now
+        })
+        self.reviews.update_one({'_id': review_id},
+                                {'$inc': {'pending_reports': 1}, '$min': {'first_reported_at': now}})
+        self.stats.adjust_pending(1)
+
+    def page(self, limit=25, after=None):
+        """One page of reported reviews. Returns ``(items, next_cursor)``.
+
+        Raises ``ValueError`` on a bad cursor.
+        """
+        tail = [
+            # Detail report hanya dihitung untuk review di halaman ini
+            {'$lookup': {
+                'from': self.reports.name,
+                'let': {'review_id': '$_id'},
+                'pipeline': [
+                    {'$match': {'$expr': {'$and': [{'$eq': ['$review_id', '$$review_id']},
+                                                   {'$eq': ['$status', 'pending']}]}}},
+                    {'$group': {
+                        '_id': None,
+                        'report_count': {'$sum': 1},
+                        'reasons': {'$addToSet': '$reason'},
+                        'reporter_ids': {'$push': '$reporter_id'},
+                        'last_reported_at': {'$max': '$created_at'},
+                    }},
+                ],
+                'as': 'summary',
+            }},
+            {'$unwind': {'path': '$summary', 'preserveNullAndEmptyArrays': True}},
+            {'$project': {
+                'first_reported_at': 1,
+                'last_reported_at': {'$ifNull': ['$summary.last_reported_at', '$first_reported_at']},
+                'report_count': {'$ifNull': ['$summary.report_count', 0]},
+                'reasons': {'$ifNull': ['$summary.reasons', []]},
+                'reporter_ids': {'$slice': [{'$ifNull': ['$summary.reporter_ids', []]}, self.reporter_preview]},
+                'review': {'_id': '$_id', 'text': '$text', 'film_id': '$film_id', 'user_id': '$user_id',
+                           'is_spoiler': '$is_spoiler'},
+            }},
+            *lookup_stages(self.films.name, 'review.film_id', 'film', {'title': 1}),
+            *lookup_stages(self.users.name, 'review.user_id', 'author', {'username': 1}),
+            {'$lookup': {
+                'from': self.users.name,
+                'let': {'ids': '$reporter_ids'},
+                'pipeline': [
+                    {'$match': {'$expr': {'$in': ['$_id', '$$ids']}}},
+                    {'$project': {'username': 1}},
+                ],
+                'as': 'reporters',
+            }},
+        ]
+        return keyset_aggregate(self.reviews, [{'$match': IN_QUEUE}], QUEUE_SORT, limit, after=after, tail=tail)
+
+    def reconcile(self):
+        """Rebuild every review's queue summary from the pending reports. Returns the queue length."""
+        summaries = list(self.reports.aggregate([
+            {'$match': {'status': 'pending'}},
+            {'$group': {'_id': '$review_id', 'count': {'$sum': 1}, 'first': {'$min': '$created_at'}}},
+        ], allowDiskUse=True))
+        ops = [UpdateMany({'pending_reports': {'$exists': True}}, CLEAR_SUMMARY)]
+        ops += [UpdateOne({'_id': row['_id']},
+                          {'$set': {'pending_reports': row['count'], 'first_reported_at': row['first']}})
+                for row in summaries]
+        self.reviews.bulk_write(ops, ordered=True)
+        return len(summaries)
+
+    def _delete_reviews(self, review_ids):
+        # Tandai dulu agar admin lain yang menghapus bersamaan tidak mengurangi rating dua kali.
+        # deleting_at kosong atau lebih tua dari CLAIM_TTL: belum diklaim atau klaimnya basi
+        claim = uuid.uuid4().hex
+        now = datetime.now()
+        self.reviews.update_many({'_id': {'$in': review_ids}, 'deleting_at': {'$not': {'$gte': now - CLAIM_TTL}}},
+                                 {'$set': {'deleting': claim, 'deleting_at': now}})
+        claimed = list(self.reviews.find({'_id': {'$in': review_ids}, 'deleting': claim},
+                                         {'film_id': 1, 'rating': 1}))
+        if not claimed:
+            return []
+        self.reviews.delete_many({'_id': {'$in': [r['_id'] for r in claimed]}, 'deleting': claim})
+        apply_ratings(self.films, self.reviews, [(r['film_id'], r['rating']) for r in claimed], sign=-1)
+        delete_reactions(self.reactions, [r['_id'] for r in claimed])
+        return [r['_id'] for r in claimed]
+
+    def _resummarize(self, review_ids, extra_set=None):
+        # Report yang masuk setelah cutoff act() masih pending: ringkasannya dihitung ulang
+        remaining = {row['_id']: row for row in self.reports.aggregate([
+            {'$match': {'review_id': {'$in': review_ids}, 'status': 'pending'}},
+            {'$group': {'_id': '$review_id', 'count': {'$sum': 1}, 'first': {'$min': '$created_at'}}},
+        ])}
+        ops = []
+        for review_id in review_ids:
+            row = remaining.get(review_id)
+            if row is None:
+                update = dict(CLEAR_SUMMARY)
+                if extra_set:
+                    update['$set'] = extra_set
+            else:
+                update = {'$set': {**(extra_set or {}),
+                                   'pending_reports': row['count'], 'first_reported_at': row['first']}}
+            ops.append(UpdateOne({'_id': review_id}, update))
+        self.reviews.bulk_write(ops, ordered=False)
+
+    def act(self, action, review_ids):
+        """Apply ``action`` to ``review_ids`` and resolve their pending reports.
+
+        Returns the number of reports resolved. Raises ``ValueError`` for an
+        unknown action.
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action: {action}")
+        review_ids = list(dict.fromkeys(review_ids))
+        if not review_ids:
+            return 0
+
+        # Hanya report yang sudah ada saat admin bertindak yang di-resolve;
+        # report yang masuk sesudahnya tetap di antrian
+        cutoff = datetime.now()
+        query = {'status': 'pending', 'created_at': {'$lte': cutoff}}
+        if action == 'delete':
+            # Review yang gagal diklaim (sedang dihapus admin lain) tidak disentuh
+            review_ids = self._delete_reviews(review_ids)
+            if not review_ids:
+                return 0
+            # Review sudah tidak ada, jadi semua report-nya selesai
+            del query['created_at']
+
+        resolved = self.reports.update_many(
+            {**query, 'review_id': {'$in': review_ids}},
+            {'$set': {'status': 'resolved', 'resolution': action, 'resolved_at': cutoff}}
+        )
+        if action != 'delete':
+            self._resummarize(review_ids, {'is_spoiler': True} if action == 'mark_spoiler' else None)
+        self.stats.adjust_pending(-resolved.modified_count)
+        return resolved.modified_count
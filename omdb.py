@@ -0,0 +1,131 @@
+"""OMDb access with a two-level cache in front of the API.
+
+Lookups go memory (bounded LRU) -> Mongo (``omdb_cache`` collection with a TTL
+index declared in indexes.py, optional) -> OMDb through ``OmdbClient``. "Not found" answers are cached
+too, for a shorter time, so repeated misses don't spend the API key's daily
+quota.
+"""
+import re
+import threading
+from datetime import datetime, timedelta
+
+from cache import TTLCache
+
+# Error OMDb yang bersifat sementara: jangan di-cache sebagai "not found"
+TRANSIENT_ERRORS = ('request limit', 'api key', 'no api key')
+
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive cache key for a search string."""
+    return re.sub(r'\s+', ' ', (query or '').strip()).lower()
+
+
+def is_negative(payload):
+    return payload.get('Response') != 'True'
+
+
+def is_cacheable(payload):
+    if not is_negative(payload):
+        return True
+    error = (payload.get('Error') or '').lower()
+    return not any(marker in error for marker in TRANSIENT_ERRORS)
+
+
+class OmdbCache:
+    def __init__(self, maxsize=2048, ttl=6 * 3600, negative_ttl=600, collection=None):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.collection = collection
+        self.store_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        payload = self.memory.get(key)
+        if payload is not None:
+            return payload
+
+        if self.collection is not None:
+            doc = self.collection.find_one({'_id': key, 'expires_at': {'$gt': datetime.utcnow()}})
+            if doc:
+                remaining = (doc['expires_at'] - datetime.utcnow()).total_seconds()
+                self.memory.set(key, doc['payload'], ttl=remaining)
+                with self._lock:
+                    self.store_hits += 1
+                return doc['payload']
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, payload):
+        if not is_cacheable(payload):
+            return
+        ttl = self.negative_ttl if is_negative(payload) else self.ttl
+        self.memory.set(key, payload, ttl=ttl)
+        if self.collection is not None:
+            self.collection.replace_one(
+                {'_id': key},
+                {'payload': payload, 'expires_at': datetime.utcnow() + timedelta(seconds=ttl)},
+                upsert=True
+            )
+
+    def clear(self):
+        self.memory.clear()
+        if self.collection is not None:
+            self.collection.delete_many({})
+
+    def stats(self):
+        return {
+            'memory_hits': self.memory.hits,
+            'store_hits': self.store_hits,
+            'misses': self.misses,
+            'size': len(self.memory),
+            'maxsize': self.memory.maxsize,
+        }
+
+
+class OmdbService:
+    """Cached OMDb search and title lookups on top of an ``OmdbClient``."""
+
+    def __init__(self, client, cache=None):
+        self.client = client
+        self.cache = cache or OmdbCache()
+
+    def _cached(self, key, params):
+        payload = self.cache.get(key)
+        if payload is None:
+            payload = self.client.get(params)
+            self.cache.set(key, payload)
+        return payload
+
+    def search(self, query):
+        query = normalize_query(query)
+        return self._cached(f'search:{query}', {'s': query, 'type': 'movie'})
+
+    def title(self, imdb_id):
+        imdb_id = imdb_id.strip().lower()
+        return self._cached(f'title:{imdb_id}', {'i': imdb_id})
+
+    def titles(self, imdb_ids):
+        """Map ``imdb_id -> payload`` for many ids; cache misses are fetched concurrently.
+
+        Ids whose fetch failed are left out of the result.
+        """
+        found = {}
+        missing = []
+        for imdb_id in imdb_ids:
+            key = imdb_id.strip().lower()
+            payload = self.cache.get(f'title:{key}')
+            if payload is None:
+                missing.append((imdb_id, key))
+            else:
+                found[imdb_id] = payload
+
+        payloads = self.client.fetch_many([{'i': key} for _, key in missing])
+        for (imdb_id, key), payload in zip(missing, payloads):
+            if payload is not None:
+                self.cache.set(f'title:{key}', payload)
+                found[imdb_id] = payload
+        return found
@@ -0,0 +1,188 @@
+"""HTTP client for the OMDb API.
+
+One keep-alive ``requests.Session`` per process with a bounded connection
+pool, connect/read timeouts on every call, a few retries with jittered
+exponential backoff, and a circuit breaker that fails fast while OMDb keeps
+erroring so a slow upstream can't tie up every worker.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OMDB_URL = "http://www.omdbapi.com/"
+
+
+class OmdbError(Exception):
+    pass
+
+
+class OmdbUnavailable(OmdbError):
+    """OMDb is failing or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    While open every call is rejected until ``reset_timeout`` seconds have
+    passed; then a single trial call is let through (half-open). Its outcome
+    closes the breaker again or re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class OmdbClient:
+    def __init__(self, api_key, base_url=OMDB_URL, pool_size=10, connect_timeout=2.0,
+                 read_timeout=5.0, retries=2, backoff=0.2, breaker=None, max_workers=8,
+                 observer=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.max_workers = max_workers
+        # observer(outcome, seconds) dipanggil tiap percobaan, mis. untuk metrics
+        self.observer = observer
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _sleep_before_retry(self, attempt):
+        # Exponential backoff dengan full jitter
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def _observe(self, outcome, started=None):
+        if self.observer is not None:
+            self.observer(outcome, time.perf_counter() - started if started is not None else 0.0)
+
+    def get(self, params):
+        """GET ``params`` from OMDb and return the decoded JSON payload.
+
+        Raises ``OmdbUnavailable`` when the breaker is open or every attempt
+        failed with a request error, timeout or 5xx response. Every call the
+        breaker let through is recorded as a success or failure, so a
+        half-open trial can never be left running.
+        """
+        if not self.breaker.allow():
+            self._observe('circuit_open')
+            raise OmdbUnavailable("OMDb circuit is open")
+
+        try:
+            return self._attempts(params)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+
+    def _attempts(self, params):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._sleep_before_retry(attempt - 1)
+            started = time.perf_counter()
+            try:
+                response = self.session.get(self.base_url, params={**params, 'apikey': self.api_key},
+                                            timeout=self.timeout)
+            except requests.RequestException as e:
+                if isinstance(e, requests.Timeout):
+                    outcome = 'timeout'
+                elif isinstance(e, requests.ConnectionError):
+                    outcome = 'connection_error'
+                else:
+                    outcome = 'request_error'
+                self._observe(outcome, started)
+                last_error = e
+                continue
+            if response.status_code >= 500:
+                self._observe('server_error', started)
+                last_error = OmdbError(f"OMDb returned HTTP {response.status_code}")
+                continue
+
+            # 4xx (mis. API key salah) tetap berupa JSON OMDb, bukan gangguan layanan
+            try:
+                payload = response.json()
+            except ValueError as e:
+                self._observe('invalid_response', started)
+                last_error = OmdbError(f"Invalid OMDb response: {e}")
+                continue
+            self._observe('ok', started)
+            self.breaker.record_success()
+            return payload
+
+        raise OmdbUnavailable(f"OMDb request failed: {last_error}")
+
+    def _pool(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='omdb')
+            return self._executor
+
+    def fetch_many(self, params_list):
+        """Run ``get`` for every params dict concurrently.
+
+        Returns payloads in the same order; a request that failed yields
+        ``None`` instead of raising, so one bad id doesn't sink the batch.
+        """
+        def safe_get(params):
+            try:
+                return self.get(params)
+            except OmdbError:
+                return None
+
+        params_list = list(params_list)
+        if len(params_list) <= 1:
+            return [safe_get(p) for p in params_list]
+        return list(self._pool().map(safe_get, params_list))
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        self.session.close()
@@ -0,0 +1,114 @@
+"""Keyset (cursor) pagination over a compound sort.
+
+Pages are fetched with a range filter on the sort key of the last document of
+the previous page instead of ``skip``, so every page costs the same index scan
+no matter how deep the reader goes. The sort must end in a unique field
+(normally ``_id``) and be backed by a matching compound index.
+"""
+import base64
+import json
+from datetime import datetime
+
+from bson import json_util
+from bson.errors import BSONError
+from bson.objectid import ObjectId
+
+_JSON_OPTIONS = json_util.JSONOptions(json_mode=json_util.JSONMode.RELAXED, tz_aware=False)
+
+# Tipe nilai yang boleh ada di cursor; dict ({"$ne": ...}) dan list bisa menyisipkan operator
+CURSOR_TYPES = (str, int, float, bool, type(None), ObjectId, datetime)
+
+
+def encode_cursor(values):
+    raw = json_util.dumps(values, json_options=_JSON_OPTIONS)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of ``encode_cursor``. Raises ``ValueError`` on a malformed token."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode(),
+                                  json_options=_JSON_OPTIONS)
+    except (TypeError, ValueError, UnicodeDecodeError, json.JSONDecodeError, BSONError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    if not all(isinstance(value, CURSOR_TYPES) for value in values):
+        raise ValueError("Invalid cursor value")
+    return values
+
+
+def _cursor_values(token, sort):
+    values = decode_cursor(token)
+    if len(values) != len(sort):
+        raise ValueError("Cursor does not match sort")
+    return values
+
+
+def _after_filter(sort, values):
+    # (a, b) setelah (va, vb)  <=>  a > va  OR  (a == va AND b > vb), per arah sort
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        prefix = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        value = values[i]
+        if value is None:
+            # null paling kecil: pada sort desc tidak ada yang lebih kecil lagi
+            if direction == 1:
+                clauses.append({**prefix, field: {'$ne': None}})
+            continue
+        op = '$gt' if direction == 1 else '$lt'
+        clauses.append({**prefix, field: {op: value}})
+        if direction == -1:
+            # nilai null/missing diurutkan paling akhir pada sort desc
+            clauses.append({**prefix, field: None})
+    return {'$or': clauses} if clauses else {}
+
+
+def keyset_page(collection, sort, limit, after=None, query=None, projection=None):
+    """Fetch one page of ``collection``.
+
+    ``sort`` is a list of ``(field, direction)`` pairs, ``after`` the token
+    returned for the previous page. Returns ``(docs, next_token)`` where
+    ``next_token`` is ``None`` on the last page.
+    """
+    query = dict(query or {})
+    if after:
+        after_filter = _after_filter(sort, _cursor_values(after, sort))
+        if after_filter:
+            query = {'$and': [query, after_filter]} if query else after_filter
+
+    if projection is not None:
+        projection = {**projection, **{field: 1 for field, _ in sort}}
+
+    docs = list(collection.find(query, projection).sort(sort).limit(limit + 1))
+    next_token = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_token = encode_cursor([last.get(field) for field, _ in sort])
+    return docs, next_token
+
+
+def keyset_aggregate(collection, pipeline, sort, limit, after=None, tail=None):
+    """``keyset_page`` for the output of an aggregation ``pipeline``.
+
+    The keyset filter, sort and limit are appended after ``pipeline``; the
+    ``tail`` stages (e.g. ``$lookup``) then only run for the documents on the
+    page. Returns ``(docs, next_token)``.
+    """
+    stages = list(pipeline)
+    if after:
+        after_filter = _after_filter(sort, _cursor_values(after, sort))
+        if after_filter:
+            stages.append({'$match': after_filter})
+    stages += [{'$sort': dict(sort)}, {'$limit': limit + 1}]
+    stages += list(tail or [])
+
+    docs = list(collection.aggregate(stages, allowDiskUse=True))
+    next_token = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_token = encode_cursor([last.get(field) for field, _ in sort])
+    return docs, next_token
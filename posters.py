@@ -0,0 +1,138 @@
+"""Local mirror of OMDb posters.
+
+``import_omdb_film`` stores OMDb's remote ``Poster`` URL. ``PosterMirror``
+downloads each poster once, on the image worker pool, keeps the original under
+its content hash and renders ``poster`` variants next to it. The film then
+gets ``poster_local`` and ``poster_variants``, and templates render the local
+copy through ``poster_src``; until then the remote URL (or the bundled
+placeholder) is used.
+
+The fetcher is any callable ``url -> bytes`` so tests can pass a stub instead
+of hitting the network. Failures are recorded as ``poster_mirror_failed_at``
+and retried by ``backfill`` after ``retry_after`` seconds.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import requests
+
+from images import sniff_extension
+
+logger = logging.getLogger(__name__)
+
+MAX_POSTER_BYTES = 5 * 1024 * 1024
+
+class PosterError(Exception):
+    pass
+
+
+def is_remote(url):
+    return bool(url) and url.startswith(('http://', 'https://'))
+
+
+class HttpFetcher:
+    """Downloads a poster with timeouts and a size limit."""
+
+    def __init__(self, connect_timeout=2.0, read_timeout=10.0, max_bytes=MAX_POSTER_BYTES):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+
+    def __call__(self, url):
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                if response.status_code != 200:
+                    raise PosterError(f"HTTP {response.status_code}")
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise PosterError("Poster too large")
+                    chunks.append(chunk)
+                return b''.join(chunks)
+        except requests.RequestException as e:
+            raise PosterError(str(e)) from e
+
+    def close(self):
+        self.session.close()
+
+
+class PosterMirror:
+    def __init__(self, films, pipeline, fetcher=None, retry_after=24 * 3600):
+        self.films = films
+        self.pipeline = pipeline
+        self.fetcher = fetcher or HttpFetcher()
+        self.retry_after = retry_after
+        self._inflight = set()
+        self._lock = threading.Lock()
+
+    def mirror(self, film_id, url):
+        """Download and store one poster (blocking). Returns the fields written, or ``None``."""
+        try:
+            data = self.fetcher(url)
+            ext = sniff_extension(data)
+            if ext is None:
+                raise PosterError("Not an image")
+            filename, digest = self.pipeline.save(data, ext)
+            variants = {}
+            if self.pipeline.enabled:
+                variants = (self.pipeline.existing_variants(digest, 'poster')
+                            or self.pipeline.render(filename, digest, 'poster'))
+        except Exception as e:
+            logger.warning("Could not mirror poster of %s (%s): %s", film_id, url, e)
+            self.films.update_one({'_id': film_id, 'poster_url': url},
+                                  {'$set': {'poster_mirror_failed_at': datetime.now()}})
+            return None
+
+        # Hanya kalau poster_url belum diganti sementara itu
+        fields = {'poster_local': filename, 'poster_variants': variants}
+        self.films.update_one({'_id': film_id, 'poster_url': url},
+                              {'$set': fields, '$unset': {'poster_mirror_failed_at': ''}})
+        return fields
+
+    def _run(self, film_id, url):
+        try:
+            self.mirror(film_id, url)
+        finally:
+            with self._lock:
+                self._inflight.discard(film_id)
+
+    def enqueue(self, film):
+        """Mirror ``film``'s poster in the background. Returns False if there's nothing to do."""
+        url = film.get('poster_url')
+        if not is_remote(url) or film.get('poster_local'):
+            return False
+        with self._lock:
+            if film['_id'] in self._inflight:
+                return False
+            self._inflight.add(film['_id'])
+        if not self.pipeline.submit(self._run, film['_id'], url):
+            with self._lock:
+                self._inflight.discard(film['_id'])
+            logger.warning("Image queue full, poster of %s not mirrored yet", film['_id'])
+            return False
+        return True
+
+    def pending_query(self):
+        retry_before = datetime.now() - timedelta(seconds=self.retry_after)
+        return {
+            'poster_url': {'$regex': '^https?://'},
+            'poster_local': {'$exists': False},
+            '$or': [{'poster_mirror_failed_at': {'$exists': False}},
+                    {'poster_mirror_failed_at': {'$lt': retry_before}}],
+        }
+
+    def backfill(self, limit=None):
+        """Mirror every film still pointing at a remote poster. Returns ``(mirrored, failed)``."""
+        cursor = self.films.find(self.pending_query(), {'poster_url': 1})
+        if limit:
+            cursor = cursor.limit(limit)
+        mirrored = failed = 0
+        for film in cursor:
+            if self.mirror(film['_id'], film['poster_url']) is None:
+                failed += 1
+            else:
+                mirrored += 1
+        return mirrored, failed
@@ -0,0 +1,162 @@
+"""Per-request MongoDB command profiling.
+
+``QueryProfiler`` is a pymongo ``CommandListener``. pymongo calls it on the
+thread that runs the command, so commands issued while a Flask request is
+active are attributed to that request through a thread-local; commands from
+background jobs are ignored. Fan-out threads working for a request join its
+profile with ``attached``, so ``db`` time is the sum over all of the
+request's commands and may exceed the wall-clock time of a fanned-out page.
+Each request gets a ``Server-Timing`` header with its query count and
+database time, queries slower than ``SLOW_QUERY_MS`` are logged with the
+route name, and the last few request profiles (with the shape of every query,
+values stripped) are kept for the debug endpoint.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from flask import request
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Bagian command yang menentukan "bentuk" query; nilainya diganti '?'
+SHAPE_FIELDS = ('filter', 'query', 'pipeline', 'sort', 'projection', 'updates', 'deletes', 'key')
+
+
+def value_shape(value):
+    if isinstance(value, dict):
+        return {k: value_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            item = value_shape(item)
+            if item != '?' and item not in shapes:
+                shapes.append(item)
+        return shapes or '?'
+    return '?'
+
+
+def command_shape(name, command):
+    parts = {field: value_shape(command[field]) for field in SHAPE_FIELDS if field in command}
+    return f"{name} {json.dumps(parts, sort_keys=True, default=str)}" if parts else name
+
+
+class RequestProfile:
+    __slots__ = ('endpoint', 'method', 'path', 'started', 'pending', 'queries', 'db_ms', 'lock')
+
+    def __init__(self, endpoint, method, path):
+        self.endpoint = endpoint
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.pending = {}
+        self.queries = []
+        self.db_ms = 0.0
+        # Bisa diisi dari beberapa thread sekaligus (fan-out)
+        self.lock = threading.Lock()
+
+    def summary(self, status, total_ms):
+        repeated = Counter(q['shape'] for q in self.queries)
+        return {
+            'method': self.method,
+            'path': self.path,
+            'endpoint': self.endpoint,
+            'status': status,
+            'total_ms': round(total_ms, 2),
+            'db_ms': round(self.db_ms, 2),
+            'count': len(self.queries),
+            'queries': self.queries,
+            # Bentuk query yang sama berulang-ulang biasanya tanda N+1
+            'repeated': [{'shape': shape, 'count': count}
+                         for shape, count in repeated.most_common() if count > 1],
+        }
+
+
+class QueryProfiler(monitoring.CommandListener):
+    def __init__(self, slow_ms=100, history=0):
+        self.slow_ms = slow_ms
+        self.history = deque(maxlen=history) if history else None
+        self._local = threading.local()
+
+    def init_app(self, app):
+        self.slow_ms = app.config["SLOW_QUERY_MS"]
+        history = app.config["QUERY_PROFILE_HISTORY"]
+        self.history = deque(maxlen=history) if history else None
+        app.before_request(self._begin)
+        app.after_request(self._finish)
+        app.teardown_request(self._clear)
+
+    @property
+    def current(self):
+        return getattr(self._local, 'profile', None)
+
+    # Flask hooks
+    def _begin(self):
+        self._local.profile = RequestProfile(request.endpoint, request.method, request.path)
+
+    def _finish(self, response):
+        profile = self.current
+        if profile is None:
+            return response
+        total_ms = (time.perf_counter() - profile.started) * 1000
+        response.headers.add('Server-Timing',
+                             f'db;dur={profile.db_ms:.1f};desc="{len(profile.queries)} queries"')
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+        if self.history is not None and profile.endpoint != 'static':
+            self.history.append(profile.summary(response.status_code, total_ms))
+        return response
+
+    def _clear(self, exc=None):
+        self._local.profile = None
+
+    @contextmanager
+    def attached(self, profile):
+        """Attribute commands run on this thread to ``profile`` (a request's fan-out worker)."""
+        previous = self.current
+        self._local.profile = profile
+        try:
+            yield profile
+        finally:
+            self._local.profile = previous
+
+    def recent(self):
+        return list(self.history or [])
+
+    # pymongo listener
+    def started(self, event):
+        profile = self.current
+        if profile is None:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = event.command.get('collection')
+        with profile.lock:
+            profile.pending[event.request_id] = (collection, event.command)
+
+    def _done(self, event, ok):
+        profile = self.current
+        if profile is None:
+            return
+        with profile.lock:
+            collection, command = profile.pending.pop(event.request_id, (None, {}))
+        ms = event.duration_micros / 1000
+        slow = ms >= self.slow_ms
+        shape = None
+        if slow or self.history is not None:
+            shape = command_shape(event.command_name, command)
+        with profile.lock:
+            profile.db_ms += ms
+            profile.queries.append({'collection': collection, 'command': event.command_name,
+                                    'shape': shape, 'ms': round(ms, 2), 'ok': ok})
+        if slow:
+            logger.warning("Slow query (%.1f ms) in %s: %s on %s", ms, profile.endpoint, shape, collection)
+
+    def succeeded(self, event):
+        self._done(event, True)
+
+    def failed(self, event):
+        self._done(event, False)
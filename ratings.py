@@ -0,0 +1,166 @@
+"""Incrementally maintained rating aggregates on film documents.
+
+Each film keeps ``rating_sum``, ``rating_count`` and ``rating_histogram`` (one
+counter per half point from 1.0 to 10.0, keyed by ``rating * 2`` because field
+names can't contain dots). They are updated with ``$inc`` when a review is
+added or removed, so submitting a review costs O(1) instead of re-averaging
+every review of the film. ``average_rating`` is derived from the counters.
+Films created before the counters existed have no ``rating_count``; the first
+rating change on such a film rebuilds its counters from its reviews, and
+``reconcile_ratings`` does the same for every film at once.
+"""
+from pymongo import ReturnDocument, UpdateOne
+
+RATING_VALUES = [i / 2 for i in range(2, 21)]
+
+
+def bucket_key(rating):
+    return str(int(round(rating * 2)))
+
+
+def _average(rating_sum, rating_count):
+    return rating_sum / rating_count if rating_count > 0 else 0
+
+
+def _set_average(film):
+    """Guarded ``$set`` of ``average_rating`` for the counters just read back."""
+    # Hanya tulis rata-rata jika counter belum diubah lagi sesudah $inc kita;
+    # kalau sudah, penulis berikutnya yang akan men-set nilai terbarunya.
+    # Dicek sum dan count: tambah lalu hapus mengembalikan count yang sama.
+    return UpdateOne(
+        {'_id': film['_id'], 'rating_sum': film['rating_sum'], 'rating_count': film['rating_count']},
+        {'$set': {'average_rating': _average(film['rating_sum'], film['rating_count'])}}
+    )
+
+
+def _film_aggregates(reviews, film_ids):
+    """``{film_id: {rating_sum, rating_count, rating_histogram}}`` computed from reviews."""
+    aggregates = {}
+    pipeline = [
+        {'$match': {'film_id': {'$in': list(film_ids)}}},
+        {'$group': {'_id': {'film_id': '$film_id', 'rating': '$rating'}, 'count': {'$sum': 1}}},
+    ]
+    for row in reviews.aggregate(pipeline):
+        _add_bucket(aggregates, row['_id']['film_id'], row['_id']['rating'], row['count'])
+    return aggregates
+
+
+def _add_bucket(aggregates, film_id, rating, count):
+    agg = aggregates.setdefault(film_id, {'rating_sum': 0, 'rating_count': 0, 'rating_histogram': {}})
+    agg['rating_sum'] += rating * count
+    agg['rating_count'] += count
+    key = bucket_key(rating)
+    agg['rating_histogram'][key] = agg['rating_histogram'].get(key, 0) + count
+
+
+def _rebuild(films, reviews, film_ids):
+    """Set counters from ``reviews`` for films that don't have them yet. Returns ``{film_id: average}``."""
+    aggregates = _film_aggregates(reviews, film_ids)
+    empty = {'rating_sum': 0, 'rating_count': 0, 'rating_histogram': {}}
+    averages = {}
+    for film_id in film_ids:
+        agg = aggregates.get(film_id, empty)
+        averages[film_id] = _average(agg['rating_sum'], agg['rating_count'])
+        # Jika penulis lain sudah membangunnya lebih dulu, hasil mereka dipakai
+        films.update_one({'_id': film_id, 'rating_count': {'$exists': False}},
+                         {'$set': {**agg, 'average_rating': averages[film_id]}})
+    return averages
+
+
+def apply_rating(films, reviews, film_id, rating, sign=1):
+    """Add (``sign=1``) or remove (``sign=-1``) one rating from a film's aggregates.
+
+    Call it after the review was written or deleted: a film without counters
+    is rebuilt from ``reviews``, which then already reflect the change.
+    """
+    film = films.find_one_and_update(
+        {'_id': film_id, 'rating_count': {'$exists': True}},
+        {'$inc': {
+            'rating_sum': sign * rating,
+            'rating_count': sign,
+            f'rating_histogram.{bucket_key(rating)}': sign,
+        }},
+        projection={'rating_sum': 1, 'rating_count': 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not film:
+        if films.count_documents({'_id': film_id}, limit=1):
+            return _rebuild(films, reviews, [film_id])[film_id]
+        return None
+
+    films.bulk_write([_set_average(film)])
+    return _average(film['rating_sum'], film['rating_count'])
+
+
+def apply_ratings(films, reviews, ratings, sign=1):
+    """``apply_rating`` for many ``(film_id, rating)`` pairs.
+
+    Ratings are summed per film first, so every film gets one ``$inc`` in a
+    single ``bulk_write``. The new counters are then read back in one query
+    and ``average_rating`` is written with the same guarded ``$set`` as
+    ``apply_rating``. Returns the number of films updated.
+    """
+    per_film = {}
+    for film_id, rating in ratings:
+        inc = per_film.setdefault(film_id, {'rating_sum': 0, 'rating_count': 0})
+        inc['rating_sum'] += sign * rating
+        inc['rating_count'] += sign
+        key = f'rating_histogram.{bucket_key(rating)}'
+        inc[key] = inc.get(key, 0) + sign
+    if not per_film:
+        return 0
+
+    films.bulk_write([UpdateOne({'_id': film_id, 'rating_count': {'$exists': True}}, {'$inc': inc})
+                      for film_id, inc in per_film.items()], ordered=False)
+    counted = list(films.find({'_id': {'$in': list(per_film)}}, {'rating_sum': 1, 'rating_count': 1}))
+    ops = [_set_average(film) for film in counted if 'rating_count' in film]
+    if ops:
+        films.bulk_write(ops, ordered=False)
+    legacy = [film['_id'] for film in counted if 'rating_count' not in film]
+    if legacy:
+        _rebuild(films, reviews, legacy)
+    return len(counted)
+
+
+def rating_distribution(film):
+    """``[(rating, count, percent)]`` for every half point, for display."""
+    histogram = film.get('rating_histogram') or {}
+    total = sum(histogram.values()) or 0
+    return [
+        (value, histogram.get(bucket_key(value), 0),
+         histogram.get(bucket_key(value), 0) * 100 / total if total else 0)
+        for value in RATING_VALUES
+    ]
+
+
+def reconcile_ratings(films, reviews, batch_size=500):
+    """Recompute every film's aggregates from its reviews.
+
+    Used to backfill existing data and to repair drift. Films without reviews
+    are reset to zero. Returns the number of films updated.
+    """
+    pipeline = [
+        {'$group': {
+            '_id': {'film_id': '$film_id', 'rating': '$rating'},
+            'count': {'$sum': 1},
+        }},
+    ]
+    aggregates = {}
+    for row in reviews.aggregate(pipeline, allowDiskUse=True):
+        _add_bucket(aggregates, row['_id']['film_id'], row['_id']['rating'], row['count'])
+
+    empty = {'rating_sum': 0, 'rating_count': 0, 'rating_histogram': {}}
+    ops = []
+    updated = 0
+    for film in films.find({}, {'_id': 1}):
+        agg = aggregates.get(film['_id'], empty)
+        ops.append(UpdateOne({'_id': film['_id']}, {'$set': {
+            **agg,
+            'average_rating': _average(agg['rating_sum'], agg['rating_count']),
+        }}))
+        if len(ops) >= batch_size:
+            updated += films.bulk_write(ops, ordered=False).matched_count
+            ops = []
+    if ops:
+        updated += films.bulk_write(ops, ordered=False).matched_count
+    return updated
@@ -0,0 +1,159 @@
+"""Like / dislike reactions on reviews.
+
+Who reacted is stored in a ``reactions`` collection, one document per
+``(review_id, user_id)`` with ``value`` 1 (like) or -1 (dislike), instead of
+``liked_by`` / ``disliked_by`` arrays on the review. The review only keeps the
+``likes`` / ``dislikes`` counters, so its size and the cost of a reaction stay
+the same however popular it gets.
+
+A reaction is one upsert on the unique key (which also returns the previous
+state) followed by one ``$inc`` of the counters; the counters are only moved
+by the delta between the old and the new state, so concurrent clicks can't
+push them out of line with ``reactions``.
+"""
+from datetime import datetime
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+LIKE = 1
+DISLIKE = -1
+
+COUNTER_FIELDS = {LIKE: 'likes', DISLIKE: 'dislikes'}
+ACTIONS = {LIKE: ('like', 'unlike'), DISLIKE: ('dislike', 'undislike')}
+
+
+def _counter_delta(previous, current):
+    inc = {}
+    if previous:
+        inc[COUNTER_FIELDS[previous]] = -1
+    if current:
+        inc[COUNTER_FIELDS[current]] = inc.get(COUNTER_FIELDS[current], 0) + 1
+    return inc
+
+
+def _swap(reactions, key, value):
+    """Set the user's reaction to ``value`` and return the previous one (0 if none)."""
+    try:
+        before = reactions.find_one_and_update(
+            key,
+            {'$set': {'value': value, 'updated_at': datetime.now()}},
+            projection={'value': 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        # Dua upsert bersamaan untuk pasangan yang sama; yang kalah cukup diulang sekali
+        before = reactions.find_one_and_update(
+            key,
+            {'$set': {'value': value, 'updated_at': datetime.now()}},
+            projection={'value': 1},
+            return_document=ReturnDocument.BEFORE
+        )
+    return before['value'] if before else 0
+
+
+def react(reviews, reactions, review_id, user_id, value):
+    """Toggle ``value`` (``LIKE`` / ``DISLIKE``) for ``user_id`` on a review.
+
+    Clicking the same reaction twice removes it; clicking the other one
+    switches. Returns ``(action, counters)`` where ``counters`` is the review's
+    ``{'likes', 'dislikes'}`` after the change, or ``None`` if the review does
+    not exist.
+    """
+    key = {'review_id': review_id, 'user_id': user_id}
+    previous = _swap(reactions, key, value)
+    current = value
+    if previous == value:
+        # Reaksi yang sama diklik lagi: batalkan
+        if reactions.delete_one({**key, 'value': value}).deleted_count:
+            current = 0
+        else:
+            # Sudah diubah request lain di antara dua operasi; tidak ada yang berubah di sini
+            previous = current = None
+
+    if current is None:
+        review = reviews.find_one({'_id': review_id}, {'likes': 1, 'dislikes': 1})
+    else:
+        review = reviews.find_one_and_update(
+            {'_id': review_id},
+            {'$inc': _counter_delta(previous, current)},
+            projection={'likes': 1, 'dislikes': 1},
+            return_document=ReturnDocument.AFTER
+        )
+
+    if not review:
+        reactions.delete_one(key)
+        return None, None
+
+    action = ACTIONS[value][0] if current == value else ACTIONS[value][1]
+    return action, {'likes': review.get('likes', 0), 'dislikes': review.get('dislikes', 0)}
+
+
+def viewer_reactions(reactions, user_id, review_ids):
+    """``{review_id: value}`` for the reviews ``user_id`` reacted to (one query)."""
+    if not user_id or not review_ids:
+        return {}
+    return {
+        r['review_id']: r['value']
+        for r in reactions.find({'user_id': user_id, 'review_id': {'$in': list(review_ids)}},
+                                {'review_id': 1, 'value': 1, '_id': 0})
+    }
+
+
+def delete_reactions(reactions, review_ids):
+    """Drop every reaction on the given (deleted) reviews."""
+    return reactions.delete_many({'review_id': {'$in': list(review_ids)}}).deleted_count
+
+
+def migrate_reactions(reviews, reactions, batch_size=500):
+    """Move legacy ``liked_by`` / ``disliked_by`` arrays into ``reactions``.
+
+    Every review's counters are then recomputed from ``reactions``, so this
+    also repairs drift. Returns ``(reactions_migrated, reviews_updated)``.
+    """
+    migrated = 0
+    ops = []
+    legacy = reviews.find(
+        {'$or': [{'liked_by': {'$exists': True}}, {'disliked_by': {'$exists': True}}]},
+        {'liked_by': 1, 'disliked_by': 1}
+    )
+    for review in legacy:
+        # Kalau user ada di kedua array, dislike yang terakhir menang (sama seperti kode lama)
+        for field, value in (('liked_by', LIKE), ('disliked_by', DISLIKE)):
+            for user_id in review.get(field) or []:
+                ops.append(UpdateOne(
+                    {'review_id': review['_id'], 'user_id': user_id},
+                    {'$set': {'value': value, 'updated_at': datetime.now()}},
+                    upsert=True
+                ))
+        if len(ops) >= batch_size:
+            result = reactions.bulk_write(ops, ordered=True)
+            migrated += result.upserted_count + result.modified_count
+            ops = []
+    if ops:
+        result = reactions.bulk_write(ops, ordered=True)
+        migrated += result.upserted_count + result.modified_count
+    reviews.update_many({}, {'$unset': {'liked_by': '', 'disliked_by': ''}})
+
+    counts = {}
+    pipeline = [{'$group': {'_id': {'review_id': '$review_id', 'value': '$value'}, 'count': {'$sum': 1}}}]
+    for row in reactions.aggregate(pipeline, allowDiskUse=True):
+        field = COUNTER_FIELDS.get(row['_id']['value'])
+        if field:
+            counts.setdefault(row['_id']['review_id'], {})[field] = row['count']
+
+    updated = 0
+    ops = []
+    for review in reviews.find({}, {'_id': 1}):
+        review_counts = counts.get(review['_id'], {})
+        ops.append(UpdateOne({'_id': review['_id']}, {'$set': {
+            'likes': review_counts.get('likes', 0),
+            'dislikes': review_counts.get('dislikes', 0),
+        }}))
+        if len(ops) >= batch_size:
+            updated += reviews.bulk_write(ops, ordered=False).matched_count
+            ops = []
+    if ops:
+        updated += reviews.bulk_write(ops, ordered=False).matched_count
+    return migrated, updated
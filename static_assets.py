@@ -0,0 +1,207 @@
+"""Fingerprinted static files.
+
+``StaticAssets.build`` hashes every file under ``static/`` into a manifest
+(``images/popcorn_full.png`` -> ``images/popcorn_full.3f9c1a2b7d4e.png``) and
+writes gzip/brotli copies of text assets into a build directory, named after
+their content hash so an unchanged file is never compressed twice. The
+manifest is only written by ``flask build-assets``, run at deploy time after
+the files are in place; at startup a worker reads it and only stats the files
+(no hashing). A file whose size or mtime no longer matches its entry was
+changed after the build: it is logged and served under its plain name, without
+the hashed URL and ``immutable`` cache. Without a manifest every static file is
+served that way.
+
+``url_for('static', ...)`` is rewritten to the hashed name. Hashed names and
+content-hashed uploads never change, so they are served with a one-year
+``immutable`` cache; everything is served with a content ETag and conditional
+GET, and text assets are negotiated against ``Accept-Encoding``.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+
+from flask import current_app, request, send_file, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # brotli opsional, gzip selalu ada
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ONE_YEAR = 365 * 24 * 3600
+TEXT_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.xml', '.map', '.html'}
+MIN_COMPRESS_SIZE = 256
+HASH_LENGTH = 12
+
+
+def _digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(filename, digest):
+    base, ext = os.path.splitext(filename)
+    return f'{base}.{digest}{ext}'
+
+
+class StaticAssets:
+    def __init__(self, static_folder, build_dir, exclude=(), immutable_pattern=None):
+        self.static_folder = os.path.abspath(static_folder)
+        self.build_dir = os.path.abspath(build_dir)
+        # Direktori yang isinya berubah saat runtime (mis. upload), tidak masuk manifest
+        self.exclude = tuple(exclude)
+        self.immutable_pattern = re.compile(immutable_pattern) if immutable_pattern else None
+        self.manifest = {}
+        self._reverse = {}
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.build_dir, 'manifest.json')
+
+    def _walk(self):
+        for dirpath, dirnames, filenames in os.walk(self.static_folder):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                logical = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                if logical.startswith(self.exclude) or name.startswith('.') or name.endswith('.tmp'):
+                    continue
+                yield logical, path
+
+    def _compress(self, path, digest, ext):
+        """Write ``<digest><ext>.gz`` / ``.br`` if missing; returns the encodings available."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return []
+        encoders = [('gzip', '.gz', lambda d: gzip.compress(d, 9, mtime=0))]
+        if brotli is not None:
+            encoders.insert(0, ('br', '.br', lambda d: brotli.compress(d, quality=11)))
+
+        encodings = []
+        for encoding, suffix, compress in encoders:
+            target = os.path.join(self.build_dir, digest + ext + suffix)
+            if not os.path.exists(target):
+                compressed = compress(data)
+                # Tidak disimpan kalau tidak lebih kecil
+                if len(compressed) >= len(data):
+                    continue
+                tmp = f'{target}.{os.getpid()}.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(compressed)
+                os.replace(tmp, target)
+            encodings.append(encoding)
+        return encodings
+
+    def build(self):
+        """Hash and precompress everything; writes and returns the manifest."""
+        os.makedirs(self.build_dir, exist_ok=True)
+        manifest = {}
+        for logical, path in self._walk():
+            digest = _digest(path)
+            ext = os.path.splitext(logical)[1].lower()
+            stat = os.stat(path)
+            entry = {'hashed': hashed_name(logical, digest), 'digest': digest, 'encodings': [],
+                     'size': stat.st_size, 'mtime': stat.st_mtime}
+            if ext in TEXT_EXTENSIONS:
+                entry['encodings'] = self._compress(path, digest, ext)
+            manifest[logical] = entry
+
+        tmp = f'{self.manifest_path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+        self._load(manifest)
+        return manifest
+
+    def _compressed_path(self, logical, entry, encoding):
+        ext = os.path.splitext(logical)[1].lower()
+        return os.path.join(self.build_dir, entry['digest'] + ext + ('.br' if encoding == 'br' else '.gz'))
+
+    def _load(self, manifest):
+        self.manifest = manifest
+        self._reverse = {entry['hashed']: logical for logical, entry in manifest.items()}
+
+    def load(self):
+        """Read the manifest written by ``build``; empty (plain names) if there is none."""
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("No static manifest at %s (%s), run `flask build-assets`", self.manifest_path, e)
+            manifest = {}
+        stale = [logical for logical, entry in manifest.items() if not self._unchanged(logical, entry)]
+        if stale:
+            logger.error("%d static files changed since `flask build-assets` (%s), serving them unhashed",
+                         len(stale), ', '.join(stale[:5]))
+            for logical in stale:
+                del manifest[logical]
+        self._load(manifest)
+        return manifest
+
+    def _unchanged(self, logical, entry):
+        try:
+            stat = os.stat(os.path.join(self.static_folder, logical))
+        except OSError:
+            return False
+        return stat.st_size == entry.get('size') and stat.st_mtime == entry.get('mtime')
+
+    def init_app(self, app):
+        app.url_defaults(self._rewrite_url)
+        app.view_functions['static'] = self.send
+
+    def _rewrite_url(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            entry = self.manifest.get(values['filename'])
+            if entry is not None:
+                values['filename'] = entry['hashed']
+
+    def _encoding(self, entry):
+        for encoding in entry['encodings']:
+            if request.accept_encodings[encoding]:
+                return encoding
+        return None
+
+    def send(self, filename):
+        logical = self._reverse.get(filename)
+        if logical is not None:
+            return self._send_entry(logical, immutable=True)
+        if filename in self.manifest:
+            # URL lama tanpa hash: tetap ETag dari isi, tapi cache default
+            return self._send_entry(filename, immutable=False)
+        if self.immutable_pattern is not None and self.immutable_pattern.match(filename):
+            digest = os.path.splitext(os.path.basename(filename))[0]
+            response = send_from_directory(self.static_folder, filename, etag=digest, max_age=ONE_YEAR)
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+            return response
+        return current_app.send_static_file(filename)
+
+    def _send_entry(self, logical, immutable):
+        entry = self.manifest[logical]
+        mimetype = mimetypes.guess_type(logical)[0] or 'application/octet-stream'
+        encoding = self._encoding(entry)
+        if encoding is not None:
+            path = self._compressed_path(logical, entry, encoding)
+        else:
+            path = os.path.join(self.static_folder, logical)
+
+        etag = entry['digest'] + (f'-{encoding}' if encoding else '')
+        max_age = ONE_YEAR if immutable else current_app.get_send_file_max_age(logical)
+        response = send_file(path, mimetype=mimetype, etag=etag, max_age=max_age, conditional=True)
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        if entry['encodings']:
+            response.vary.add('Accept-Encoding')
+        return response
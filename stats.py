@@ -0,0 +1,110 @@
+"""Admin dashboard statistics.
+
+Collection totals come from ``estimated_document_count`` (collection metadata,
+no scan); the dashboard doesn't need them exact. The number of pending
+reports is a counter in the ``counters`` collection, moved with ``$inc`` when
+a report is filed or resolved, and rebuilt by ``reconcile_pending``.
+
+Per-day series (reviews, signups) are stored in ``daily_stats``, one document
+per metric and day. A background job only re-aggregates from the last stored
+day onwards, so each refresh touches about a day of data, not the whole
+history.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from background import PeriodicTask
+
+PENDING_REPORTS = 'pending_reports'
+DAY_FORMAT = '%Y-%m-%d'
+
+
+def _day(value):
+    return datetime(value.year, value.month, value.day)
+
+
+class StatsService:
+    def __init__(self, totals, series, reports, counters, daily, days=30, refresh_interval=300):
+        self.totals = totals
+        self.series = series
+        self.reports = reports
+        self.counters = counters
+        self.daily = daily
+        self.days = days
+        self.refresh_interval = refresh_interval
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._task = PeriodicTask('dashboard-stats', refresh_interval, self.refresh)
+
+    # Pending reports
+    def adjust_pending(self, amount):
+        if amount:
+            self.counters.update_one({'_id': PENDING_REPORTS}, {'$inc': {'value': amount}}, upsert=True)
+
+    def reconcile_pending(self):
+        count = self.reports.count_documents({'status': 'pending'})
+        self.counters.update_one({'_id': PENDING_REPORTS}, {'$set': {'value': count}}, upsert=True)
+        return count
+
+    def pending_reports(self):
+        doc = self.counters.find_one({'_id': PENDING_REPORTS})
+        if doc is None:
+            return self.reconcile_pending()
+        return max(doc.get('value', 0), 0)
+
+    # Time series
+    def _update_metric(self, metric, collection):
+        latest = self.daily.find_one({'metric': metric}, sort=[('day', -1)])
+        start = latest['day'] if latest else _day(datetime.now()) - timedelta(days=self.days - 1)
+
+        # Hari terakhir yang tersimpan mungkin belum lengkap, jadi dihitung ulang
+        pipeline = [
+            {'$match': {'created_at': {'$gte': start}}},
+            {'$group': {
+                '_id': {'$dateToString': {'format': DAY_FORMAT, 'date': '$created_at'}},
+                'count': {'$sum': 1},
+            }},
+        ]
+        ops = []
+        for row in collection.aggregate(pipeline):
+            day = datetime.strptime(row['_id'], DAY_FORMAT)
+            ops.append(UpdateOne(
+                {'_id': f"{metric}:{row['_id']}"},
+                {'$set': {'metric': metric, 'day': day, 'count': row['count']}},
+                upsert=True
+            ))
+        if ops:
+            self.daily.bulk_write(ops, ordered=False)
+
+    def _read_series(self, metric, since):
+        counts = {doc['day']: doc['count'] for doc in
+                  self.daily.find({'metric': metric, 'day': {'$gte': since}}, {'day': 1, 'count': 1})}
+        return [(since + timedelta(days=i), counts.get(since + timedelta(days=i), 0))
+                for i in range(self.days)]
+
+    def refresh(self):
+        for metric, collection in self.series.items():
+            self._update_metric(metric, collection)
+
+        since = _day(datetime.now()) - timedelta(days=self.days - 1)
+        snapshot = {
+            'totals': {name: collection.estimated_document_count()
+                       for name, collection in self.totals.items()},
+            'series': {metric: self._read_series(metric, since) for metric in self.series},
+            'computed_at': datetime.now(),
+        }
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def get(self):
+        self._task.ensure_started()
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        return snapshot
+
+    def stop(self):
+        self._task.stop()
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# Modul aplikasi ada di root repo (bukan package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db():
+    """Fresh in-memory database (mongomock) per test."""
+    mongomock = pytest.importorskip('mongomock')
+    return mongomock.MongoClient().db
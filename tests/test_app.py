@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READYZ = '''
+import json, app
+response = app.app.test_client().get('/readyz')
+print(json.dumps([response.status_code, response.get_json()]))
+'''
+
+
+def _run(script, **env):
+    base = {k: v for k, v in os.environ.items() if k != 'MONGO_URI'}
+    return subprocess.run([sys.executable, '-c', script], cwd=ROOT, env={**base, **env},
+                          capture_output=True, text=True, timeout=60)
+
+
+def test_import_without_mongo_uri():
+    result = _run('import app')
+    assert result.returncode == 0, result.stderr
+
+
+def test_readyz_does_not_leak_connection_details():
+    result = _run(READYZ, MONGO_URI='mongodb://127.0.0.1:1/fiew_test',
+                  MONGO_SERVER_SELECTION_TIMEOUT_MS='200', STATIC_FINGERPRINT='0')
+    assert result.returncode == 0, result.stderr
+    status, body = json.loads(result.stdout.strip().splitlines()[-1])
+    assert status == 503
+    assert body == {'status': 'unavailable'}
@@ -0,0 +1,49 @@
+import cache
+from cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_entries_expire(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, 'time', clock)
+    ttl_cache = TTLCache(maxsize=10, ttl=30)
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2, ttl=5)
+    clock.now += 10
+    assert (ttl_cache.get('a'), ttl_cache.get('b', 'gone')) == (1, 'gone')
+    clock.now += 30
+    assert ttl_cache.get('a') is None
+    assert ttl_cache.stats() == {'size': 0, 'maxsize': 10, 'hits': 1, 'misses': 2}
+
+
+def test_least_recently_used_is_evicted():
+    ttl_cache = TTLCache(maxsize=2, ttl=60)
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2)
+    ttl_cache.get('a')
+    ttl_cache.set('c', 3)
+    assert (ttl_cache.get('a'), ttl_cache.get('b'), ttl_cache.get('c')) == (1, None, 3)
+
+
+def test_zero_ttl_disables_caching():
+    ttl_cache = TTLCache(ttl=0)
+    ttl_cache.set('a', 1)
+    assert not ttl_cache.enabled
+    assert ttl_cache.get('a') is None
+
+
+def test_pop_and_clear():
+    ttl_cache = TTLCache()
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2)
+    assert ttl_cache.pop('a') == 1
+    assert ttl_cache.pop('a') is None
+    ttl_cache.clear()
+    assert len(ttl_cache) == 0
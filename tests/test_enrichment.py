@@ -0,0 +1,52 @@
+from enrichment import attach, collect_ids, fetch_values, lookup_stages
+
+
+class CountingFinds:
+    def __init__(self, collection):
+        self.collection = collection
+        self.finds = 0
+
+    def find(self, *args, **kwargs):
+        self.finds += 1
+        return self.collection.find(*args, **kwargs)
+
+
+def _seed(db):
+    db.users.insert_many([{'_id': 1, 'username': 'ann', 'email': 'a@x'},
+                          {'_id': 2, 'username': 'bob', 'email': 'b@x'}])
+    return [{'_id': 10, 'user_id': 1}, {'_id': 11, 'user_id': 2}, {'_id': 12, 'user_id': 1},
+            {'_id': 13, 'user_id': 99}, {'_id': 14}]
+
+
+def test_collect_ids_keeps_first_seen_order():
+    assert collect_ids([{'k': 2}, {'k': 1}, {'k': 2}, {'k': None}, {}], 'k') == [2, 1]
+
+
+def test_attach_joins_a_page_with_one_query(db):
+    reviews = _seed(db)
+    users = CountingFinds(db.users)
+    joined = attach(reviews, 'user_id', users, as_field='author', projection={'username': 1})
+    assert users.finds == 1
+    assert [r.get('author', {}).get('username') for r in joined] == ['ann', 'bob', 'ann', None, None]
+    assert 'email' not in joined[0]['author']
+    # Referensi yang tidak ditemukan tetap berisi id aslinya
+    assert joined[3]['user_id'] == 99
+
+
+def test_attach_can_drop_unresolved(db):
+    joined = attach(_seed(db), 'user_id', db.users, drop_missing=True)
+    assert [r['_id'] for r in joined] == [10, 11, 12]
+    assert joined[0]['user_id']['username'] == 'ann'
+
+
+def test_fetch_values(db):
+    _seed(db)
+    assert fetch_values(db.users, {'_id': {'$in': [1, 2, 3]}}, 'username') == {'ann', 'bob'}
+
+
+def test_lookup_stages_match_attach(db):
+    reviews = _seed(db)
+    db.reviews.insert_many(reviews)
+    pipeline = [{'$sort': {'_id': 1}}, *lookup_stages('users', 'user_id', 'author', preserve_missing=False)]
+    assert [(r['_id'], r['author']['username']) for r in db.reviews.aggregate(pipeline)] == \
+        [(10, 'ann'), (11, 'bob'), (12, 'ann')]
@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from fanout import FanOut
+
+
+def _barrier_calls(count):
+    # Semua call harus berjalan bersamaan agar barrier terbuka
+    barrier = threading.Barrier(count, timeout=2)
+    return {f'call{i}': barrier.wait for i in range(count)}
+
+
+def test_configured_worker_count_sets_real_concurrency():
+    fanout = FanOut()
+    fanout.workers = 8
+    # Satu call jalan di thread pemanggil, tujuh lainnya butuh tujuh slot di pool
+    results = fanout.run(**_barrier_calls(8))
+    assert len(results) == 8
+
+
+def test_calls_beyond_pool_size_run_inline():
+    fanout = FanOut(workers=2)
+    with pytest.raises(threading.BrokenBarrierError):
+        fanout.run(**_barrier_calls(4))
+
+
+def test_zero_workers_runs_sequentially():
+    fanout = FanOut(workers=0)
+    threads = fanout.run(a=lambda: threading.current_thread(), b=lambda: threading.current_thread())
+    assert threads == {'a': threading.current_thread(), 'b': threading.current_thread()}
+
+
+def test_first_exception_is_raised_after_all_calls_finish():
+    fanout = FanOut(workers=4)
+    finished = []
+
+    def fail():
+        raise KeyError('boom')
+
+    with pytest.raises(KeyError):
+        fanout.run(a=fail, b=lambda: finished.append('b'))
+    assert finished == ['b']
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from pymongo.errors import OperationFailure
+
+from film_search import FilmSearch, TitleIndex
+
+
+class Films:
+    def __init__(self, docs, failures=0):
+        self.docs = docs
+        self.failures = failures
+        self.scans = 0
+        self.release = threading.Event()
+
+    def find(self, query, projection):
+        self.scans += 1
+        self.release.wait(2)
+        if self.failures:
+            self.failures -= 1
+            raise OperationFailure('not primary')
+        return list(self.docs)
+
+
+def _complete_when_ready(index, query):
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline:
+        results = index.complete(query)
+        if results:
+            return results
+        time.sleep(0.01)
+    return []
+
+
+def test_first_requests_do_not_scan_and_build_once_in_background():
+    films = Films([{'_id': 1, 'title': 'Night River', 'views': 5},
+                   {'_id': 2, 'title': 'Night Shadow', 'views': 50}])
+    index = TitleIndex(films, {}, refresh_interval=3600)
+    try:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(index.complete('nig'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [[]] * 8
+
+        films.release.set()
+        assert [f['_id'] for f in _complete_when_ready(index, 'nig')] == [2, 1]
+        assert [f['_id'] for f in index.complete('night riv')] == [1]
+        assert films.scans == 1
+    finally:
+        index.stop()
+
+
+def test_failed_build_is_retried_soon():
+    films = Films([{'_id': 1, 'title': 'Night River', 'views': 5}], failures=2)
+    films.release.set()
+    index = TitleIndex(films, {}, refresh_interval=3600, retry_interval=0.05)
+    try:
+        assert [f['_id'] for f in _complete_when_ready(index, 'riv')] == [1]
+        assert films.scans == 3
+    finally:
+        index.stop()
+
+
+class NoTextIndex:
+    def find(self, *args, **kwargs):
+        raise OperationFailure('text index required for $text query', code=27)
+
+
+def test_local_search_without_text_index_finds_nothing():
+    assert FilmSearch(NoTextIndex(), {}).local('night') == []
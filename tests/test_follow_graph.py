@@ -0,0 +1,74 @@
+from bson.objectid import ObjectId
+
+from follow_graph import FOLLOWERS, FOLLOWING, FollowGraph
+
+
+def _graph(db):
+    db.follows.create_index([('follower_id', 1), ('following_id', 1)], unique=True)
+    return FollowGraph(db.follows, db.users, {'username': 1})
+
+
+def _users(db, count):
+    return [db.users.insert_one({'username': f'user{i}', 'followers_count': 0, 'following_count': 0}).inserted_id
+            for i in range(count)]
+
+
+def _follow(db, follower_id, following_id):
+    db.follows.insert_one({'follower_id': follower_id, 'following_id': following_id})
+
+
+def test_previews_mark_who_the_viewer_follows(db):
+    graph = _graph(db)
+    owner, viewer, *others = _users(db, 5)
+    for other in others:
+        _follow(db, other, owner)
+    _follow(db, owner, others[0])
+    _follow(db, viewer, others[1])
+
+    followers, following = graph.previews(owner, viewer, limit=2)
+    # Terbaru dulu
+    assert [p['username'] for p in followers] == ['user4', 'user3']
+    assert [p['username'] for p in following] == ['user2']
+    assert [p['is_following'] for p in followers] == [False, True]
+
+
+def test_page_walks_every_follower_once(db):
+    graph = _graph(db)
+    owner, *others = _users(db, 8)
+    for other in others:
+        _follow(db, other, owner)
+
+    seen, cursor = [], None
+    while True:
+        people, cursor = graph.page(FOLLOWERS, owner, limit=3, after=cursor)
+        seen += [p['_id'] for p in people]
+        if not cursor:
+            break
+    assert seen == others[::-1]
+    assert graph.page(FOLLOWING, owner)[0] == []
+
+
+def test_toggle_keeps_counts_in_step(db):
+    graph = _graph(db)
+    a, b = _users(db, 2)
+    assert graph.toggle(a, b) == 'follow'
+    assert graph.toggle(a, b) == 'unfollow'
+    assert graph.toggle(a, b) == 'follow'
+
+    counts = {u['_id']: (u['followers_count'], u['following_count']) for u in db.users.find()}
+    assert counts == {a: (0, 1), b: (1, 0)}
+    assert graph.followed_by(a, [b]) == {b}
+
+
+def test_reconcile_removes_duplicates_and_recounts(db):
+    graph = FollowGraph(db.follows, db.users, {'username': 1})
+    a, b, c = _users(db, 3)
+    # Data lama tanpa unique index: edge ganda dan counter yang melenceng
+    for _ in range(3):
+        _follow(db, a, b)
+    _follow(db, c, b)
+    db.users.update_one({'_id': b}, {'$set': {'followers_count': 9}})
+
+    assert graph.reconcile() == (2, 3)
+    counts = {u['_id']: (u['followers_count'], u['following_count']) for u in db.users.find()}
+    assert counts == {a: (0, 1), b: (2, 0), c: (0, 1)}
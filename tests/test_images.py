@@ -0,0 +1,75 @@
+import io
+import threading
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from images import ImagePipeline, pick_variant, sniff_extension
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 16
+
+
+def _png(size=256):
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (size, size), 'white').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _upload(data, name):
+    return FileStorage(stream=io.BytesIO(data), filename=name)
+
+
+def test_sniff_extension():
+    assert sniff_extension(PNG) == 'png'
+    assert sniff_extension(b'\xff\xd8\xff\xe0') == 'jpg'
+    assert sniff_extension(b'RIFF\x00\x00\x00\x00WEBPVP8 ') == 'webp'
+    assert sniff_extension(b'<?php echo 1;') is None
+
+
+@pytest.mark.parametrize('data, name', [
+    (b'<script>alert(1)</script>', 'avatar.png'),
+    (PNG, 'avatar.jpg'),
+    (PNG, 'avatar.exe'),
+])
+def test_store_rejects_content_that_is_not_the_named_image_type(tmp_path, data, name):
+    pipeline = ImagePipeline(str(tmp_path))
+    with pytest.raises(ValueError):
+        pipeline.store(_upload(data, name), 'avatar')
+    assert not list(tmp_path.rglob('*.*'))
+
+
+def test_store_saves_without_queueing_variants(tmp_path):
+    pipeline = ImagePipeline(str(tmp_path))
+    data = _png()
+    filename, digest, variants = pipeline.store(_upload(data, 'avatar.png'), 'avatar')
+    assert (tmp_path / filename).read_bytes() == data
+    assert filename.endswith(f'{digest}.png')
+    assert variants is None
+    # Variant baru dibuat lewat process(), setelah dokumen pemiliknya ditulis
+    assert [p.name for p in tmp_path.rglob('*.*')] == [filename.split('/')[-1]]
+
+    ready = []
+    done = threading.Event()
+    pipeline.process(filename, digest, 'avatar', lambda v: (ready.append(v), done.set()))
+    assert done.wait(5)
+    assert sorted(ready[0]) == ['128', '64']
+    assert all((tmp_path / name).exists() for formats in ready[0].values() for name in formats.values())
+
+
+AVATAR_VARIANTS = {'64': {'webp': 'a_64.webp', 'jpg': 'a_64.jpg'}, '128': {'webp': 'a_128.webp', 'jpg': 'a_128.jpg'}}
+
+
+@pytest.mark.parametrize('size, fmt, expected', [
+    (40, 'webp', 'a_64.webp'),
+    (64, 'jpg', 'a_64.jpg'),
+    (100, 'webp', 'a_128.webp'),
+    (256, 'webp', 'a.png'),
+])
+def test_pick_variant_never_upscales(size, fmt, expected):
+    assert pick_variant('a.png', AVATAR_VARIANTS, size, fmt) == expected
+
+
+def test_pick_variant_without_variants_uses_original():
+    assert pick_variant('a.png', None, 64) == 'a.png'
+
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+from pymongo import MongoClient, uri_parser
+
+from indexes import INDEXES, QUERY_SHAPES, audit, ensure_indexes, seed_audit_data
+
+
+def _filter_fields(query):
+    fields = set()
+    for key, value in query.items():
+        if key in ('$and', '$or'):
+            for clause in value:
+                fields |= _filter_fields(clause)
+        else:
+            fields.add(key)
+    return fields
+
+
+def _shape_fields(kind, spec):
+    """Filter fields and the first sort field a shape could use an index for."""
+    if kind == 'aggregate':
+        fields, sort = set(), []
+        for stage in spec['pipeline']:
+            if '$match' in stage:
+                fields |= _filter_fields(stage['$match'])
+            elif '$sort' in stage and not sort:
+                sort = list(stage['$sort'].items())
+    else:
+        fields, sort = _filter_fields(spec['filter']), spec.get('sort') or []
+    if sort:
+        fields.add(sort[0][0])
+    return fields
+
+
+def _leading_key(index):
+    key, direction = next(iter(index.document['key'].items()))
+    return '$text' if direction == 'text' else key
+
+
+@pytest.mark.parametrize('route, collection, kind, spec', QUERY_SHAPES)
+def test_every_shape_has_a_matching_index(route, collection, kind, spec):
+    if spec.get('scan'):
+        return
+    leading = {_leading_key(index) for index in INDEXES.get(collection, [])} | {'_id'}
+    assert leading & _shape_fields(kind, spec), f'{route}: no index on {collection} for {spec}'
+
+
+@pytest.fixture
+def scratch_db():
+    uri = os.environ.get('TEST_MONGO_URI')
+    if not uri:
+        pytest.skip('TEST_MONGO_URI not set')
+    name = uri_parser.parse_uri(uri)['database'] or 'fiew_index_audit'
+    client = MongoClient(uri, serverSelectionTimeoutMS=2000)
+    client.drop_database(name)
+    try:
+        yield client[name]
+    finally:
+        client.drop_database(name)
+        client.close()
+
+
+def test_audit_finds_no_collscan_or_sort(scratch_db):
+    ensure_indexes(scratch_db)
+    seed_audit_data(scratch_db)
+    assert audit(scratch_db) == []
@@ -0,0 +1,43 @@
+import threading
+
+from metrics import Metrics
+
+
+def _metrics():
+    metrics = Metrics()
+    metrics.counter('jobs_total', 'Jobs.', ('kind',))
+    metrics.histogram('job_seconds', 'Job time.', buckets=(0.1, 1.0))
+    return metrics
+
+
+def _in_threads(count, func):
+    threads = [threading.Thread(target=func) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_shards_of_finished_threads_are_folded_in():
+    metrics = _metrics()
+
+    def work():
+        metrics.inc('jobs_total', kind='a')
+        metrics.observe('job_seconds', 0.5)
+
+    for _ in range(20):
+        _in_threads(5, work)
+    text = metrics.render()
+
+    assert 'jobs_total{kind="a"} 100' in text
+    assert 'job_seconds_bucket{le="1.0"} 100' in text
+    assert 'job_seconds_count 100' in text
+
+    # Shard yang sudah dilipat tidak dihitung dua kali pada scrape berikutnya
+    assert metrics.render() == text
+    _in_threads(5, work)
+    metrics.inc('jobs_total', kind='b')
+    text = metrics.render()
+    assert 'jobs_total{kind="a"} 105' in text
+    assert 'jobs_total{kind="b"} 1' in text
+    assert 'job_seconds_count 105' in text
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+from moderation import ModerationQueue
+
+
+class Stats:
+    def __init__(self):
+        self.pending = 0
+
+    def adjust_pending(self, amount):
+        self.pending += amount
+
+
+def _queue(db):
+    return ModerationQueue(db.reports, db.reviews, db.films, db.users, db.reactions, Stats())
+
+
+def _review(db, rating=8):
+    film_id = db.films.insert_one({'rating_sum': rating, 'rating_count': 1, 'average_rating': rating}).inserted_id
+    return db.reviews.insert_one({'film_id': film_id, 'user_id': ObjectId(), 'rating': rating}).inserted_id
+
+
+def test_report_adds_review_to_queue_summary(db):
+    queue = _queue(db)
+    review_id = _review(db)
+    queue.report(review_id, ObjectId(), 'spam')
+    queue.report(review_id, ObjectId(), 'spoiler')
+    review = db.reviews.find_one({'_id': review_id})
+    assert review['pending_reports'] == 2
+    assert queue.stats.pending == 2
+
+
+def test_resolve_clears_summary_and_reports(db):
+    queue = _queue(db)
+    review_id = _review(db)
+    queue.report(review_id, ObjectId(), 'spam')
+    assert queue.act('mark_spoiler', [review_id]) == 1
+    review = db.reviews.find_one({'_id': review_id})
+    assert review['is_spoiler'] is True
+    assert 'pending_reports' not in review
+    assert db.reports.count_documents({'status': 'pending'}) == 0
+    assert queue.stats.pending == 0
+
+
+def test_report_arriving_during_act_stays_queued(db):
+    queue = _queue(db)
+    review_id = _review(db)
+    queue.report(review_id, ObjectId(), 'spam')
+    # Report yang masuk setelah admin bertindak (created_at sesudah cutoff)
+    later = (datetime.now() + timedelta(seconds=5)).replace(microsecond=0)
+    db.reports.insert_one({'review_id': review_id, 'reporter_id': ObjectId(), 'reason': 'late',
+                           'status': 'pending', 'created_at': later})
+    db.reviews.update_one({'_id': review_id}, {'$inc': {'pending_reports': 1}})
+
+    assert queue.act('resolve', [review_id]) == 1
+    review = db.reviews.find_one({'_id': review_id})
+    assert review['pending_reports'] == 1
+    assert review['first_reported_at'] == later
+    assert db.reports.find_one({'reason': 'late'})['status'] == 'pending'
+
+
+def test_delete_only_resolves_claimed_reviews(db):
+    queue = _queue(db)
+    mine, theirs = _review(db), _review(db)
+    for review_id in (mine, theirs):
+        queue.report(review_id, ObjectId(), 'spam')
+    # Admin lain sedang menghapus review ini
+    db.reviews.update_one({'_id': theirs}, {'$set': {'deleting': 'other', 'deleting_at': datetime.now()}})
+
+    assert queue.act('delete', [mine, theirs]) == 1
+    assert db.reviews.find_one({'_id': mine}) is None
+    assert db.reviews.find_one({'_id': theirs}) is not None
+    assert db.reports.find_one({'review_id': theirs})['status'] == 'pending'
+
+
+def test_delete_removes_rating_from_film(db):
+    queue = _queue(db)
+    review_id = _review(db, rating=8)
+    film_id = db.reviews.find_one({'_id': review_id})['film_id']
+    queue.report(review_id, ObjectId(), 'spam')
+    queue.act('delete', [review_id])
+    film = db.films.find_one({'_id': film_id})
+    assert (film['rating_count'], film['average_rating']) == (0, 0)
+
+
+def test_reconcile_rebuilds_summaries(db):
+    queue = _queue(db)
+    review_id, stale = _review(db), _review(db)
+    queue.report(review_id, ObjectId(), 'spam')
+    db.reviews.update_one({'_id': review_id}, {'$set': {'pending_reports': 7}})
+    db.reviews.update_one({'_id': stale}, {'$set': {'pending_reports': 1, 'first_reported_at': datetime.now()}})
+
+    assert queue.reconcile() == 1
+    assert db.reviews.find_one({'_id': review_id})['pending_reports'] == 1
+    assert 'pending_reports' not in db.reviews.find_one({'_id': stale})
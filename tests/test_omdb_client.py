@@ -0,0 +1,129 @@
+import time
+
+import pytest
+import requests
+
+import omdb_client
+from omdb_client import CircuitBreaker, OmdbClient, OmdbUnavailable
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.perf_counter = time.perf_counter
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        pass
+
+
+class Response:
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self.payload = payload if payload is not None else {'Response': 'True'}
+
+    def json(self):
+        return self.payload
+
+
+class Session:
+    """Plays back ``outcomes``: a Response is returned, an exception raised."""
+
+    def __init__(self):
+        self.outcomes = []
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(omdb_client, 'time', clock)
+    return clock
+
+
+def _client(threshold=2, reset=30, retries=0):
+    client = OmdbClient('key', retries=retries, breaker=CircuitBreaker(threshold, reset))
+    client.session = Session()
+    return client
+
+
+def test_retries_then_returns_payload(clock):
+    client = _client(retries=2)
+    client.session.outcomes = [requests.Timeout(), Response(502), Response(payload={'Title': 'Heat'})]
+    assert client.get({'i': 'tt1'}) == {'Title': 'Heat'}
+    assert client.breaker.state == 'closed'
+
+
+def test_closed_open_half_open_closed(clock):
+    client = _client(threshold=2, reset=30)
+    client.session.outcomes = [requests.ConnectionError(), Response(500)]
+    for _ in range(2):
+        with pytest.raises(OmdbUnavailable):
+            client.get({'i': 'tt1'})
+    assert client.breaker.state == 'open'
+
+    # Terbuka: ditolak tanpa request ke OMDb
+    with pytest.raises(OmdbUnavailable):
+        client.get({'i': 'tt1'})
+    assert client.session.calls == 2
+
+    clock.now += 30
+    assert client.breaker.state == 'half-open'
+    client.session.outcomes = [Response()]
+    assert client.get({'i': 'tt1'}) == {'Response': 'True'}
+    assert client.breaker.state == 'closed'
+
+
+def test_failed_trial_reopens(clock):
+    client = _client(threshold=1, reset=30)
+    client.session.outcomes = [requests.Timeout(), requests.Timeout()]
+    with pytest.raises(OmdbUnavailable):
+        client.get({'i': 'tt1'})
+    clock.now += 30
+    with pytest.raises(OmdbUnavailable):
+        client.get({'i': 'tt1'})
+    assert client.breaker.state == 'open'
+
+
+@pytest.mark.parametrize('error', [
+    requests.TooManyRedirects(), requests.exceptions.InvalidURL(), requests.exceptions.ChunkedEncodingError(),
+])
+def test_other_request_errors_do_not_leave_the_trial_stuck(clock, error):
+    client = _client(threshold=1, reset=30)
+    client.session.outcomes = [error, error]
+    with pytest.raises(OmdbUnavailable):
+        client.get({'i': 'tt1'})
+    clock.now += 30
+    with pytest.raises(OmdbUnavailable):
+        client.get({'i': 'tt1'})
+
+    # Trial gagal membuka breaker lagi; setelah reset berikutnya trial baru boleh jalan
+    clock.now += 30
+    client.session.outcomes = [Response()]
+    assert client.get({'i': 'tt1'}) == {'Response': 'True'}
+    assert client.breaker.state == 'closed'
+
+
+def test_unexpected_exception_is_recorded_as_failure(clock):
+    client = _client(threshold=1, reset=30)
+    client.session.outcomes = [RuntimeError('boom')]
+    with pytest.raises(RuntimeError):
+        client.get({'i': 'tt1'})
+    assert client.breaker.state == 'open'
+
+
+def test_fetch_many_yields_none_for_failures(clock):
+    client = _client(threshold=10)
+    client.session.outcomes = [Response(payload={'Title': 'A'})]
+    assert client.fetch_many([{'i': 'tt1'}]) == [{'Title': 'A'}]
+    client.session.outcomes = [requests.Timeout()]
+    assert client.fetch_many([{'i': 'tt2'}]) == [None]
@@ -0,0 +1,34 @@
+import base64
+from datetime import datetime
+
+import pytest
+from bson.objectid import ObjectId
+
+from pagination import decode_cursor, encode_cursor, keyset_page
+
+
+def _token(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def test_cursor_round_trip():
+    values = [datetime(2020, 1, 2, 3, 4, 5), ObjectId(), None, 3, 'x']
+    assert decode_cursor(encode_cursor(values)) == values
+
+
+@pytest.mark.parametrize('raw', [
+    '[{"$oid": "zz"}]',
+    '[{"$ne": null}]',
+    '[["a"]]',
+    '{"a": 1}',
+    'not json',
+])
+def test_malformed_or_operator_cursor_is_rejected(raw):
+    with pytest.raises(ValueError):
+        decode_cursor(_token(raw))
+
+
+def test_cursor_must_match_sort():
+    with pytest.raises(ValueError):
+        keyset_page(None, [('release_date', -1), ('_id', -1)], 10, after=encode_cursor([ObjectId()]))
+
@@ -0,0 +1,89 @@
+import io
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from images import ImagePipeline
+from posters import HttpFetcher, PosterError, PosterMirror
+
+
+def _png(size=(300, 450)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def server():
+    bodies = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = bodies.get(self.path)
+            self.send_response(200 if body is not None else 404)
+            self.end_headers()
+            # Dikirim per potongan kecil supaya fetcher membaca banyak chunk
+            for i in range(0, len(body or b''), 4096):
+                self.wfile.write(body[i:i + 4096])
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}', bodies
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetcher_reads_whole_body(server):
+    url, bodies = server
+    bodies['/p.png'] = data = _png()
+    fetcher = HttpFetcher(max_bytes=len(data))
+    assert fetcher(url + '/p.png') == data
+
+
+def test_fetcher_enforces_size_cap_and_status(server):
+    url, bodies = server
+    bodies['/big'] = b'x' * 300_000
+    with pytest.raises(PosterError, match='too large'):
+        HttpFetcher(max_bytes=200_000)(url + '/big')
+    with pytest.raises(PosterError, match='404'):
+        HttpFetcher()(url + '/missing')
+
+
+def _mirror(db, tmp_path, fetch):
+    return PosterMirror(db.films, ImagePipeline(str(tmp_path)), fetcher=fetch, retry_after=3600)
+
+
+def test_mirror_stores_poster_and_variants(db, tmp_path):
+    film_id = db.films.insert_one({'poster_url': 'https://img/p.png'}).inserted_id
+    fields = _mirror(db, tmp_path, lambda url: _png()).mirror(film_id, 'https://img/p.png')
+
+    film = db.films.find_one({'_id': film_id})
+    assert film['poster_local'] == fields['poster_local']
+    assert (tmp_path / film['poster_local']).exists()
+    assert film['poster_variants']
+
+
+def test_failed_mirror_is_retried_by_backfill_later(db, tmp_path):
+    film_id = db.films.insert_one({'poster_url': 'https://img/p.png'}).inserted_id
+    mirror = _mirror(db, tmp_path, lambda url: b'<html>not an image</html>')
+    assert mirror.backfill() == (0, 1)
+    assert mirror.backfill() == (0, 0)
+
+    db.films.update_one({'_id': film_id},
+                        {'$set': {'poster_mirror_failed_at': datetime.now() - timedelta(hours=2)}})
+    mirror.fetcher = lambda url: _png()
+    assert mirror.backfill() == (1, 0)
+    assert 'poster_mirror_failed_at' not in db.films.find_one({'_id': film_id})
+
+
+def test_poster_replaced_meanwhile_is_not_overwritten(db, tmp_path):
+    film_id = db.films.insert_one({'poster_url': 'https://img/new.png'}).inserted_id
+    _mirror(db, tmp_path, lambda url: _png()).mirror(film_id, 'https://img/old.png')
+    assert 'poster_local' not in db.films.find_one({'_id': film_id})
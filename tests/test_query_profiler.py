@@ -0,0 +1,77 @@
+import itertools
+import threading
+from types import SimpleNamespace
+
+from flask import Flask
+
+from query_profiler import QueryProfiler, command_shape
+
+_ids = itertools.count()
+
+
+def _query(profiler, collection, ms, filter=None):
+    """Feed one command through the listener callbacks, as pymongo does."""
+    command = {'find': collection, 'filter': filter or {}}
+    event = SimpleNamespace(command_name='find', command=command, request_id=next(_ids),
+                            duration_micros=int(ms * 1000))
+    profiler.started(event)
+    profiler.succeeded(event)
+
+
+def _app(profiler, view):
+    app = Flask(__name__)
+    app.config.update(SLOW_QUERY_MS=50, QUERY_PROFILE_HISTORY=5)
+    profiler.init_app(app)
+    app.add_url_rule('/page', 'page', view)
+    return app
+
+
+def test_command_shape_strips_values():
+    assert command_shape('find', {'find': 'films', 'filter': {'title': 'Heat', 'year': {'$gt': 1990}}}) == \
+        command_shape('find', {'find': 'films', 'filter': {'title': 'Up', 'year': {'$gt': 2000}}})
+
+
+def test_request_profile_header_history_and_repeats(caplog):
+    profiler = QueryProfiler()
+
+    def view():
+        for _ in range(3):
+            _query(profiler, 'reviews', 2, {'film_id': 1})
+        _query(profiler, 'films', 80)
+        return 'ok'
+
+    response = _app(profiler, view).test_client().get('/page')
+    assert 'db;dur=86.0;desc="4 queries"' in response.headers['Server-Timing']
+    recent = profiler.recent()[-1]
+    assert (recent['endpoint'], recent['count']) == ('page', 4)
+    assert recent['repeated'][0]['count'] == 3
+    assert 'Slow query (80.0 ms) in page' in caplog.text
+
+
+def test_fan_out_threads_add_to_the_request_profile():
+    profiler = QueryProfiler()
+
+    def view():
+        profile = profiler.current
+
+        def work():
+            with profiler.attached(profile):
+                for _ in range(50):
+                    _query(profiler, 'films', 1)
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return 'ok'
+
+    _app(profiler, view).test_client().get('/page')
+    recent = profiler.recent()[-1]
+    assert recent['count'] == 400
+    assert all(q['collection'] == 'films' for q in recent['queries'])
+
+
+def test_commands_outside_requests_are_ignored():
+    profiler = QueryProfiler(history=5)
+    _query(profiler, 'films', 500)
+    assert profiler.recent() == []
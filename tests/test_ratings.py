@@ -0,0 +1,92 @@
+from bson.objectid import ObjectId
+
+from ratings import apply_rating, apply_ratings, rating_distribution, reconcile_ratings
+
+
+def _film(db, **fields):
+    return db.films.insert_one({'rating_sum': 0, 'rating_count': 0, 'rating_histogram': {}, **fields}).inserted_id
+
+
+def _review(db, film_id, rating):
+    db.reviews.insert_one({'film_id': film_id, 'user_id': ObjectId(), 'rating': rating})
+
+
+def test_apply_rating_updates_counters_and_average(db):
+    film_id = _film(db)
+    assert apply_rating(db.films, db.reviews, film_id, 8) == 8
+    assert apply_rating(db.films, db.reviews, film_id, 7) == 7.5
+    assert apply_rating(db.films, db.reviews, film_id, 8, sign=-1) == 7
+    film = db.films.find_one({'_id': film_id})
+    assert (film['rating_sum'], film['rating_count'], film['average_rating']) == (7, 1, 7)
+    assert film['rating_histogram'] == {'16': 0, '14': 1}
+
+
+class Interleaved:
+    """Films collection where ``between()`` runs right after our ``$inc`` returns."""
+
+    def __init__(self, films, between):
+        self.films = films
+        self.between = between
+
+    def find_one_and_update(self, *args, **kwargs):
+        film = self.films.find_one_and_update(*args, **kwargs)
+        self.between()
+        return film
+
+    def __getattr__(self, name):
+        return getattr(self.films, name)
+
+
+def test_stale_average_is_not_written_after_add_and_remove(db):
+    film_id = _film(db)
+    apply_rating(db.films, db.reviews, film_id, 8)
+
+    def concurrent():
+        # Penulis lain menambah 4 lalu rating 8 dihapus: count kembali sama, sum berbeda
+        apply_rating(db.films, db.reviews, film_id, 4)
+        apply_rating(db.films, db.reviews, film_id, 8, sign=-1)
+
+    apply_rating(Interleaved(db.films, concurrent), db.reviews, film_id, 6)
+    film = db.films.find_one({'_id': film_id})
+    assert (film['rating_sum'], film['rating_count']) == (10, 2)
+    assert film['average_rating'] == 5
+
+
+def test_legacy_film_is_rebuilt_from_reviews(db):
+    film_id = db.films.insert_one({'title': 'Old', 'average_rating': 6}).inserted_id
+    for rating in (6, 6, 9):
+        _review(db, film_id, rating)
+    assert apply_rating(db.films, db.reviews, film_id, 9) == 7
+    film = db.films.find_one({'_id': film_id})
+    assert (film['rating_sum'], film['rating_count']) == (21, 3)
+
+    # Sesudahnya jalur $inc biasa
+    _review(db, film_id, 3)
+    assert apply_rating(db.films, db.reviews, film_id, 3) == 6
+
+
+def test_apply_rating_on_missing_film(db):
+    assert apply_rating(db.films, db.reviews, ObjectId(), 5) is None
+
+
+def test_apply_ratings_groups_per_film(db):
+    a = _film(db, rating_sum=16, rating_count=2, rating_histogram={'16': 2})
+    legacy = db.films.insert_one({'title': 'Old'}).inserted_id
+    _review(db, legacy, 5)
+    assert apply_ratings(db.films, db.reviews, [(a, 8), (a, 8), (legacy, 4)], sign=-1) == 2
+    film = db.films.find_one({'_id': a})
+    assert (film['rating_count'], film['average_rating'], film['rating_histogram']) == (0, 0, {'16': 0})
+    assert db.films.find_one({'_id': legacy})['average_rating'] == 5
+
+
+def test_reconcile_and_distribution(db):
+    film_id = _film(db, rating_sum=99, rating_count=1)
+    empty = _film(db, rating_sum=5, rating_count=1)
+    for rating in (10, 5, 5, 4.5):
+        _review(db, film_id, rating)
+    assert reconcile_ratings(db.films, db.reviews) == 2
+    film = db.films.find_one({'_id': film_id})
+    assert film['average_rating'] == 6.125
+    assert db.films.find_one({'_id': empty})['rating_count'] == 0
+    distribution = {value: count for value, count, _ in rating_distribution(film)}
+    assert (distribution[5], distribution[4.5], distribution[10], distribution[1]) == (2, 1, 1, 0)
@@ -0,0 +1,64 @@
+from bson.objectid import ObjectId
+
+from reactions import DISLIKE, LIKE, delete_reactions, migrate_reactions, react, viewer_reactions
+
+
+def _review(db, **fields):
+    return db.reviews.insert_one({'likes': 0, 'dislikes': 0, **fields}).inserted_id
+
+
+def _setup(db):
+    db.reactions.create_index([('review_id', 1), ('user_id', 1)], unique=True)
+    return _review(db), ObjectId()
+
+
+def test_like_unlike_and_switch(db):
+    review_id, user_id = _setup(db)
+    assert react(db.reviews, db.reactions, review_id, user_id, LIKE) == ('like', {'likes': 1, 'dislikes': 0})
+    assert react(db.reviews, db.reactions, review_id, user_id, DISLIKE) == \
+        ('dislike', {'likes': 0, 'dislikes': 1})
+    assert react(db.reviews, db.reactions, review_id, user_id, DISLIKE) == \
+        ('undislike', {'likes': 0, 'dislikes': 0})
+    assert db.reactions.count_documents({}) == 0
+
+
+def test_counters_match_reactions_from_many_users(db):
+    review_id, _ = _setup(db)
+    users = [ObjectId() for _ in range(5)]
+    for user_id in users:
+        react(db.reviews, db.reactions, review_id, user_id, LIKE)
+    react(db.reviews, db.reactions, review_id, users[0], LIKE)
+    react(db.reviews, db.reactions, review_id, users[1], DISLIKE)
+
+    review = db.reviews.find_one({'_id': review_id})
+    assert (review['likes'], review['dislikes']) == (3, 1)
+    assert viewer_reactions(db.reactions, users[1], [review_id, ObjectId()]) == {review_id: DISLIKE}
+    assert viewer_reactions(db.reactions, users[0], [review_id]) == {}
+
+
+def test_reacting_to_missing_review_leaves_nothing(db):
+    _setup(db)
+    assert react(db.reviews, db.reactions, ObjectId(), ObjectId(), LIKE) == (None, None)
+    assert db.reactions.count_documents({}) == 0
+
+
+def test_delete_reactions(db):
+    review_id, user_id = _setup(db)
+    other = _review(db)
+    react(db.reviews, db.reactions, review_id, user_id, LIKE)
+    react(db.reviews, db.reactions, other, user_id, LIKE)
+    assert delete_reactions(db.reactions, [review_id]) == 1
+    assert viewer_reactions(db.reactions, user_id, [review_id, other]) == {other: LIKE}
+
+
+def test_migrate_legacy_arrays(db):
+    a, b, c = ObjectId(), ObjectId(), ObjectId()
+    review_id = _review(db, likes=9, liked_by=[a, b], disliked_by=[b, c])
+    untouched = _review(db, likes=4)
+
+    assert migrate_reactions(db.reviews, db.reactions) == (4, 2)
+    review = db.reviews.find_one({'_id': review_id})
+    assert 'liked_by' not in review
+    assert (review['likes'], review['dislikes']) == (1, 2)
+    assert viewer_reactions(db.reactions, b, [review_id]) == {review_id: DISLIKE}
+    assert db.reviews.find_one({'_id': untouched})['likes'] == 0
@@ -0,0 +1,58 @@
+import os
+
+from flask import Flask, url_for
+
+from static_assets import StaticAssets
+
+
+def _assets(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'css').mkdir(parents=True, exist_ok=True)
+    path = static / 'css' / 'style.css'
+    if not path.exists():
+        path.write_text('body { color: black; }\n' * 40)
+    return StaticAssets(str(static), str(tmp_path / 'build'))
+
+
+def _app(assets):
+    app = Flask(__name__, static_folder=assets.static_folder)
+    assets.init_app(app)
+    return app
+
+
+def test_load_reads_the_built_manifest_without_hashing(tmp_path, monkeypatch):
+    built = _assets(tmp_path).build()
+
+    def no_hashing(*args):
+        raise AssertionError('static/ hashed at startup')
+    monkeypatch.setattr('static_assets._digest', no_hashing)
+    monkeypatch.setattr(StaticAssets, '_walk', no_hashing)
+
+    assets = _assets(tmp_path)
+    assert assets.load() == built
+    response = _app(assets).test_client().get('/static/' + built['css/style.css']['hashed'])
+    assert response.status_code == 200
+    assert 'immutable' in response.headers['Cache-Control']
+
+
+def test_file_edited_after_build_is_served_unhashed(tmp_path):
+    built = _assets(tmp_path).build()
+    path = tmp_path / 'static' / 'css' / 'style.css'
+    path.write_text('body { color: red; }\n')
+
+    assets = _assets(tmp_path)
+    assert 'css/style.css' not in assets.load()
+    app = _app(assets)
+    with app.test_request_context():
+        assert url_for('static', filename='css/style.css') == '/static/css/style.css'
+    client = app.test_client()
+    assert client.get('/static/' + built['css/style.css']['hashed']).status_code == 404
+    response = client.get('/static/css/style.css', headers={'Accept-Encoding': 'gzip'})
+    assert response.data == b'body { color: red; }\n'
+    assert 'immutable' not in response.headers.get('Cache-Control', '')
+
+
+def test_load_without_manifest_serves_plain_names(tmp_path):
+    assets = _assets(tmp_path)
+    assert assets.load() == {}
+    assert assets.manifest == {}
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from stats import StatsService
+
+
+def _stats(db, days=3):
+    return StatsService(totals={'films': db.films, 'reviews': db.reviews},
+                        series={'reviews': db.reviews},
+                        reports=db.reports, counters=db.counters, daily=db.daily_stats,
+                        days=days, refresh_interval=3600)
+
+
+def _today():
+    now = datetime.now()
+    return datetime(now.year, now.month, now.day)
+
+
+def test_pending_counter_is_rebuilt_when_missing(db):
+    db.reports.insert_many([{'status': 'pending'}, {'status': 'pending'}, {'status': 'resolved'}])
+    stats = _stats(db)
+    assert stats.pending_reports() == 2
+    stats.adjust_pending(3)
+    stats.adjust_pending(-1)
+    assert stats.pending_reports() == 4
+    assert stats.reconcile_pending() == 2
+    assert stats.pending_reports() == 2
+
+
+def test_pending_counter_never_shows_negative(db):
+    stats = _stats(db)
+    stats.reconcile_pending()
+    stats.adjust_pending(-2)
+    assert stats.pending_reports() == 0
+
+
+def test_series_covers_the_window_and_picks_up_new_days(db):
+    today = _today()
+    db.films.insert_many([{}, {}])
+    db.reviews.insert_many([
+        {'created_at': today + timedelta(hours=1)},
+        {'created_at': today - timedelta(days=1, hours=-2)},
+        {'created_at': today - timedelta(days=1, hours=-3)},
+        # Di luar jendela 3 hari
+        {'created_at': today - timedelta(days=10)},
+    ])
+    stats = _stats(db)
+    try:
+        snapshot = stats.get()
+        assert snapshot['totals'] == {'films': 2, 'reviews': 4}
+        assert snapshot['series']['reviews'] == [
+            (today - timedelta(days=2), 0), (today - timedelta(days=1), 2), (today, 1)]
+
+        db.reviews.insert_one({'created_at': today + timedelta(hours=2)})
+        assert stats.refresh()['series']['reviews'][-1] == (today, 2)
+    finally:
+        stats.stop()
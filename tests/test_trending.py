@@ -0,0 +1,77 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from trending import TrendingSnapshot
+
+
+class SlowFilms:
+    """Counts ``find`` calls and makes each one slow enough to overlap."""
+
+    def __init__(self, films):
+        self.films = films
+        self.finds = 0
+
+    def find(self, *args, **kwargs):
+        self.finds += 1
+        time.sleep(0.05)
+        return self.films.find(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.films, name)
+
+
+def _seed(db):
+    now = datetime(2024, 1, 1)
+    db.films.insert_many([
+        {'title': f'Film {i}', 'views': i * 10, 'release_date': now - timedelta(days=i), 'plot': 'x'}
+        for i in range(5)
+    ])
+
+
+def _snapshot(films, **kwargs):
+    return TrendingSnapshot(films, {'title': 1}, {'title': 1, 'plot': 1}, size=3,
+                            refresh_interval=3600, **kwargs)
+
+
+def test_snapshot_lists(db):
+    _seed(db)
+    trending = _snapshot(db.films)
+    try:
+        snapshot = trending.get()
+        assert [f['title'] for f in snapshot['popular']] == ['Film 4', 'Film 3', 'Film 2']
+        assert [f['title'] for f in snapshot['new_releases']] == ['Film 0', 'Film 1', 'Film 2']
+        assert snapshot['highlighted']['plot'] == 'x'
+    finally:
+        trending.stop()
+
+
+def test_concurrent_cold_requests_compute_once(db):
+    _seed(db)
+    films = SlowFilms(db.films)
+    trending = _snapshot(films)
+    try:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(trending.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert films.finds == 2
+        assert all(r is results[0] for r in results)
+    finally:
+        trending.stop()
+
+
+def test_fresh_materialised_snapshot_is_reused(db):
+    _seed(db)
+    first = _snapshot(db.films, collection=db.trending)
+    first.get()
+    films = SlowFilms(db.films)
+    second = _snapshot(films, collection=db.trending)
+    try:
+        assert [f['title'] for f in second.get()['popular']] == ['Film 4', 'Film 3', 'Film 2']
+        assert films.finds == 0
+    finally:
+        first.stop()
+        second.stop()
@@ -0,0 +1,86 @@
+import atexit
+
+import pytest
+from bson.objectid import ObjectId
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from view_counter import ViewCounter
+
+
+class FailingCollection:
+    def __init__(self, error):
+        self.error = error
+        self.calls = []
+
+    def bulk_write(self, ops, ordered=True):
+        self.calls.append(ops)
+        raise self.error
+
+
+@pytest.fixture
+def make_counter():
+    counters = []
+
+    def make(collection, **kwargs):
+        counter = ViewCounter({'films': collection}, **{'flush_interval': 60, **kwargs})
+        atexit.unregister(counter.shutdown)
+        counters.append(counter)
+        return counter
+    yield make
+    for counter in counters:
+        counter._task.stop()
+
+
+def _count_views(counter, doc_ids=('a', 'b', 'c'), amount=2):
+    for doc_id in doc_ids:
+        counter.increment('films', doc_id, amount)
+
+
+def test_flush_writes_increments(db, make_counter):
+    db.films.insert_many([{'_id': 'a', 'views': 1}, {'_id': 'b'}])
+    counter = make_counter(db.films)
+    _count_views(counter, ('a', 'b', 'a'), 1)
+    assert counter.pending('films', 'a') == 2
+
+    assert counter.flush() == 2
+    assert counter.pending('films', 'a') == 0
+    assert [f['views'] for f in db.films.find().sort('_id')] == [3, 1]
+
+
+def test_partial_bulk_failure_requeues_only_failed_ops(make_counter):
+    error = BulkWriteError({'writeErrors': [{'index': 1, 'code': 11000, 'errmsg': 'boom'}],
+                            'nInserted': 0, 'nModified': 2})
+    counter = make_counter(FailingCollection(error))
+    _count_views(counter)
+
+    assert counter.flush() == 2
+    assert [counter.pending('films', doc_id) for doc_id in 'abc'] == [0, 2, 0]
+
+
+def test_connection_error_requeues_whole_batch(make_counter):
+    counter = make_counter(FailingCollection(AutoReconnect('down')))
+    _count_views(counter)
+
+    assert counter.flush() == 0
+    assert [counter.pending('films', doc_id) for doc_id in 'abc'] == [2, 2, 2]
+
+
+def test_unflushed_counts_are_spooled_and_replayed(db, make_counter, tmp_path):
+    film_id = ObjectId()
+    down = make_counter(FailingCollection(AutoReconnect('down')), spool_dir=str(tmp_path))
+    _count_views(down, (film_id,), 3)
+    down.shutdown()
+
+    db.films.insert_one({'_id': film_id, 'views': 0})
+    # flush_interval=0: tanpa thread background, spool tetap dimuat
+    counter = make_counter(db.films, flush_interval=0, spool_dir=str(tmp_path))
+    counter.increment('films', film_id)
+    assert db.films.find_one({'_id': film_id})['views'] == 4
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unflushed_counts_without_spool_are_logged(make_counter, caplog):
+    counter = make_counter(FailingCollection(AutoReconnect('down')))
+    _count_views(counter)
+    counter.shutdown()
+    assert 'Dropping 3 unflushed view counts' in caplog.text
@@ -0,0 +1,65 @@
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from cache import TTLCache
+from watchlists import WatchlistStore
+
+
+class LosesUpsertRace:
+    """Another request creates the list between our filter match and insert."""
+
+    def __init__(self, watchlists, user_id, name):
+        self.watchlists = watchlists
+        self.rival = {'user_id': user_id, 'name_lower': name.casefold(), 'name': name, 'film_ids': []}
+
+    def update_one(self, query, update, upsert=False):
+        if upsert and self.rival is not None:
+            self.watchlists.insert_one(self.rival)
+            self.rival = None
+            raise DuplicateKeyError('E11000 duplicate key error')
+        return self.watchlists.update_one(query, update, upsert=upsert)
+
+    def __getattr__(self, name):
+        return getattr(self.watchlists, name)
+
+
+def _store(db, **kwargs):
+    db.watchlists.create_index([('user_id', 1), ('name_lower', 1)], unique=True)
+    return WatchlistStore(db.watchlists, db.films, {'title': 1}, **kwargs)
+
+
+def test_add_creates_then_adds_without_duplicates(db):
+    store = _store(db)
+    user_id, film_id = ObjectId(), ObjectId()
+    assert store.add(user_id, ' Horror ', film_id) == 'created'
+    assert store.add(user_id, 'horror', film_id) == 'exists'
+    assert store.add(user_id, 'HORROR', ObjectId()) == 'added'
+    assert store.names(user_id) == ['Horror']
+
+
+def test_concurrent_first_add_joins_the_existing_list(db):
+    user_id, film_id = ObjectId(), ObjectId()
+    store = _store(db)
+    store.watchlists = LosesUpsertRace(db.watchlists, user_id, 'Horror')
+    assert store.add(user_id, 'Horror', film_id) == 'added'
+    assert db.watchlists.find_one({'user_id': user_id})['film_ids'] == [film_id]
+
+
+def test_preview_and_for_user(db):
+    store = _store(db, cache=TTLCache(maxsize=100, ttl=60))
+    user_id = ObjectId()
+    films = [db.films.insert_one({'title': f'Film {i}', 'poster_url': f'p{i}'}).inserted_id for i in range(3)]
+    for film_id in films:
+        store.add(user_id, 'Weekend', film_id)
+    store.add(user_id, 'Week', films[0])
+
+    name, preview = store.preview(user_id, 'wee')
+    assert name == 'Weekend'
+    assert [f['title'] for f in preview] == ['Film 0', 'Film 1', 'Film 2']
+    assert store.preview(user_id, 'week')[0] == 'Week'
+
+    # add() mengosongkan cache preview user itu
+    store.add(user_id, 'Weekend', db.films.insert_one({'title': 'Film 3'}).inserted_id)
+    assert len(store.preview(user_id, 'weekend')[1]) == 4
+    lists = store.for_user(user_id)
+    assert [(wl['name'], len(wl['films'])) for wl in lists] == [('Weekend', 4), ('Week', 1)]
@@ -0,0 +1,78 @@
+"""Precomputed popular / new-release film lists.
+
+The home page and For Your Page show the same few lists on every hit. They are
+recomputed in the background every ``refresh_interval`` seconds and served
+from memory, so those pages run no sorts per request. With a ``collection``
+the snapshot is also materialised as a single document; a worker whose
+snapshot is stale first reads that document and only recomputes when it is
+older than the interval, so N workers don't each run the sorts. Within a
+worker only one refresh runs at a time: concurrent first requests wait for it
+instead of each computing the snapshot.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from background import PeriodicTask
+
+SNAPSHOT_ID = 'films'
+
+
+class TrendingSnapshot:
+    def __init__(self, films, card_projection, highlight_projection, size=10,
+                 refresh_interval=60, collection=None):
+        self.films = films
+        self.card_projection = card_projection
+        self.highlight_projection = highlight_projection
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.collection = collection
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._task = PeriodicTask('trending-snapshot', refresh_interval, self.refresh)
+
+    def _compute(self):
+        popular = list(self.films.find({}, self.card_projection)
+                       .sort([('views', -1), ('_id', -1)]).limit(self.size))
+        new_releases = list(self.films.find({}, self.card_projection)
+                            .sort([('release_date', -1), ('_id', -1)]).limit(self.size))
+        highlighted = None
+        if popular:
+            highlighted = self.films.find_one({'_id': popular[0]['_id']}, self.highlight_projection)
+        return {
+            'popular': popular,
+            'new_releases': new_releases,
+            'highlighted': highlighted,
+            'computed_at': datetime.utcnow(),
+        }
+
+    def refresh(self):
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self):
+        fresh_after = datetime.utcnow() - timedelta(seconds=self.refresh_interval)
+        snapshot = None
+        if self.collection is not None:
+            snapshot = self.collection.find_one({'_id': SNAPSHOT_ID, 'computed_at': {'$gt': fresh_after}})
+
+        if snapshot is None:
+            snapshot = self._compute()
+            if self.collection is not None:
+                self.collection.replace_one({'_id': SNAPSHOT_ID}, snapshot, upsert=True)
+
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def get(self):
+        self._task.ensure_started()
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Request pertama di worker ini: dihitung sekali, request lain menunggu hasilnya
+            with self._refresh_lock:
+                snapshot = self._snapshot or self._refresh()
+        return snapshot
+
+    def stop(self):
+        self._task.stop()
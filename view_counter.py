@@ -0,0 +1,147 @@
+"""Write-behind view counters.
+
+Page views are counted in memory and written in batches with ``bulk_write``
+``$inc`` operations, so a page view is a plain read instead of a
+``find_one_and_update``. Pending counts are flushed every ``flush_interval``
+seconds (by a ``background.PeriodicTask``), as soon as ``max_pending``
+documents are waiting, and at interpreter exit. If the database can't be
+reached at exit the counts are spooled to ``spool_dir`` and picked up by the
+next worker that counts a view; without a ``spool_dir`` they are logged and
+dropped. A failed batch is retried on the
+next flush: all of it when the command failed as a whole, only the operations
+listed in ``writeErrors`` when the server reports a partial failure, so
+increments that were applied are never applied twice.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+class ViewCounter:
+    def __init__(self, collections, field='views', flush_interval=5.0, max_pending=500,
+                 spool_dir=None):
+        self.collections = dict(collections)
+        self.field = field
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.spool_dir = spool_dir
+
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task = PeriodicTask('view-counter', flush_interval, self.flush)
+        self._pid = None
+
+        atexit.register(self.shutdown)
+
+    def increment(self, name, doc_id, amount=1):
+        self._load_spool_once()
+        with self._lock:
+            self._pending[(name, doc_id)] += amount
+            size = len(self._pending)
+
+        if self.flush_interval <= 0:
+            self.flush()
+            return
+        self._task.ensure_started()
+        if size >= self.max_pending:
+            self._task.trigger()
+
+    def pending(self, name, doc_id):
+        """Increments for ``doc_id`` not yet written to the database."""
+        with self._lock:
+            return self._pending.get((name, doc_id), 0)
+
+    def flush(self):
+        """Write all pending increments. Returns the number of documents updated."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, defaultdict(int)
+            if not batch:
+                return 0
+
+            by_collection = defaultdict(list)
+            for (name, doc_id), amount in batch.items():
+                by_collection[name].append((doc_id, amount))
+
+            written = 0
+            for name, entries in by_collection.items():
+                ops = [UpdateOne({'_id': doc_id}, {'$inc': {self.field: amount}}) for doc_id, amount in entries]
+                try:
+                    self.collections[name].bulk_write(ops, ordered=False)
+                    written += len(ops)
+                except BulkWriteError as e:
+                    # Sebagian sudah diterapkan: hanya operasi yang gagal dicoba lagi
+                    failed = {error['index'] for error in e.details.get('writeErrors', [])}
+                    self._requeue(name, [entries[i] for i in sorted(failed)])
+                    written += len(ops) - len(failed)
+                except PyMongoError:
+                    # Command gagal seluruhnya; dicoba lagi pada flush berikutnya
+                    self._requeue(name, entries)
+            return written
+
+    def _requeue(self, name, entries):
+        with self._lock:
+            for doc_id, amount in entries:
+                self._pending[(name, doc_id)] += amount
+
+    def _load_spool_once(self):
+        # Spool dimuat sekali per proses worker, bukan di master sebelum fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._load_spool()
+
+    def shutdown(self):
+        self._task.stop()
+        self.flush()
+        self._write_spool()
+
+    def _spool_path(self):
+        return os.path.join(self.spool_dir, f'views-{os.getpid()}.json')
+
+    def _write_spool(self):
+        with self._lock:
+            leftover = [[name, str(doc_id), amount] for (name, doc_id), amount in self._pending.items()]
+            self._pending.clear()
+        if not leftover:
+            return
+        if not self.spool_dir:
+            logger.warning("Dropping %d unflushed view counts: MongoDB unavailable and no spool_dir",
+                           len(leftover))
+            return
+        os.makedirs(self.spool_dir, exist_ok=True)
+        with open(self._spool_path(), 'w') as f:
+            json.dump(leftover, f)
+
+    def _load_spool(self):
+        # Dipanggil dengan self._lock terpegang
+        if not self.spool_dir:
+            return
+        for path in glob.glob(os.path.join(self.spool_dir, 'views-*.json')):
+            # Rename dulu supaya hanya satu worker yang mengambil file ini
+            claimed = f'{path}.{os.getpid()}.claimed'
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            try:
+                with open(claimed) as f:
+                    for name, doc_id, amount in json.load(f):
+                        if name in self.collections:
+                            self._pending[(name, ObjectId(doc_id))] += amount
+            finally:
+                os.remove(claimed)
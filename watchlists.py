@@ -0,0 +1,148 @@
+"""Named custom watchlists.
+
+Each list is its own document in the ``watchlists`` collection, unique on
+``(user_id, name_lower)``, instead of an entry in a ``custom_watchlists``
+array that was read, edited in Python and written back whole. Adding a film
+is a single upsert with ``$addToSet``: it creates the list if needed, never
+duplicates a film and can't lose a concurrent update from another tab.
+
+``preview`` serves the per-keystroke lookup of the "add to watchlist" modal.
+A user's list names (with the first few film ids) and each previewed list's
+film cards are kept in a short-lived per-process cache that ``add`` clears
+for that user; other workers catch up when the entry expires.
+"""
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from enrichment import fetch_by_ids
+
+LIST_SORT = [('created_at', 1)]
+PREVIEW_PROJECTION = {'title': 1, 'poster_url': 1, 'poster_local': 1, 'poster_variants': 1}
+
+
+def name_key(name):
+    return name.strip().casefold()
+
+
+class WatchlistStore:
+    def __init__(self, watchlists, films, film_projection=None, cache=None, preview_size=6):
+        self.watchlists = watchlists
+        self.films = films
+        self.film_projection = film_projection
+        self.cache = cache
+        self.preview_size = preview_size
+
+    def _invalidate(self, user_id, name_lower):
+        if self.cache is not None:
+            self.cache.pop(('lists', user_id))
+            self.cache.pop(('films', user_id, name_lower))
+
+    def add(self, user_id, name, film_id):
+        """Add ``film_id`` to the user's list ``name``, creating it if needed.
+
+        Returns ``'created'``, ``'added'`` or ``'exists'``.
+        """
+        key = name_key(name)
+        query = {'user_id': user_id, 'name_lower': key}
+        try:
+            result = self.watchlists.update_one(
+                query,
+                {
+                    '$addToSet': {'film_ids': film_id},
+                    '$setOnInsert': {'name': name.strip(), 'created_at': datetime.now()},
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Request lain baru saja membuat list yang sama; tambahkan ke list itu
+            result = self.watchlists.update_one(query, {'$addToSet': {'film_ids': film_id}})
+        self._invalidate(user_id, key)
+        if result.upserted_id is not None:
+            return 'created'
+        return 'added' if result.modified_count else 'exists'
+
+    def names(self, user_id):
+        return [wl['name'] for wl in
+                self.watchlists.find({'user_id': user_id}, {'name': 1, '_id': 0}).sort(LIST_SORT)]
+
+    def _summaries(self, user_id):
+        """``[(name_lower, name, first film ids)]`` for the user, cached."""
+        key = ('lists', user_id)
+        summaries = self.cache.get(key) if self.cache is not None else None
+        if summaries is None:
+            summaries = [
+                (wl['name_lower'], wl['name'], wl.get('film_ids', []))
+                for wl in self.watchlists.find(
+                    {'user_id': user_id},
+                    {'name_lower': 1, 'name': 1, 'film_ids': {'$slice': self.preview_size}, '_id': 0}
+                ).sort(LIST_SORT)
+            ]
+            if self.cache is not None:
+                self.cache.set(key, summaries)
+        return summaries
+
+    def preview(self, user_id, prefix):
+        """First list whose name starts with ``prefix`` (case-insensitive).
+
+        Returns ``(name, films)`` with only the title and poster fields per
+        film, or ``(None, [])`` when nothing matches. An exact name wins over a
+        longer one.
+        """
+        prefix = name_key(prefix)
+        if not prefix:
+            return None, []
+        matches = [s for s in self._summaries(user_id) if s[0].startswith(prefix)]
+        if not matches:
+            return None, []
+        name_lower, name, film_ids = next((s for s in matches if s[0] == prefix), matches[0])
+
+        key = ('films', user_id, name_lower)
+        films = self.cache.get(key) if self.cache is not None else None
+        if films is None:
+            known = fetch_by_ids(self.films, film_ids, {**PREVIEW_PROJECTION, '_id': 1})
+            films = [{k: known[i].get(k) for k in PREVIEW_PROJECTION} for i in film_ids if i in known]
+            if self.cache is not None:
+                self.cache.set(key, films)
+        return name, films
+
+    def for_user(self, user_id):
+        """All of a user's lists, each with its ``films`` (two queries in total)."""
+        lists = list(self.watchlists.find({'user_id': user_id}).sort(LIST_SORT))
+        film_ids = [film_id for wl in lists for film_id in wl.get('film_ids', [])]
+        known = fetch_by_ids(self.films, film_ids, self.film_projection)
+        for wl in lists:
+            wl['films'] = [known[i] for i in wl.get('film_ids', []) if i in known]
+        return lists
+
+    def migrate(self, users, batch_size=500):
+        """Move legacy ``users.custom_watchlists`` arrays into ``watchlists``.
+
+        Returns the number of users migrated.
+        """
+        migrated = 0
+        ops = []
+        for user in users.find({'custom_watchlists': {'$exists': True}}, {'custom_watchlists': 1}):
+            base = datetime.now()
+            for i, wl in enumerate(user.get('custom_watchlists') or []):
+                if not (wl.get('name') or '').strip():
+                    continue
+                ops.append(UpdateOne(
+                    {'user_id': user['_id'], 'name_lower': name_key(wl['name'])},
+                    {
+                        '$addToSet': {'film_ids': {'$each': wl.get('film_ids', [])}},
+                        # Urutan daftar lama dipertahankan lewat created_at
+                        '$setOnInsert': {'name': wl['name'].strip(),
+                                         'created_at': base + timedelta(microseconds=i)},
+                    },
+                    upsert=True
+                ))
+            migrated += 1
+            if len(ops) >= batch_size:
+                self.watchlists.bulk_write(ops, ordered=True)
+                ops = []
+        if ops:
+            self.watchlists.bulk_write(ops, ordered=True)
+        users.update_many({'custom_watchlists': {'$exists': True}}, {'$unset': {'custom_watchlists': ''}})
+        return migrated